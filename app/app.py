@@ -1,22 +1,36 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
-import uvicorn
-import yaml
-import os
-from core.state import TradingState
-from core.controller import TradingController
-from core.logger import TradeLogger
-from core.profiles import ProfileManager
-
-# Load configuration
-with open('config.yaml', 'r') as f:
-    config = yaml.safe_load(f)
-
-app = FastAPI(title="DAS Trader Pro API", version="1.0.0")
+from core.startup import StartupTimer
+
+startup_timer = StartupTimer()
+
+with startup_timer.phase("imports"):
+    from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.responses import FileResponse, Response
+    from pydantic import BaseModel
+    from typing import Optional, Dict, Any, List
+    from contextlib import asynccontextmanager
+    import uvicorn
+    import yaml
+    import os
+    import asyncio
+    from core.state import TradingState
+    from core.controller import TradingController
+    from core.logger import TradeLogger
+    from core.profiles import ProfileManager
+    from core.events import EventBroadcaster
+    from core.async_controller import AsyncTradingController
+    from core.execution_adapter import ThreadedAsyncAdapter
+
+@asynccontextmanager
+async def lifespan(app):
+    startup()
+    yield
+    # The monitor may be waiting on this loop for order results; stop it off-loop
+    await asyncio.to_thread(controller.scheduler.shutdown)
+    shutdown()
+
+app = FastAPI(title="DAS Trader Pro API", version="1.0.0", lifespan=lifespan)
 
 # MOUNT STATIC FILES - Serve frontend
 app.mount("/static", StaticFiles(directory="."), name="static")
@@ -30,16 +44,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize core components
-logger = TradeLogger(config['log_file'])
-profile_manager = ProfileManager(config['profiles_db'])
-state = TradingState(logger, profile_manager)
-controller = TradingController(state, config)
+# Core components, created on startup rather than at import time
+config = None
+logger = None
+profile_manager = None
+state = None
+controller = None
+async_controller = None
+
+# Pushes state diffs and log entries to connected /ws clients
+events = EventBroadcaster()
+
+def load_config() -> Dict[str, Any]:
+    """Load configuration"""
+    with open('config.yaml', 'r') as f:
+        return yaml.safe_load(f)
+
+def startup():
+    """Initialize core components"""
+    global config, logger, profile_manager, state, controller, async_controller
+
+    with startup_timer.phase("config"):
+        config = load_config()
+
+    with startup_timer.phase("logger"):
+        log_config = config.get('logging', {})
+        logger = TradeLogger(
+            config['log_file'],
+            flush_interval=log_config.get('flush_interval_ms', 50) / 1000,
+            fsync=log_config.get('fsync', 'batch'),
+            max_bytes=int(log_config.get('max_log_size_mb', 10) * 1024 * 1024),
+            max_files=log_config.get('max_log_files', 5)
+        )
+
+    with startup_timer.phase("profiles"):
+        profile_manager = ProfileManager(config['profiles_db'])
+
+    with startup_timer.phase("state"):
+        state = TradingState(logger, profile_manager)
+
+    with startup_timer.phase("controller"):
+        controller = TradingController(state, config)
+        # Orders go through the event loop; the paper adapter never blocks,
+        # the live one runs on worker threads
+        execution = ThreadedAsyncAdapter(controller.execution, offload=config['mode'] != 'paper')
+        order_timeout = config.get('execution', {}).get('order_timeout', 10)
+        controller.use_async_execution(execution, asyncio.get_running_loop(), order_timeout)
+        async_controller = AsyncTradingController(controller, execution, order_timeout)
+
+    logger.add_listener(lambda line: events.publish_raw("log", line))
+    state.add_listener(lambda diff: events.publish("state", diff))
+
+    startup_timer.finish()
+    print(startup_timer.format())
 
 # Pydantic models for request/response
 class TickerRequest(BaseModel):
     ticker: str
 
+class WatchlistRequest(BaseModel):
+    tickers: List[str]
+
 class ProfileRequest(BaseModel):
     profile: str
 
@@ -48,6 +113,28 @@ class TradeResponse(BaseModel):
     message: str
     state: Dict[str, Any]
 
+def shutdown():
+    """Stop monitoring, snapshot indicators, checkpoint state, flush buffered log entries and close the profile database"""
+    controller.scheduler.shutdown()
+    controller.save_indicator_snapshot()
+    controller.strategy_engine.close()
+    controller.execution.close()
+    if controller.bar_store is not None:
+        controller.bar_store.close()
+    state.close()
+    logger.close()
+    profile_manager.close()
+
+@app.get("/monitor-stats")
+async def get_monitor_stats():
+    """Tick-to-decision latency and monitoring scheduler timing"""
+    return controller.monitor_stats()
+
+@app.get("/startup-report")
+async def get_startup_report():
+    """Time spent in each startup phase"""
+    return startup_timer.report()
+
 # SERVE FRONTEND
 @app.get("/")
 async def serve_frontend():
@@ -56,24 +143,67 @@ async def serve_frontend():
 
 # Your existing API endpoints
 @app.get("/state")
-async def get_state():
-    """Get current trading state"""
-    return state.get_state()
+async def get_state(request: Request):
+    """Get current trading state; honours If-None-Match with the snapshot's ETag"""
+    snapshot = state.get_state()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if snapshot.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.to_bytes(), media_type="application/json", headers=headers)
+
+@app.websocket("/ws")
+async def stream_updates(websocket: WebSocket):
+    """Push state changes and new log entries as they happen"""
+    await websocket.accept()
+    queue = events.subscribe()
+    try:
+        # Reading the log tail is file I/O: keep it off the event loop
+        logs = await asyncio.to_thread(logger.get_recent_logs, 50)
+        await websocket.send_json({
+            "type": "snapshot",
+            "data": state.get_state(),
+            "logs": logs
+        })
+        while True:
+            message = await queue.get()
+            if message is None:
+                # Fell too far behind; the client reconnects for a fresh snapshot
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        events.unsubscribe(queue)
 
 @app.post("/start")
 async def start_strategy(request: TickerRequest):
     """Start trading strategy for a ticker"""
     try:
-        success, message = controller.start_strategy(request.ticker)
+        success, message = await async_controller.start_strategy(request.ticker)
         return TradeResponse(success=success, message=message, state=state.get_state())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/watchlist")
+async def start_watchlist(request: WatchlistRequest):
+    """Start multi-ticker trading for a list of tickers"""
+    try:
+        success, message = await async_controller.start_watchlist(request.tickers)
+        return TradeResponse(success=success, message=message, state=state.get_state())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/watchlist")
+async def get_watchlist():
+    """Get per-ticker state and positions in multi-ticker mode"""
+    return state.get_state()['watchlist']
+
 @app.post("/pause")
 async def pause_strategy():
     """Pause the trading strategy"""
     try:
-        success, message = controller.pause_strategy()
+        success, message = await async_controller.pause_strategy()
         return TradeResponse(success=success, message=message, state=state.get_state())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -82,7 +212,7 @@ async def pause_strategy():
 async def resume_strategy():
     """Resume the trading strategy"""
     try:
-        success, message = controller.resume_strategy()
+        success, message = await async_controller.resume_strategy()
         return TradeResponse(success=success, message=message, state=state.get_state())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -91,7 +221,7 @@ async def resume_strategy():
 async def emergency_exit():
     """Emergency exit - close all positions"""
     try:
-        success, message = controller.emergency_exit()
+        success, message = await async_controller.emergency_exit()
         return TradeResponse(success=success, message=message, state=state.get_state())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -100,15 +230,20 @@ async def emergency_exit():
 async def set_profile(request: ProfileRequest):
     """Set trading profile"""
     try:
-        success, message = controller.set_profile(request.profile)
+        success, message = await async_controller.set_profile(request.profile)
         return TradeResponse(success=success, message=message, state=state.get_state())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/logs")
-async def get_logs(limit: int = 100):
-    """Get recent trading logs"""
-    return logger.get_recent_logs(limit)
+async def get_logs(limit: int = 100, event: Optional[str] = None,
+                   start: Optional[str] = None, end: Optional[str] = None):
+    """Get recent trading logs, optionally filtered by event type and time range"""
+    # Both read log files (and wait for the writer to flush): run them off the event loop
+    if event or start or end:
+        event_types = event.split(',') if event else None
+        return await asyncio.to_thread(logger.query_logs, event=event_types, start=start, end=end, limit=limit)
+    return await asyncio.to_thread(logger.get_recent_logs, limit)
 
 @app.get("/profiles")
 async def get_profiles():
@@ -132,7 +267,7 @@ async def set_strategy(request: dict):
         if not strategy_name:
             raise HTTPException(status_code=400, detail="Strategy name required")
         
-        success, message = controller.set_strategy(strategy_name)
+        success, message = await async_controller.set_strategy(strategy_name)
         return TradeResponse(success=success, message=message, state=state.get_state())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -156,32 +291,14 @@ async def create_strategy(request: dict):
 async def get_strategy(strategy_name: str):
     """Get specific strategy configuration"""
     try:
-        # Mock strategy data
-        strategies = {
-            "default": {
-                "name": "5-Minute Breakout",
-                "description": "Basic breakout strategy",
-                "conditions": {
-                    "entry": ["price > average", "momentum > 0"],
-                    "exit": ["price < stop_loss", "price > take_profit"]
-                }
-            },
-            "momentum": {
-                "name": "Momentum", 
-                "description": "Follows strong momentum",
-                "conditions": {
-                    "entry": ["trend_upward", "volume_high"],
-                    "exit": ["trend_reversal", "target_reached"]
-                }
-            }
-        }
-        
-        strategy = strategies.get(strategy_name)
+        strategy = controller.get_strategy(strategy_name)
         if not strategy:
             raise HTTPException(status_code=404, detail="Strategy not found")
         return {"success": True, "strategy": strategy}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=config['api_port'])
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=load_config()['api_port'])
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""Streaming tick -> OHLCV bar aggregation at several timeframes at once.
+
+Timeframes cascade: a tick only updates the bar of the shortest timeframe,
+and each longer timeframe is built from the completed bars of the longest
+shorter one that divides it (1min -> 5min -> 15min), so adding a timeframe
+adds work once per bar, not once per tick. A bar closes on the first tick
+past its end, at every timeframe that tick crosses.
+
+Completed bars go into a preallocated BarBuffer per ticker and timeframe.
+Bars are stamped with their start time in seconds. Intervals without ticks
+produce no bars, and ticks older than the bar in progress are ignored.
+"""
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.backtest import Bars
+
+Bar = Tuple[float, float, float, float, float, float]  # (start, open, high, low, close, volume)
+BarListener = Callable[[str, int, Bar], None]  # fn(ticker, seconds, bar)
+
+
+class BarBuffer:
+    """The last `capacity` bars as a (6, n) column block, oldest first.
+
+    Every bar is written twice, capacity columns apart, so the most recent
+    bars are always one contiguous slice and reads never copy.
+    """
+
+    FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self.data = np.full((len(self.FIELDS), 2 * capacity), np.nan)
+        self.count = 0  # Bars appended so far
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, bar: Bar):
+        column = self.count % self.capacity
+        self.data[:, column] = bar
+        self.data[:, column + self.capacity] = bar
+        self.count += 1
+
+    def window(self, n: Optional[int] = None) -> np.ndarray:
+        """View of the last n bars (all held bars by default)"""
+        n = len(self) if n is None else min(n, len(self))
+        end = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else 0
+        return self.data[:, end - n:end]
+
+    def column(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        return self.window(n)[self.FIELDS.index(field)]
+
+
+class _Level:
+    """Bar in progress at one timeframe for one ticker"""
+
+    __slots__ = ("seconds", "bucket", "open", "high", "low", "close", "volume", "buffer", "children")
+
+    def __init__(self, seconds: int, capacity: int):
+        self.seconds = seconds
+        self.bucket: Optional[int] = None  # None: no bar in progress
+        self.open = self.high = self.low = self.close = self.volume = 0.0
+        self.buffer = BarBuffer(capacity)
+        self.children: List["_Level"] = []
+
+    def start(self, bucket: int, open: float, high: float, low: float, close: float, volume: float):
+        self.bucket = bucket
+        self.open, self.high, self.low, self.close, self.volume = open, high, low, close, volume
+
+    def merge(self, high: float, low: float, close: float, volume: float):
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.close = close
+        self.volume += volume
+
+    def finish(self) -> Bar:
+        bar = (float(self.bucket * self.seconds), self.open, self.high, self.low, self.close, self.volume)
+        self.buffer.append(bar)
+        self.bucket = None
+        return bar
+
+
+class BarAggregator:
+    """Turns ticks into OHLCV bars for every ticker at every timeframe"""
+
+    def __init__(self, timeframes: Sequence[int] = (60,), capacity: int = 500):
+        self.capacity = capacity
+        self.timeframes: List[int] = []
+        self._series: Dict[str, List[_Level]] = {}  # ticker -> levels, shortest first
+        self._roots: Dict[str, List[_Level]] = {}   # ticker -> levels fed by ticks
+        self._listeners: List[BarListener] = []
+        for seconds in timeframes:
+            self.add_timeframe(seconds)
+
+    def add_listener(self, fn: BarListener):
+        """Call fn(ticker, seconds, bar) for every bar that closes"""
+        self._listeners.append(fn)
+
+    def add_timeframe(self, seconds: int):
+        """Start aggregating another timeframe (no-op if already present)"""
+        seconds = int(seconds)
+        if seconds in self.timeframes:
+            return
+        self.timeframes = sorted(self.timeframes + [seconds])
+        for ticker, levels in self._series.items():
+            self._link(ticker, levels + [_Level(seconds, self.capacity)])
+
+    def _link(self, ticker: str, levels: List[_Level]):
+        """Wire each level to its source: the longest shorter timeframe that
+        divides it, or the ticks themselves"""
+        levels.sort(key=lambda level: level.seconds)
+        roots = []
+        for level in levels:
+            level.children = []
+        for i, level in enumerate(levels):
+            source = next((s for s in reversed(levels[:i]) if level.seconds % s.seconds == 0), None)
+            (source.children if source else roots).append(level)
+        self._series[ticker] = levels
+        self._roots[ticker] = roots
+
+    def _levels(self, ticker: str) -> List[_Level]:
+        if ticker not in self._series:
+            self._link(ticker, [_Level(seconds, self.capacity) for seconds in self.timeframes])
+        return self._roots[ticker]
+
+    def on_tick(self, ticker: str, price: float, timestamp: float, volume: float = 0.0) -> List[Tuple[int, Bar]]:
+        """Add a trade; returns the (seconds, bar) pairs it closed, shortest first"""
+        closed: List[Tuple[int, Bar]] = []
+        for level in self._roots.get(ticker) or self._levels(ticker):
+            bucket = math.floor(timestamp / level.seconds)
+            if bucket == level.bucket:
+                level.merge(price, price, price, volume)  # The common case: one bar updated
+                continue
+            if level.bucket is not None:
+                if bucket < level.bucket:
+                    continue  # Late tick
+                self._close(ticker, level, timestamp, closed)
+            level.start(bucket, price, price, price, price, volume)
+        return closed
+
+    def _close(self, ticker: str, level: _Level, timestamp: float, closed: List[Tuple[int, Bar]]):
+        bar = level.finish()
+        closed.append((level.seconds, bar))
+        for listener in self._listeners:
+            listener(ticker, level.seconds, bar)
+        for child in level.children:
+            self._roll(ticker, child, bar, timestamp, closed)
+
+    def _roll(self, ticker: str, level: _Level, bar: Bar, timestamp: float, closed: List[Tuple[int, Bar]]):
+        """Fold a completed shorter bar into level, closing level if the tick
+        at timestamp is already past its end"""
+        start, open, high, low, close, volume = bar
+        bucket = math.floor(start / level.seconds)
+        if level.bucket is None:
+            level.start(bucket, open, high, low, close, volume)
+        elif bucket == level.bucket:
+            level.merge(high, low, close, volume)
+        else:
+            self._close(ticker, level, timestamp, closed)
+            level.start(bucket, open, high, low, close, volume)
+        if math.floor(timestamp / level.seconds) > level.bucket:
+            self._close(ticker, level, timestamp, closed)
+
+    def buffer(self, ticker: str, seconds: int) -> BarBuffer:
+        for level in self._series.get(ticker, ()):
+            if level.seconds == seconds:
+                return level.buffer
+        raise KeyError(f"No {seconds}s bars for {ticker}")
+
+    def current(self, ticker: str, seconds: int) -> Optional[Bar]:
+        """The bar in progress, as far as it has been built"""
+        for level in self._series.get(ticker, ()):
+            if level.seconds == seconds and level.bucket is not None:
+                return (float(level.bucket * seconds), level.open, level.high, level.low, level.close, level.volume)
+        return None
+
+    def bars(self, ticker: str, seconds: int, n: Optional[int] = None) -> Bars:
+        """The last n completed bars as Bars (price columns are views)"""
+        timestamp, open, high, low, close, volume = self.buffer(ticker, seconds).window(n)
+        return Bars(close, open, high, low, volume, (timestamp * 1e9).astype(np.int64))
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime
+from typing import Tuple, Dict, Any, List, Optional
+from core.controller import TradingController
+from core.execution_adapter import AsyncExecutionAdapter
+
+
+class AsyncTradingController:
+    """Async counterpart of TradingController for the API's event loop.
+
+    Order round trips are awaited, concurrently across tickers and with a
+    timeout per order. The short read-check-write sections run on a worker
+    thread, so the loop never blocks on the state lock that the monitoring
+    thread holds during a tick.
+    """
+
+    def __init__(self, controller: TradingController, adapter: AsyncExecutionAdapter,
+                 order_timeout: Optional[float] = 10.0):
+        self.controller = controller
+        self.state = controller.state
+        self.adapter = adapter
+        self.order_timeout = order_timeout
+        self._commands = None  # asyncio.Lock, created on the running loop
+
+    def _command_lock(self) -> asyncio.Lock:
+        if self._commands is None:
+            self._commands = asyncio.Lock()
+        return self._commands
+
+    async def start_strategy(self, ticker: str) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.controller.start_strategy, ticker)
+
+    async def start_watchlist(self, tickers: List[str]) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.controller.start_watchlist, tickers)
+
+    async def pause_strategy(self) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.controller.pause_strategy)
+
+    async def resume_strategy(self) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.controller.resume_strategy)
+
+    async def set_profile(self, profile: str) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.controller.set_profile, profile)
+
+    async def set_strategy(self, strategy: str) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.controller.set_strategy, strategy)
+
+    async def emergency_exit(self) -> Tuple[bool, str]:
+        """Emergency exit - close all positions, submitting the orders concurrently"""
+        async with self._command_lock():
+            exits = await asyncio.to_thread(self._begin_emergency_exit)
+            try:
+                results = await self.adapter.place_orders([order for _, order in exits], self.order_timeout)
+                return await asyncio.to_thread(self._finish_emergency_exit, exits, results)
+            finally:
+                self.controller.exiting = False
+
+    def _begin_emergency_exit(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Stop the strategy so the monitor leaves positions alone, then list
+        an exit order for each one as (source, order). The controller stays
+        marked as exiting, so nothing re-arms the strategy while the orders
+        are out"""
+        with self.state.transaction():
+            current_state = self.state.get_state()
+            self.controller.exiting = True
+            self.state.update_state({"strategy_active": False})
+
+            exits = []
+            position = current_state['position']
+            if position:
+                exits.append(("position", self._exit_order(position['ticker'], position['quantity'])))
+            for ticker, entry in current_state['watchlist'].items():
+                if entry['position']:
+                    exits.append(("watchlist", self._exit_order(ticker, entry['position']['quantity'])))
+            return exits
+
+    def _exit_order(self, ticker: str, quantity: int) -> Dict[str, Any]:
+        return {
+            "ticker": ticker,
+            "quantity": -quantity,
+            "order_type": "MARKET",
+            "price": self.controller._get_current_price(ticker)
+        }
+
+    def _finish_emergency_exit(self, exits: List[Tuple[str, Dict[str, Any]]],
+                               results: List[Dict[str, Any]]) -> Tuple[bool, str]:
+        """Record the fills; the unfilled remainder of a working order is
+        cancelled and stays open for another attempt"""
+        with self.state.transaction():
+            fills = []
+            failed = []
+            for (source, order), result in zip(exits, results):
+                sold = -self.controller._filled_quantity(result)
+                if sold < -order['quantity']:
+                    failed.append(order['ticker'])
+                    self.state.logger.log({
+                        "timestamp": datetime.now().isoformat(),
+                        "event": "ORDER_FAILED",
+                        "ticker": order['ticker'],
+                        "quantity": order['quantity'],
+                        "filled_quantity": -sold,
+                        "status": result['status'],
+                        "message": f"EMERGENCY_EXIT order for {order['ticker']} {result['status']}, "
+                                   f"{sold} of {-order['quantity']} sold: {result.get('error', '')}"
+                    })
+                if sold <= 0:
+                    continue
+                if source == "position":
+                    self.state.exit_trade(result['executed_price'], "EMERGENCY_EXIT", quantity=sold)
+                else:
+                    fills.append((order['ticker'], result['executed_price'], "EMERGENCY_EXIT", sold))
+            self.state.exit_positions(fills)
+
+            if not self.state.get_state()['position']:
+                self.state.update_state({"current_state": "IDLE"})
+
+        if failed:
+            return False, f"Emergency exit incomplete: {', '.join(failed)} still open"
+        return True, "Emergency exit completed"
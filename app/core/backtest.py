@@ -0,0 +1,443 @@
+import argparse
+import math
+import os
+import time
+from typing import Dict, Any, List, Optional, Union
+
+import numpy as np
+import yaml
+
+from core.conditions import CompiledStrategy
+from core.utils import calculate_position_size
+
+# Indicators are undefined until this many bars are available
+WARMUP_BARS = 20
+
+# Variables that only exist while a position is open
+POSITION_FIELDS = {'entry_price', 'stop_loss', 'take_profit', 'quantity'}
+
+
+class Bars:
+    """Column arrays of OHLCV bars for a single ticker"""
+
+    def __init__(self, close, open=None, high=None, low=None, volume=None, timestamp=None):
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        n = len(self.close)
+        self.open = self._column(open, self.close)
+        self.high = self._column(high, self.close)
+        self.low = self._column(low, self.close)
+        self.volume = self._column(volume, np.zeros(n))
+        if timestamp is None:
+            self.timestamp = np.arange(n, dtype=np.int64)
+        else:
+            self.timestamp = np.ascontiguousarray(timestamp, dtype=np.int64)
+
+    @staticmethod
+    def _column(values, default):
+        if values is None:
+            return default
+        return np.ascontiguousarray(values, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.close)
+
+
+def load_bars(path: str) -> Bars:
+    """Load OHLCV bars from a CSV or Parquet file, or a bar store file.
+
+    Column names are matched case-insensitively; only 'close' is required.
+    Timestamps are converted to int64 nanoseconds since the epoch. Bar store
+    (.bars) files are memory-mapped rather than read.
+    """
+    if path.endswith('.bars'):
+        from core.bar_store import read_bar_file
+        return read_bar_file(path)
+
+    import pandas as pd
+
+    if path.endswith('.parquet') or path.endswith('.pq'):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    columns = {name.lower(): name for name in frame.columns}
+
+    def column(*names):
+        for name in names:
+            if name in columns:
+                return frame[columns[name]].to_numpy()
+        return None
+
+    close = column('close', 'price')
+    if close is None:
+        raise ValueError(f"No 'close' column in {path}")
+
+    timestamp = column('timestamp', 'time', 'datetime', 'date')
+    if timestamp is not None and not np.issubdtype(timestamp.dtype, np.integer):
+        timestamp = pd.to_datetime(timestamp).to_numpy().astype('datetime64[ns]').astype(np.int64)
+
+    return Bars(close, column('open'), column('high'), column('low'), column('volume'), timestamp)
+
+
+def _rolling(values: np.ndarray, window: int, reducer: str) -> np.ndarray:
+    """Reduce every trailing window along the last axis (NaN until full)"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+        out[..., window - 1:] = getattr(windows, reducer)(axis=-1)
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, 'mean')
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Population standard deviation (ddof=0), as used for Bollinger Bands"""
+    return _rolling(values, window, 'std')
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, 'max')
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, 'min')
+
+
+def _ema_scan(values: np.ndarray, alpha: float) -> np.ndarray:
+    """y[0] = x[0]; y[t] = y[t-1] + alpha * (x[t] - y[t-1]) along the last
+    axis, without a per-bar loop.
+
+    The series is cut into blocks short enough that decay**-block stays well
+    inside float64 range. Inside a block the recursion is a scaled cumsum; only
+    the carry between blocks is sequential (and shared by all rows).
+    """
+    n = values.shape[-1]
+    lead = values.shape[:-1]
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.copy()
+
+    block = int(min(1024, max(1, 30.0 / -math.log(decay))))
+    blocks = -(-n // block)
+    padded = np.zeros(lead + (blocks * block,))
+    padded[..., :n] = values
+    padded = padded.reshape(lead + (blocks, block))
+
+    k = np.arange(block)
+    partial = alpha * decay ** k * np.cumsum(padded * decay ** -k, axis=-1)
+
+    carries = np.empty(lead + (blocks,))
+    carry = values[..., 0]
+    decay_block = decay ** block
+    last = partial[..., -1]
+    for b in range(blocks):
+        carries[..., b] = carry
+        carry = decay_block * carry + last[..., b]
+
+    result = partial + decay ** (k + 1) * carries[..., None]
+    return result.reshape(lead + (-1,))[..., :n]
+
+
+def ema(values: np.ndarray, span: Optional[int] = None, alpha: Optional[float] = None,
+        min_periods: Optional[int] = None) -> np.ndarray:
+    """Vectorized equivalent of pandas ewm(adjust=False).mean() with leading NaNs
+    skipped; 2-D input is one series per row"""
+    if alpha is None:
+        alpha = 2.0 / (span + 1)
+    if min_periods is None:
+        min_periods = span or 0
+
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    length = values.shape[-1]
+    if not values.size:
+        return out
+
+    rows = values.reshape(-1, length)
+    result = out.reshape(-1, length)
+    valid = ~np.isnan(rows)
+    starts = np.where(valid.any(axis=1), valid.argmax(axis=1), -1)
+    # Rows whose data starts at the same bar are scanned together
+    for start in np.unique(starts[starts >= 0]):
+        group = np.flatnonzero(starts == start)
+        result[group, start:] = _ema_scan(rows[group, start:], alpha)
+        result[group, start:start + max(min_periods - 1, 0)] = np.nan
+    return out
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Wilder RSI, identical to ta.momentum.rsi"""
+    diff = np.diff(close, axis=-1, prepend=close[..., :1])
+    gain = np.where(diff > 0, diff, 0.0)
+    loss = np.where(diff < 0, -diff, 0.0)
+    avg_gain = ema(gain, alpha=1.0 / window, min_periods=window)
+    avg_loss = ema(loss, alpha=1.0 / window, min_periods=window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+
+def compute_indicators(close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """Every indicator StrategyEngine.calculate_indicators exposes, for all bars
+    at once; with (tickers, bars) matrices, for every ticker at once"""
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+
+    sma_20 = rolling_mean(close, 20)
+    std_20 = rolling_std(close, 20)
+    macd = ema(close, span=12) - ema(close, span=26)
+
+    return {
+        'price': close,
+        'volume': volume,
+        'sma_5': rolling_mean(close, 5),
+        'sma_10': rolling_mean(close, 10),
+        'sma_20': sma_20,
+        'ema_10': ema(close, span=10),
+        'ema_20': ema(close, span=20),
+        'rsi': rsi(close, 14),
+        'macd': macd,
+        'macd_signal': ema(macd, span=9),
+        'bb_upper': sma_20 + 2 * std_20,
+        'bb_lower': sma_20 - 2 * std_20,
+        'bb_middle': sma_20,
+        'volume_sma_20': rolling_mean(volume, 20),
+        'resistance': rolling_max(close, 20),
+        'support': rolling_min(close, 20)
+    }
+
+
+def _mask(value: Any, length: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=bool), (length,))
+
+
+def signal_masks(strategy: CompiledStrategy, indicators: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Entry mask and the position-independent part of the exit mask.
+
+    Exit conditions referencing position fields (e.g. entry_price) cannot be
+    precomputed; they are returned separately and evaluated per trade.
+    """
+    length = len(indicators['price'])
+
+    entry = np.ones(length, dtype=bool)
+    for condition in strategy.entry:
+        entry &= _mask(condition.evaluate_array(indicators), length)
+    entry[:WARMUP_BARS - 1] = False
+
+    exit_static = np.zeros(length, dtype=bool)
+    exit_dynamic = []
+    for condition in strategy.exit:
+        if condition.names & POSITION_FIELDS:
+            exit_dynamic.append(condition)
+        else:
+            exit_static |= _mask(condition.evaluate_array(indicators), length)
+    exit_static[:WARMUP_BARS - 1] = False
+
+    return {"entry": entry, "exit": exit_static, "exit_dynamic": exit_dynamic}
+
+
+class BacktestResult:
+    """Trades and summary statistics of a single backtest run"""
+
+    def __init__(self, strategy: str, trades: List[Dict[str, Any]], equity_curve: np.ndarray,
+                 initial_equity: float):
+        self.strategy = strategy
+        self.trades = trades
+        self.equity_curve = equity_curve
+        self.initial_equity = initial_equity
+
+    @property
+    def final_equity(self) -> float:
+        return float(self.equity_curve[-1]) if len(self.equity_curve) else self.initial_equity
+
+    @property
+    def pnl(self) -> float:
+        return sum(trade['pnl'] for trade in self.trades)
+
+    @property
+    def win_rate(self) -> float:
+        if not self.trades:
+            return 0.0
+        return sum(1 for trade in self.trades if trade['pnl'] > 0) / len(self.trades) * 100
+
+    @property
+    def max_drawdown_pct(self) -> float:
+        if not len(self.equity_curve):
+            return 0.0
+        peaks = np.maximum.accumulate(self.equity_curve)
+        return float(np.max((peaks - self.equity_curve) / peaks) * 100)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "trades": len(self.trades),
+            "pnl": self.pnl,
+            "return_pct": (self.final_equity / self.initial_equity - 1) * 100,
+            "win_rate": self.win_rate,
+            "max_drawdown_pct": self.max_drawdown_pct,
+            "final_equity": self.final_equity
+        }
+
+
+def _first_exit(close: np.ndarray, start: int, stop_loss: float, take_profit: float,
+                exit_static: np.ndarray, exit_dynamic: List, position: Dict[str, float],
+                indicators: Dict[str, np.ndarray]):
+    """Index and reason of the first bar at or after start that closes the position"""
+    n = len(close)
+    chunk = 64
+    while start < n:
+        end = min(n, start + chunk)
+        prices = close[start:end]
+        stop = prices <= stop_loss
+        target = prices >= take_profit
+        signal = exit_static[start:end].copy()
+        if exit_dynamic:
+            window = dict(position)
+            for condition in exit_dynamic:
+                for name in condition.names - POSITION_FIELDS:
+                    if name in indicators:
+                        window[name] = indicators[name][start:end]
+            for condition in exit_dynamic:
+                signal |= _mask(condition.evaluate_array(window), end - start)
+
+        hits = stop | target | signal
+        if hits.any():
+            i = int(np.argmax(hits))
+            if stop[i]:
+                reason = "STOP_LOSS"
+            elif target[i]:
+                reason = "TAKE_PROFIT"
+            else:
+                reason = "STRATEGY_EXIT"
+            return start + i, reason
+
+        start = end
+        chunk *= 2
+    return n - 1, "END_OF_DATA"
+
+
+def simulate(close: np.ndarray, masks: Dict[str, Any], profile: Dict[str, Any],
+             indicators: Dict[str, np.ndarray] = None, initial_equity: float = 100000.0,
+             strategy_name: str = "") -> BacktestResult:
+    """Run the IDLE -> LONG -> IDLE state machine over precomputed signal masks.
+
+    Mirrors the live controller: entries fill at the bar close, sizing comes
+    from capital_allocation_pct, and stop loss / take profit are checked
+    against the close of every subsequent bar before strategy exits.
+    """
+    n = len(close)
+    entries = np.flatnonzero(masks['entry'])
+    stop_loss_pct = profile['stop_loss_pct']
+    take_profit_pct = profile['take_profit_pct']
+    allocation_pct = profile['capital_allocation_pct']
+
+    equity = initial_equity
+    trades = []
+    # Difference arrays: realized PnL, shares held and cost basis per bar
+    realized = np.zeros(n)
+    held = np.zeros(n + 1)
+    cost = np.zeros(n + 1)
+
+    i = int(entries[0]) if len(entries) else n
+    while i < n - 1:
+        entry_price = float(close[i])
+        quantity = calculate_position_size(equity, entry_price, allocation_pct)
+        stop_loss = entry_price * (1 - stop_loss_pct / 100)
+        take_profit = entry_price * (1 + take_profit_pct / 100)
+        position = {
+            "entry_price": entry_price,
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "quantity": quantity
+        }
+
+        exit_index, reason = _first_exit(close, i + 1, stop_loss, take_profit, masks['exit'],
+                                         masks['exit_dynamic'], position, indicators)
+        exit_price = float(close[exit_index])
+        pnl = (exit_price - entry_price) * quantity
+        equity += pnl
+
+        realized[exit_index] += pnl
+        held[i] += quantity
+        held[exit_index] -= quantity
+        cost[i] += quantity * entry_price
+        cost[exit_index] -= quantity * entry_price
+        trades.append({
+            "entry_index": i,
+            "exit_index": exit_index,
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "quantity": quantity,
+            "pnl": pnl,
+            "exit_reason": reason
+        })
+
+        # A new entry is only considered on the bar after the exit
+        next_entry = np.searchsorted(entries, exit_index + 1)
+        i = int(entries[next_entry]) if next_entry < len(entries) else n
+
+    curve = initial_equity + np.cumsum(realized) + np.cumsum(held[:n]) * close - np.cumsum(cost[:n])
+    return BacktestResult(strategy_name, trades, curve, initial_equity)
+
+
+def run_backtest(bars: Bars, strategy: Union[CompiledStrategy, Dict[str, Any]], profile: Dict[str, Any],
+                 initial_equity: float = 100000.0,
+                 indicators: Dict[str, np.ndarray] = None) -> BacktestResult:
+    """Backtest one strategy over a set of bars"""
+    if not isinstance(strategy, CompiledStrategy):
+        strategy = CompiledStrategy(strategy.get('name', 'strategy'), strategy)
+    if indicators is None:
+        indicators = compute_indicators(bars.close, bars.volume)
+
+    masks = signal_masks(strategy, indicators)
+    return simulate(bars.close, masks, profile, indicators, initial_equity, strategy.name)
+
+
+def run_all(bars: Bars, strategies: Dict[str, Any], profile: Dict[str, Any],
+            initial_equity: float = 100000.0) -> Dict[str, BacktestResult]:
+    """Backtest every strategy, sharing one indicator pass"""
+    indicators = compute_indicators(bars.close, bars.volume)
+    return {
+        name: run_backtest(bars, CompiledStrategy(name, config), profile, initial_equity, indicators)
+        for name, config in strategies.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest strategies from config.yaml over historical bars")
+    parser.add_argument("data", help="CSV or Parquet file with OHLCV bars")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--strategy", help="Strategy name (default: all strategies)")
+    parser.add_argument("--profile", help="Profile name (default: config default_profile)")
+    parser.add_argument("--equity", type=float, default=100000.0)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    from core.profiles import ProfileManager
+    profile_name = args.profile or config.get('default_profile', 'safe_mode')
+    profiles_db = os.path.join(os.path.dirname(os.path.abspath(args.config)), config['profiles_db'])
+    profile = ProfileManager(profiles_db).get_profile(profile_name)
+
+    strategies = config.get('strategies', {})
+    if args.strategy:
+        strategies = {args.strategy: strategies[args.strategy]}
+
+    started = time.perf_counter()
+    bars = load_bars(args.data)
+    loaded = time.perf_counter()
+    results = run_all(bars, strategies, profile, args.equity)
+    finished = time.perf_counter()
+
+    print(f"{len(bars)} bars, profile {profile_name}: "
+          f"load {loaded - started:.3f}s, backtest {finished - loaded:.3f}s")
+    print(f"{'strategy':<16}{'trades':>8}{'pnl':>14}{'return %':>10}{'win %':>8}{'max dd %':>10}")
+    for result in results.values():
+        s = result.summary()
+        print(f"{s['strategy']:<16}{s['trades']:>8}{s['pnl']:>14.2f}{s['return_pct']:>10.2f}"
+              f"{s['win_rate']:>8.1f}{s['max_drawdown_pct']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
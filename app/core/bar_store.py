@@ -0,0 +1,222 @@
+"""Persistent columnar OHLCV bars, one file per ticker and timeframe.
+
+File layout (little-endian):
+
+    header  64 bytes: magic b"BARSTOR1", row count (int64), capacity (int64)
+    timestamp  capacity x int64   nanoseconds since the epoch, ascending
+    open       capacity x float64
+    high       capacity x float64
+    low        capacity x float64
+    close      capacity x float64
+    volume     capacity x float64
+
+Each column is a fixed-width array with room for `capacity` rows, so
+appends write in place and reads are numpy.memmap views with no parsing or
+copying. When a file fills up it is rewritten with double the capacity and
+swapped in atomically; readers holding the old mapping keep a consistent
+view. The row count is written after the data, so a reader never sees a
+row that is half written.
+"""
+import os
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from core.backtest import Bars
+
+MAGIC = b"BARSTOR1"
+HEADER = struct.Struct("<8sqq")
+HEADER_SIZE = 64
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+DTYPES = {"timestamp": np.dtype("<i8")}
+FLOAT = np.dtype("<f8")
+INITIAL_CAPACITY = 1024
+
+
+def timeframe_name(seconds: int) -> str:
+    """File name for a bar length: 60 -> '1min', 3600 -> '1h', 15 -> '15s'"""
+    for unit, size in (("d", 86400), ("h", 3600), ("min", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+class BarFile:
+    """One ticker's bars at one timeframe"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map: Optional[np.memmap] = None
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._write_file(path, {}, 0, INITIAL_CAPACITY)
+        self._file = open(path, "r+b")
+        self.count, self.capacity = self._read_header()
+
+    def _read_header(self) -> Tuple[int, int]:
+        self._file.seek(0)
+        magic, count, capacity = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a bar store file")
+        return count, capacity
+
+    @staticmethod
+    def _offset(column: int, capacity: int) -> int:
+        return HEADER_SIZE + column * capacity * 8
+
+    @classmethod
+    def _write_file(cls, path: str, columns: Dict[str, np.ndarray], count: int, capacity: int):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, count, capacity).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(cls._offset(len(COLUMNS), capacity))
+            for i, name in enumerate(COLUMNS):
+                if name in columns:
+                    f.seek(cls._offset(i, capacity))
+                    f.write(np.ascontiguousarray(columns[name][:count], DTYPES.get(name, FLOAT)).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _mapping(self) -> np.memmap:
+        mapping = self._map
+        if mapping is None:
+            mapping = self._map = np.memmap(self.path, dtype=np.uint8, mode="r")
+        return mapping
+
+    def column(self, name: str, count: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the first count rows of a column (callers
+        outside append hold the lock, so capacity and mapping match)"""
+        count = self.count if count is None else count
+        capacity = self.capacity
+        offset = self._offset(COLUMNS.index(name), capacity)
+        raw = self._mapping()[offset:offset + count * 8]
+        return raw.view(DTYPES.get(name, FLOAT))
+
+    def bars(self, start: int = 0, stop: Optional[int] = None) -> Bars:
+        """Rows start:stop as Bars of memory-mapped views"""
+        with self._lock:  # Columns must come from one mapping and count
+            count = self.count
+            columns = {name: self.column(name, count)[start:stop] for name in COLUMNS}
+        return Bars(columns["close"], columns["open"], columns["high"], columns["low"],
+                    columns["volume"], columns["timestamp"])
+
+    def append(self, timestamp, open, high, low, close, volume):
+        """Append rows (scalars or equal-length arrays); timestamps must be
+        increasing and later than the last stored bar"""
+        timestamp = np.atleast_1d(np.asarray(timestamp, dtype=np.int64))
+        n = len(timestamp)
+        values = {"timestamp": timestamp}
+        for name, value in zip(COLUMNS[1:], (open, high, low, close, volume)):
+            values[name] = np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+        if n == 0:
+            return
+        if n > 1 and np.any(np.diff(timestamp) <= 0):
+            raise ValueError("Bar timestamps must be strictly increasing")
+
+        with self._lock:
+            count = self.count
+            if count and timestamp[0] <= self.column("timestamp", count)[-1]:
+                raise ValueError(f"Bar at {timestamp[0]} is not after the last stored bar in {self.path}")
+            if count + n > self.capacity:
+                self._grow(count + n)
+            for i, name in enumerate(COLUMNS):
+                self._file.seek(self._offset(i, self.capacity) + count * 8)
+                self._file.write(np.ascontiguousarray(values[name], DTYPES.get(name, FLOAT)).tobytes())
+            self._file.flush()
+            # Publish the rows only once their data is in place
+            self._file.seek(0)
+            self._file.write(HEADER.pack(MAGIC, count + n, self.capacity))
+            self._file.flush()
+            self.count = count + n
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        columns = {name: np.array(self.column(name)) for name in COLUMNS}
+        self._file.close()
+        self._write_file(self.path, columns, self.count, capacity)
+        self._file = open(self.path, "r+b")
+        self.capacity = capacity
+        self._map = None  # Readers holding the old mapping keep their view
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        with self._lock:
+            return int(self.column("timestamp")[-1]) if self.count else None
+
+    def locate(self, timestamp: int, side: str = "left") -> int:
+        """Row index for a timestamp by binary search (numpy.searchsorted)"""
+        with self._lock:
+            return int(np.searchsorted(self.column("timestamp"), timestamp, side=side))
+
+    def flush(self):
+        with self._lock:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._map = None
+
+
+class BarStore:
+    """Directory of BarFiles laid out as root/TICKER/TIMEFRAME.bars"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._files: Dict[Tuple[str, str], BarFile] = {}
+        self._lock = threading.Lock()
+
+    def path(self, ticker: str, timeframe: str) -> str:
+        return os.path.join(self.root, ticker, f"{timeframe}.bars")
+
+    def file(self, ticker: str, timeframe: str) -> BarFile:
+        key = (ticker, timeframe)
+        bar_file = self._files.get(key)
+        if bar_file is None:
+            with self._lock:
+                bar_file = self._files.get(key)
+                if bar_file is None:
+                    bar_file = self._files[key] = BarFile(self.path(ticker, timeframe))
+        return bar_file
+
+    def exists(self, ticker: str, timeframe: str) -> bool:
+        return (ticker, timeframe) in self._files or os.path.exists(self.path(ticker, timeframe))
+
+    def append(self, ticker: str, timeframe: str, timestamp, open, high, low, close, volume=0.0):
+        self.file(ticker, timeframe).append(timestamp, open, high, low, close, volume)
+
+    def read(self, ticker: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None) -> Bars:
+        """Bars with start <= timestamp < end (nanoseconds; None is open-ended)"""
+        bar_file = self.file(ticker, timeframe)
+        first = 0 if start is None else bar_file.locate(start)
+        last = None if end is None else bar_file.locate(end)
+        return bar_file.bars(first, last)
+
+    def tail(self, ticker: str, timeframe: str, n: int) -> Bars:
+        """The most recent n bars"""
+        bar_file = self.file(ticker, timeframe)
+        return bar_file.bars(max(bar_file.count - n, 0))
+
+    def count(self, ticker: str, timeframe: str) -> int:
+        return self.file(ticker, timeframe).count if self.exists(ticker, timeframe) else 0
+
+    def close(self):
+        with self._lock:
+            for bar_file in self._files.values():
+                bar_file.close()
+            self._files.clear()
+
+
+def read_bar_file(path: str) -> Bars:
+    """All bars in one store file, e.g. for a backtest"""
+    bar_file = BarFile(path)
+    try:
+        return bar_file.bars()
+    finally:
+        bar_file._file.close()
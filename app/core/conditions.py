@@ -0,0 +1,288 @@
+import re
+import operator
+from functools import lru_cache, reduce
+from typing import Dict, Any, List, Callable, Tuple
+
+# Condition grammar (keywords are case-insensitive):
+#
+#   expr       := and_expr ('OR' and_expr)*
+#   and_expr   := comparison ('AND' comparison)*
+#   comparison := arith (CMP arith | 'BETWEEN' arith 'AND' arith)?
+#   arith      := term (('+' | '-') term)*
+#   term       := factor (('*' | '/') factor)*
+#   factor     := NUMBER | NAME | '(' expr ')' | '-' factor
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_][A-Za-z0-9_]*)|(>=|<=|==|!=|[<>+\-*/()]))")
+
+_KEYWORDS = {'and', 'or', 'between'}
+
+_COMPARISONS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+_ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+
+def tokenize(source: str) -> List[Tuple[str, Any]]:
+    """Split a condition string into (kind, value) tokens"""
+    tokens = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        match = _TOKEN_RE.match(source, pos)
+        if not match:
+            raise ValueError(f"Unexpected character {source[pos:].strip()[:1]!r} in condition '{source}'")
+        number, name, op = match.groups()
+        if number is not None:
+            tokens.append(('num', float(number)))
+        elif name is not None:
+            if name.lower() in _KEYWORDS:
+                tokens.append(('kw', name.lower()))
+            else:
+                tokens.append(('name', name))
+        else:
+            tokens.append(('op', op))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.pos = 0
+
+    def peek(self) -> Tuple[str, Any]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return ('end', None)
+
+    def take(self) -> Tuple[str, Any]:
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, kind: str, value: Any):
+        token = self.take()
+        if token != (kind, value):
+            raise ValueError(f"Expected '{value}' in condition '{self.source}'")
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Empty condition")
+        node = self.expr()
+        if self.peek()[0] != 'end':
+            raise ValueError(f"Unexpected '{self.peek()[1]}' in condition '{self.source}'")
+        return node
+
+    def expr(self):
+        parts = [self.and_expr()]
+        while self.peek() == ('kw', 'or'):
+            self.take()
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else ('or', parts)
+
+    def and_expr(self):
+        parts = [self.comparison()]
+        while self.peek() == ('kw', 'and'):
+            self.take()
+            parts.append(self.comparison())
+        return parts[0] if len(parts) == 1 else ('and', parts)
+
+    def comparison(self):
+        left = self.arith()
+        kind, value = self.peek()
+        if kind == 'op' and value in _COMPARISONS:
+            self.take()
+            return ('cmp', value, left, self.arith())
+        if (kind, value) == ('kw', 'between'):
+            self.take()
+            low = self.arith()
+            self.expect('kw', 'and')
+            return ('between', left, low, self.arith())
+        return left
+
+    def arith(self):
+        node = self.term()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('+', '-'):
+            node = ('bin', self.take()[1], node, self.term())
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('*', '/'):
+            node = ('bin', self.take()[1], node, self.factor())
+        return node
+
+    def factor(self):
+        kind, value = self.take()
+        if kind == 'num':
+            return ('num', value)
+        if kind == 'name':
+            return ('var', value)
+        if (kind, value) == ('op', '('):
+            node = self.expr()
+            self.expect('op', ')')
+            return node
+        if (kind, value) == ('op', '-'):
+            return ('neg', self.factor())
+        if kind == 'end':
+            raise ValueError(f"Unexpected end of condition '{self.source}'")
+        raise ValueError(f"Unexpected '{value}' in condition '{self.source}'")
+
+
+def parse_condition(source: str):
+    """Parse a condition string into a predicate tree of nested tuples"""
+    return _Parser(source).parse()
+
+
+def _variables(node) -> set:
+    kind = node[0]
+    if kind == 'var':
+        return {node[1]}
+    if kind == 'num':
+        return set()
+    if kind in ('and', 'or'):
+        return set().union(*(_variables(part) for part in node[1]))
+    if kind in ('cmp', 'bin'):
+        return _variables(node[2]) | _variables(node[3])
+    return set().union(*(_variables(part) for part in node[1:]))
+
+
+def _compile_scalar(node) -> Callable[[Dict[str, Any]], Any]:
+    """Turn a predicate tree into nested closures over a market data dict"""
+    kind = node[0]
+
+    if kind == 'num':
+        value = node[1]
+        return lambda data: value
+
+    if kind == 'var':
+        name = node[1]
+        return lambda data: data[name]
+
+    if kind == 'neg':
+        inner = _compile_scalar(node[1])
+        return lambda data: -inner(data)
+
+    if kind in ('bin', 'cmp'):
+        op = _ARITHMETIC[node[1]] if kind == 'bin' else _COMPARISONS[node[1]]
+        left = _compile_scalar(node[2])
+        right = _compile_scalar(node[3])
+        return lambda data: op(left(data), right(data))
+
+    if kind == 'between':
+        value, low, high = (_compile_scalar(part) for part in node[1:])
+        return lambda data: low(data) <= value(data) <= high(data)
+
+    parts = [_compile_scalar(part) for part in node[1]]
+    if kind == 'and':
+        return lambda data: all(part(data) for part in parts)
+    return lambda data: any(part(data) for part in parts)
+
+
+def _compile_vector(node) -> Callable[[Dict[str, Any]], Any]:
+    """Like _compile_scalar, but for dicts of NumPy arrays (element-wise logic)"""
+    kind = node[0]
+
+    if kind in ('num', 'var'):
+        return _compile_scalar(node)
+
+    if kind == 'neg':
+        inner = _compile_vector(node[1])
+        return lambda data: -inner(data)
+
+    if kind in ('bin', 'cmp'):
+        op = _ARITHMETIC[node[1]] if kind == 'bin' else _COMPARISONS[node[1]]
+        left = _compile_vector(node[2])
+        right = _compile_vector(node[3])
+        return lambda data: op(left(data), right(data))
+
+    if kind == 'between':
+        value, low, high = (_compile_vector(part) for part in node[1:])
+        return lambda data: (low(data) <= value(data)) & (value(data) <= high(data))
+
+    parts = [_compile_vector(part) for part in node[1]]
+    combine = operator.and_ if kind == 'and' else operator.or_
+    return lambda data: reduce(combine, (part(data) for part in parts))
+
+
+class CompiledCondition:
+    """A condition parsed once and evaluated as a closure tree"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tree = parse_condition(source)
+        self.names = frozenset(_variables(self.tree))
+        self._fn = _compile_scalar(self.tree)
+        self._vector_fn = None
+
+    def __call__(self, market_data: Dict[str, Any]) -> bool:
+        try:
+            return bool(self._fn(market_data))
+        except (KeyError, TypeError, ZeroDivisionError):
+            # Missing or non-numeric inputs never satisfy a condition
+            return False
+
+    def evaluate_array(self, market_data: Dict[str, Any]) -> Any:
+        """Evaluate against arrays of values; returns a boolean array (or False)"""
+        if self._vector_fn is None:
+            self._vector_fn = _compile_vector(self.tree)
+        try:
+            return self._vector_fn(market_data)
+        except (KeyError, TypeError, ZeroDivisionError):
+            return False
+
+    def __repr__(self):
+        return f"CompiledCondition({self.source!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(source: str) -> CompiledCondition:
+    """Compile a condition string, reusing earlier compilations"""
+    return CompiledCondition(source)
+
+
+class CompiledStrategy:
+    """Entry/exit conditions of a strategy, compiled up front"""
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.config = config
+        conditions = config.get('conditions', {}) or {}
+        try:
+            self.entry = [compile_condition(c) for c in conditions.get('entry', []) or []]
+            self.exit = [compile_condition(c) for c in conditions.get('exit', []) or []]
+        except ValueError as e:
+            raise ValueError(f"Strategy '{name}': {e}")
+        self.timeframe = config.get('timeframe')
+
+    def should_enter(self, market_data: Dict[str, Any]) -> bool:
+        """All entry conditions must hold"""
+        for condition in self.entry:
+            if not condition(market_data):
+                return False
+        return True
+
+    def should_exit(self, market_data: Dict[str, Any]) -> bool:
+        """Any exit condition triggers an exit"""
+        for condition in self.exit:
+            if condition(market_data):
+                return True
+        return False
+
+    def evaluate(self, market_data: Dict[str, Any]) -> Dict[str, bool]:
+        return {
+            "entry": self.should_enter(market_data),
+            "exit": self.should_exit(market_data)
+        }
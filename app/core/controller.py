@@ -1,60 +1,421 @@
+import json
+import os
 import time
-from typing import Tuple, Dict, Any, List  # ADDED List import
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+import numpy as np
+from typing import Tuple, Dict, Any, List, Optional  # ADDED List import
 from core.state import TradingState
-from core.execution_adapter import PaperTradingAdapter, LiveTradingAdapter
+from core.monitor import TickScheduler, LatencyStats, parse_timeframe
+from core.aggregation import BarAggregator, Bar
+from core.execution_adapter import PaperTradingAdapter, LiveTradingAdapter, AsyncExecutionAdapter, run_sync
+from core.market_data import create_market_data
+from core.backtest import POSITION_FIELDS
+from core.indicators import IndicatorState
+from core.ring_buffer import RingBuffer
+from core.price_store import PriceStore
+from core.bar_store import BarStore, timeframe_name
+from core.strategy import StrategyEngine
+from core.conditions import CompiledStrategy
 from core.utils import calculate_position_size
-import random
 
 
 class TradingController:
+    HISTORY_BARS = 50  # Closes kept per ticker for entry checks
+    WARMUP_BARS = 500  # Stored bars replayed into indicators when there is no snapshot
+
     def __init__(self, state: TradingState, config: Dict[str, Any]):
         self.state = state
         self.config = config
-        self.scheduler = BackgroundScheduler()
+        # Set while an emergency exit's orders are in flight; start and
+        # resume are refused until it has recorded their fills
+        self.exiting = False
+        # One feed for the strategy and (in paper mode) the simulated exchange
+        self.market_data = create_market_data(config.get('market_data', {}))
+        # Closed bars are kept on disk when a bar store directory is configured
+        bar_store = config.get('market_data', {}).get('bar_store')
+        self.bar_store = BarStore(bar_store) if bar_store else None
+
+        # Prices are checked every update_interval seconds (fractions allowed);
+        # stops and targets on every tick, entries once per strategy bar
+        self.update_interval = float(
+            config.get('market_data', {}).get('update_interval', 60))
+        self.scheduler = TickScheduler(
+            self.update_interval, self._monitor_trading, name="trading-monitor")
+        # Strategy definitions: strategies_file when present, else the
+        # strategies section; edits to the file are picked up while running
+        self.strategy_engine = StrategyEngine(
+            config.get('strategies_file', 'strategies.yaml'),
+            defaults=config.get('strategies') or {'default': {}})
+        # Ticks become OHLCV bars at every timeframe the strategies declare;
+        # entries run on the active strategy's bars
+        self.aggregator = BarAggregator(self._strategy_timeframes())
+        self.aggregator.add_listener(self._store_bar)
+        self.strategy_engine.add_reload_listener(self._on_strategies_changed)
+        reload_interval = config.get('strategy_reload_interval')
+        if reload_interval:
+            self.strategy_engine.watch(float(reload_interval))
+        # Per-ticker indicator state survives restarts: it is snapshotted every
+        # indicator_snapshot_interval seconds and on shutdown, or else rebuilt
+        # from the bar store, so entries need no warm-up period
+        self.indicators = self.strategy_engine.indicators
+        self.price_history: Dict[str, RingBuffer] = {}
+        self.price_store = PriceStore(capacity=self.HISTORY_BARS)  # Watchlist closes, one row per ticker
+        self.indicator_snapshot = config.get('market_data', {}).get('indicator_snapshot')
+        self.snapshot_interval = float(
+            config.get('market_data', {}).get('indicator_snapshot_interval', 300))
+        self._last_snapshot = time.monotonic()
+        self._restored = self._read_indicator_snapshot()
+        self.latency = LatencyStats()  # Price received -> decision made
+        self.max_open_positions = config.get(
+            'risk_management', {}).get('max_open_positions')
 
         # Initialize execution adapter based on mode
         if config['mode'] == 'paper':
-            self.execution = PaperTradingAdapter()
+            self.execution = PaperTradingAdapter.from_config(
+                config.get('paper_trading', {}), self.market_data)
         else:
             self.execution = LiveTradingAdapter(
                 config.get('das_api_config', {}))
+        # Set by use_async_execution to submit order batches concurrently
+        self.async_execution = None
+        self._loop = None
+        self.order_timeout = None
 
         # Start monitoring job
         self._start_monitoring()
 
     def _start_monitoring(self):
         """Start the background monitoring job"""
-        trigger = IntervalTrigger(minutes=1)  # Check every minute
-        self.scheduler.add_job(
-            self._monitor_trading,
-            trigger,
-            id='trading_monitor'
-        )
         self.scheduler.start()
 
-    def _monitor_trading(self):
-        """Main trading monitoring logic"""
+    def use_async_execution(self, adapter: AsyncExecutionAdapter, loop, order_timeout: float = None):
+        """Submit batches of orders through adapter on loop (the API's event
+        loop), concurrently and with a timeout per order"""
+        self.async_execution = adapter
+        self._loop = loop
+        self.order_timeout = order_timeout
+
+    def _place_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Place several orders, concurrently when an async adapter is attached"""
+        if self.async_execution is not None:
+            return run_sync(self.async_execution.place_orders(orders, self.order_timeout), self._loop)
+        return [self.execution.place_order(**order) for order in orders]
+
+    def _filled_quantity(self, order_result: Dict[str, Any]) -> int:
+        """Signed shares a market order actually filled.
+
+        An order that is still working (partly filled, or not filled within
+        the adapter's timeout) has its remainder cancelled, so the position
+        recorded in state is the one the broker holds and nothing is left
+        to fill later unseen.
+        """
+        status = order_result['status']
+        if status == 'FILLED':
+            return order_result.get('filled_quantity', order_result['quantity'])
+        if status in ('SUBMITTED', 'PARTIALLY_FILLED') and order_result.get('order_id'):
+            self.execution.cancel_order(order_result['order_id'])
+            # Fills that arrived before the cancel took effect count too
+            latest = getattr(self.execution, 'get_order', lambda _: None)(order_result['order_id'])
+            if latest is not None:
+                return latest.get('filled_quantity') or 0
+        return order_result.get('filled_quantity') or 0
+
+    def _timeframe_seconds(self) -> int:
+        """Bar length of the active strategy's timeframe"""
+        strategies = self.strategy_engine.strategies
+        name = self.state.get_state().get('strategy', 'default')
+        strategy = strategies.get(name) or strategies.get('default') or {}
+        return parse_timeframe(strategy.get('timeframe', '1min'))
+
+    def _strategy_timeframes(self) -> List[int]:
+        """Bar lengths of every configured strategy"""
+        strategies = self.strategy_engine.strategies or {'default': {}}  # An empty file
+        return sorted({parse_timeframe(s.get('timeframe', '1min')) for s in strategies.values()})
+
+    def _on_strategies_changed(self, strategies: Dict[str, Any]):
+        """Start building bars for any new timeframe; existing bars and
+        indicator history carry over. Runs on the reload watcher thread, so
+        it takes the lock ticks are aggregated under"""
+        with self.state.transaction():
+            for seconds in self._strategy_timeframes():
+                self.aggregator.add_timeframe(seconds)
+
+    def _aggregate(self, ticker: str, price: float, timestamp: float) -> Optional[Bar]:
+        """Add a tick; returns the active timeframe's bar if the tick closed one"""
+        seconds = self._timeframe_seconds()
+        self.aggregator.add_timeframe(seconds)
+        for bar_seconds, bar in self.aggregator.on_tick(ticker, price, timestamp):
+            if bar_seconds == seconds:
+                return bar
+        return None
+
+    def _store_bar(self, ticker: str, seconds: int, bar: Bar):
+        """Persist a closed bar of any timeframe"""
+        if self.bar_store is None:
+            return
+        bar_file = self.bar_store.file(ticker, timeframe_name(seconds))
+        timestamp = int(bar[0] * 1e9)
+        last = bar_file.last_timestamp
+        if last is None or timestamp > last:  # e.g. a replay started over
+            bar_file.append(timestamp, *bar[1:])
+
+    def _load_history(self, ticker: str):
+        """Seed a ticker's closes and indicators the first time it is seen,
+        so decisions pick up where the last run left off: from the snapshot
+        if no bars were stored after it, otherwise rebuilt from stored bars"""
+        if ticker in self.price_history:
+            return
+        closes = self.price_history[ticker] = RingBuffer(self.HISTORY_BARS)
+        saved = self._restored.pop(ticker, None)
+        if saved is not None and saved['last_bar'] == self._last_stored_bar(ticker):
+            closes.extend(saved['closes'])
+            self.indicators.states[ticker] = IndicatorState.restore(saved['indicators'])
+            return
+
+        timeframe = timeframe_name(self._timeframe_seconds())
+        if self.bar_store is None or not self.bar_store.exists(ticker, timeframe):
+            self.indicators.reset(ticker)
+            return
+        bars = self.bar_store.tail(ticker, timeframe, self.WARMUP_BARS)
+        closes.extend(bars.close)
+        self.indicators.warm_up(ticker, bars.close, bars.volume)
+
+    def _last_stored_bar(self, ticker: str) -> Optional[int]:
+        timeframe = timeframe_name(self._timeframe_seconds())
+        if self.bar_store is None or not self.bar_store.exists(ticker, timeframe):
+            return None
+        return self.bar_store.file(ticker, timeframe).last_timestamp
+
+    def _read_indicator_snapshot(self) -> Dict[str, Any]:
+        """Per-ticker state saved by save_indicator_snapshot, if it was saved
+        for the current timeframe"""
+        if not self.indicator_snapshot:
+            return {}
+        try:
+            with open(self.indicator_snapshot, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            if os.path.exists(self.indicator_snapshot):
+                print(f"Ignoring indicator snapshot {self.indicator_snapshot}: {e}")
+            return {}
+        if snapshot.get('bar_seconds') != self._timeframe_seconds():
+            return {}
+        return snapshot.get('tickers', {})
+
+    def save_indicator_snapshot(self):
+        """Write every ticker's closes and indicator state to indicator_snapshot"""
+        if not self.indicator_snapshot:
+            return
+        with self.state.transaction():  # No bar is half applied
+            tickers = {
+                ticker: {"closes": closes.tolist(),
+                         "indicators": self.indicators.states[ticker].snapshot(),
+                         "last_bar": self._last_stored_bar(ticker)}
+                for ticker, closes in self.price_history.items()
+                if ticker in self.indicators.states}
+            snapshot = {"bar_seconds": self._timeframe_seconds(), "tickers": tickers}
+        os.makedirs(os.path.dirname(self.indicator_snapshot) or ".", exist_ok=True)
+        tmp_file = self.indicator_snapshot + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_file, self.indicator_snapshot)
+        self._last_snapshot = time.monotonic()
+
+    def _monitor_trading(self, timestamp: Optional[float] = None):
+        """Main trading monitoring logic, run once per scheduler tick"""
+        timestamp = time.time() if timestamp is None else timestamp
         current_state = self.state.get_state()
 
+        if self.indicator_snapshot and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.save_indicator_snapshot()
+
         if not current_state['strategy_active']:
             return
 
-        if current_state['current_state'] == 'LONG':
-            self._monitor_exit_conditions()
-        elif current_state['current_state'] == 'IDLE':
-            self._check_entry_conditions()
+        # Poll once for every ticker in play; a replayed feed may report a
+        # recorded timestamp rather than now
+        ticker = current_state['ticker']
+        tickers = ([ticker] if ticker else []) + list(current_state['watchlist'])
+        timestamp, prices = self.market_data.poll(tickers, timestamp)
+        quotes = dict(zip(tickers, prices.tolist()))
+
+        if ticker and quotes[ticker] == quotes[ticker]:  # NaN: no data
+            self.on_price(ticker, quotes[ticker], timestamp)
+
+        if current_state['watchlist']:
+            self._monitor_watchlist(timestamp, quotes)
+
+    def on_price(self, ticker: str, price: float, timestamp: Optional[float] = None):
+        """Act on a new price for the active ticker.
+
+        Stop loss and take profit are checked on every price; entry rules run
+        on the close of each bar of the strategy's timeframe, when the first
+        price past its end arrives.
+        """
+        received = time.perf_counter()
+        timestamp = time.time() if timestamp is None else timestamp
+
+        # One transaction per tick: API commands wait for it to finish rather
+        # than interleaving with it (status reads stay lock-free)
+        with self.state.transaction():
+            current_state = self.state.get_state()
+            if not current_state['strategy_active'] or current_state['ticker'] != ticker:
+                return
+
+            self._load_history(ticker)  # Before this tick's bar reaches the store
+            closed = self._aggregate(ticker, price, timestamp)
+
+            if current_state['current_state'] == 'LONG':
+                self._monitor_exit_conditions(price)
+
+            if closed is not None:
+                self._check_entry_conditions(ticker, closed[4], price, closed[5])
+
+        self.latency.record(time.perf_counter() - received)
+
+    def monitor_stats(self) -> Dict[str, Any]:
+        """Tick-to-decision latency and scheduler timing"""
+        return {
+            "decision_latency": self.latency.summary(),
+            "scheduler": self.scheduler.stats(),
+            "bar_seconds": self._timeframe_seconds(),
+            "timeframes": self.aggregator.timeframes
+        }
+
+    def _monitor_watchlist(self, timestamp: float, quotes: Optional[Dict[str, float]] = None):
+        """Evaluate every watchlist ticker in one batch at the polled quotes"""
+        quotes = quotes or {}
+        with self.state.transaction():
+            received = time.perf_counter()
+            watchlist = self.state.get_state()['watchlist']
+            # Tickers added since the poll use their latest price
+            prices = np.array([quotes[t] if t in quotes else self._get_current_price(t) for t in watchlist])
+            known = ~np.isnan(prices)
+            tickers = [t for t, k in zip(watchlist, known) if k]
+            prices = prices[known]
+
+            is_long = np.array([watchlist[t]['position'] is not None for t in tickers])
+            if is_long.any():
+                self._check_watchlist_exits(
+                    [t for t, long in zip(tickers, is_long) if long], prices[is_long], watchlist)
+
+            # Strategy conditions, like the single-ticker mode, only on bar close
+            for ticker in tickers:
+                self._load_history(ticker)  # Before this tick's bar reaches the store
+            rows = self._watchlist_rows(tickers)
+            closes = np.full(len(tickers), np.nan)
+            for i, (ticker, price) in enumerate(zip(tickers, prices.tolist())):
+                bar = self._aggregate(ticker, price, timestamp)
+                if bar is not None:
+                    closes[i] = bar[4]
+                    # Kept per ticker too, so snapshots cover the watchlist
+                    self.price_history[ticker].append(bar[4])
+                    self.indicators.update(ticker, bar[4], bar[5])
+            closed = np.flatnonzero(~np.isnan(closes))
+            if len(closed):
+                self.price_store.append(rows[closed], closes[closed])
+                ready = self.price_store.counts[rows[closed]] >= 20
+                if ready.any():
+                    self._check_watchlist_conditions(
+                        [tickers[i] for i in closed[ready]], rows[closed[ready]], prices[closed[ready]])
+
+            self.latency.record(time.perf_counter() - received)
+
+    def _watchlist_rows(self, tickers: List[str]):
+        """Price store rows for tickers; a new row starts from the closes
+        _load_history restored for its ticker"""
+        store = self.price_store
+        new = [ticker for ticker in tickers if ticker not in store.rows]
+        rows = store.index(tickers)
+        for ticker in new:
+            store.extend(store.rows[ticker], self.price_history[ticker].view())
+        return rows
+
+    def _check_watchlist_exits(self, tickers: List[str], prices, watchlist: Dict[str, Any]):
+        """Stop loss / take profit for all open watchlist positions at once"""
+        positions = [watchlist[t]['position'] for t in tickers]
+        stop_loss = np.array([p['stop_loss'] for p in positions])
+        take_profit = np.array([p['take_profit'] for p in positions])
+        hit_stop = prices <= stop_loss
+        hit_target = prices >= take_profit
+
+        hits = np.flatnonzero(hit_stop | hit_target)
+        self._exit_positions([tickers[i] for i in hits], [float(prices[i]) for i in hits],
+                             ["STOP_LOSS" if hit_stop[i] else "TAKE_PROFIT" for i in hits], watchlist)
+
+    def _check_watchlist_conditions(self, tickers: List[str], rows, prices):
+        """The active strategy's entry and exit conditions for every ticker
+        whose bar just closed, evaluated in one batch over their stored
+        closes; orders go in at prices"""
+        strategy = self._active_strategy()
+        if strategy is None:
+            return
+        # Ticks carry no volume, so neither do the bars
+        market_data = self.strategy_engine.calculate_indicators_batch(
+            self.price_store.window(rows, self.price_store.capacity))
+
+        # Exit conditions may reference the position (entry_price, ...): NaN when flat
+        watchlist = self.state.get_state()['watchlist']
+        positions = [watchlist[t]['position'] for t in tickers]
+        held = np.array([p is not None for p in positions])
+        for field in POSITION_FIELDS:
+            market_data[field] = np.array([p[field] if p else np.nan for p in positions])
+        masks = self.strategy_engine.evaluate_conditions_batch(strategy.name, market_data)
+
+        exits = np.flatnonzero(masks['exit'] & held)
+        self._exit_positions([tickers[i] for i in exits], [float(prices[i]) for i in exits],
+                             ["STRATEGY_EXIT"] * len(exits), watchlist)
+        if strategy.entry:  # A strategy without entry conditions never enters
+            entries = np.flatnonzero(masks['entry'] & ~held)
+            self._enter_positions([tickers[i] for i in entries], [float(prices[i]) for i in entries])
+
+    def _exit_positions(self, tickers: List[str], prices: List[float], reasons: List[str],
+                        watchlist: Dict[str, Any]):
+        """Sell the watchlist positions of tickers at market"""
+        orders = [{"ticker": ticker, "quantity": -watchlist[ticker]['position']['quantity'],
+                   "order_type": "MARKET", "price": price}
+                  for ticker, price in zip(tickers, prices)]
+
+        fills = []
+        for order, reason, order_result in zip(orders, reasons, self._place_orders(orders)):
+            sold = -self._filled_quantity(order_result)
+            if sold > 0:
+                fills.append((order['ticker'], order_result['executed_price'], reason, sold))
+
+        self.state.exit_positions(fills)
+
+    def _enter_positions(self, tickers: List[str], prices: List[float]):
+        """Buy tickers at market, in order, while position slots are free"""
+        slots = len(tickers)
+        if self.max_open_positions is not None:
+            slots = min(slots, self.max_open_positions - self.state.open_position_count())
+        if slots <= 0:
+            return
+
+        current_state = self.state.get_state()
+        profile_config = self.state.profile_manager.get_profile(
+            current_state['profile'])
+
+        orders = []
+        for ticker, price in zip(tickers[:slots], prices[:slots]):
+            quantity = calculate_position_size(
+                current_state['equity'], price, profile_config['capital_allocation_pct'])
+            orders.append({"ticker": ticker, "quantity": quantity,
+                           "order_type": "MARKET", "price": price})
+
+        fills = []
+        for order, order_result in zip(orders, self._place_orders(orders)):
+            filled = self._filled_quantity(order_result)
+            if filled > 0:
+                fills.append((order['ticker'], order_result['executed_price'], filled))
 
-    def _monitor_exit_conditions(self):
+        self.state.enter_positions(fills)
+
+    def _monitor_exit_conditions(self, current_price: float):
         """Check if exit conditions are met for current position"""
         position = self.state.state['position']
         if not position:
             return
 
-        # Get current price (simulated)
-        current_price = self._get_current_price(position['ticker'])
-
         # Check stop loss
         if current_price <= position['stop_loss']:
             self._exit_trade(current_price, "STOP_LOSS")
@@ -62,55 +423,41 @@ class TradingController:
         elif current_price >= position['take_profit']:
             self._exit_trade(current_price, "TAKE_PROFIT")
 
-    def _check_entry_conditions(self):
-        """Realistic entry based on simple technical conditions"""
-        current_state = self.state.get_state()
-        if not current_state['ticker']:
-            return
-
-        ticker = current_state['ticker']
-
-        # Get recent price data
-        if not hasattr(self, 'price_history'):
-            self.price_history = {}
-
-        if ticker not in self.price_history:
-            self.price_history[ticker] = []
-
-        current_price = self._get_current_price(ticker)
-        self.price_history[ticker].append(current_price)
-
-        # Keep only last 50 prices
-        if len(self.price_history[ticker]) > 50:
-            self.price_history[ticker] = self.price_history[ticker][-50:]
+    def _check_entry_conditions(self, ticker: str, close: float, price: Optional[float] = None,
+                                volume: float = 0.0):
+        """Evaluate the active strategy's conditions on a closed bar.
+
+        close and volume are the bar that just closed. While IDLE, an entry
+        order goes in at price, the latest tick (default: the close), when
+        every entry condition holds; while LONG, any exit condition sells
+        the position. Conditions see the indicator values plus, for exits,
+        the position's fields (entry_price, stop_loss, ...).
+        """
+        # Get recent price data (one close per bar)
+        self._load_history(ticker)
+        self.price_history[ticker].append(close)
+        indicators = self.indicators.update(ticker, close, volume)
 
         # Need at least 20 data points for meaningful analysis
-        if len(self.price_history[ticker]) < 20:
+        if not indicators:
             return
 
-        prices = self.price_history[ticker]
-
-        # Simple technical conditions
-        conditions_met = 0
-        total_conditions = 3
-
-        # Condition 1: Price above 20-period average (uptrend)
-        avg_20 = sum(prices[-20:]) / 20
-        if current_price > avg_20:
-            conditions_met += 1
-
-        # Condition 2: Recent momentum (price higher than 5 periods ago)
-        if len(prices) >= 6 and current_price > prices[-6]:
-            conditions_met += 1
-
-        # Condition 3: Not at extreme highs (avoid buying at top)
-        max_20 = max(prices[-20:])
-        if current_price < max_20 * 0.98:  # Not within 2% of recent high
-            conditions_met += 1
+        strategy = self._active_strategy()
+        current_state = self.state.get_state()
+        price = close if price is None else price
+        if current_state['current_state'] == 'LONG':
+            if strategy is not None and strategy.should_exit({**current_state['position'], **indicators}):
+                self._exit_trade(price, "STRATEGY_EXIT")
+        elif current_state['current_state'] == 'IDLE':
+            # A strategy without entry conditions never enters
+            if strategy is not None and strategy.entry and strategy.should_enter(indicators):
+                self._enter_trade(ticker, price)
 
-        # Enter trade if majority of conditions met
-        if conditions_met >= 2:  # At least 2 out of 3 conditions
-            self._enter_trade(ticker, current_price)
+    def _active_strategy(self) -> Optional[CompiledStrategy]:
+        """Compiled conditions of the selected strategy (falls back to default)"""
+        compiled = self.strategy_engine.compiled
+        name = self.state.get_state().get('strategy', 'default')
+        return compiled.get(name) or compiled.get('default')
 
     def get_last_trade_time(self):
         """Get timestamp of last trade from logs"""
@@ -124,6 +471,10 @@ class TradingController:
 
     def _enter_trade(self, ticker: str, price: float):
         """Enter a new trade"""
+        if self.max_open_positions is not None and \
+                self.state.open_position_count() >= self.max_open_positions:
+            return
+
         current_state = self.state.get_state()
         profile_config = self.state.profile_manager.get_profile(
             current_state['profile'])
@@ -137,204 +488,183 @@ class TradingController:
         order_result = self.execution.place_order(
             ticker, quantity, "MARKET", price)
 
-        if order_result['status'] == 'FILLED':
+        filled = self._filled_quantity(order_result)
+        if filled > 0:
             self.state.enter_trade(
-                ticker, order_result['executed_price'], quantity)
+                ticker, order_result['executed_price'], filled)
 
     def _exit_trade(self, price: float, reason: str):
         """Exit current trade"""
-        position = self.state.state['position']
-        if not position:
-            return
-
-        # Place exit order
-        order_result = self.execution.place_order(
-            position['ticker'],
-            -position['quantity'],
-            "MARKET",
-            price
-        )
-
-        if order_result['status'] == 'FILLED':
-            self.state.exit_trade(order_result['executed_price'], reason)
+        # Check, order and record under one lock so a racing exit sees the
+        # position already closed instead of selling it a second time
+        with self.state.transaction():
+            position = self.state.state['position']
+            if not position:
+                return
+
+            # Place exit order
+            order_result = self.execution.place_order(
+                position['ticker'],
+                -position['quantity'],
+                "MARKET",
+                price
+            )
+
+            sold = -self._filled_quantity(order_result)
+            if sold > 0:
+                self.state.exit_trade(order_result['executed_price'], reason, sold)
 
     def _get_current_price(self, ticker: str) -> float:
-        """More realistic price simulation with trends"""
-        base_prices = {
-            'SPY': 450.0, 'AAPL': 175.0, 'TSLA': 240.0,
-            'NVDA': 900.0, 'AMD': 180.0, 'MSTR': 1500.0, 'COIN': 250.0
-        }
-
-        if not hasattr(self, 'price_trends'):
-            self.price_trends = {}
-
-        if ticker not in self.price_trends:
-            self.price_trends[ticker] = {
-                'base_price': base_prices.get(ticker, 100.0),
-                'trend': random.uniform(-0.02, 0.02),  # -2% to +2% daily trend
-                # 1-5% daily volatility
-                'volatility': random.uniform(0.01, 0.05)
-            }
-
-        trend_data = self.price_trends[ticker]
-
-        # Realistic price movement with trend + random walk
-        import math
-        daily_move = trend_data['trend'] + random.gauss(
-            0, trend_data['volatility'] / math.sqrt(78))  # 6.5 trading hours
-        new_price = trend_data['base_price'] * (1 + daily_move)
-
-        # Update base price for next call
-        trend_data['base_price'] = new_price
-
-        return round(new_price, 2)
+        """Latest price from the market data feed"""
+        return self.market_data.latest(ticker)
 
     def start_strategy(self, ticker: str) -> Tuple[bool, str]:
         """Start trading strategy for a ticker"""
-        current_state = self.state.get_state()
+        with self.state.transaction():
+            current_state = self.state.get_state()
 
-        if current_state['strategy_active']:
-            return False, "Strategy already active"
+            if self.exiting:
+                return False, "Emergency exit in progress"
 
-        self.state.update_state({
-            "strategy_active": True,
-            "ticker": ticker,
-            "current_state": "IDLE"
-        })
+            if current_state['strategy_active']:
+                return False, "Strategy already active"
 
-        return True, f"Strategy started for {ticker}"
+            # Restarting after a pause keeps a position that is still open
+            position = current_state['position']
+            if position and position['ticker'] != ticker:
+                return False, f"Position in {position['ticker']} still open"
+
+            self.state.update_state({
+                "strategy_active": True,
+                "ticker": ticker,
+                "current_state": "LONG" if position else "IDLE"
+            })
+
+            return True, f"Strategy started for {ticker}"
+
+    def start_watchlist(self, tickers: List[str]) -> Tuple[bool, str]:
+        """Start multi-ticker trading for a list of tickers"""
+        with self.state.transaction():
+            current_state = self.state.get_state()
+
+            if self.exiting:
+                return False, "Emergency exit in progress"
+
+            if current_state['strategy_active']:
+                return False, "Strategy already active"
+            if not tickers:
+                return False, "No tickers given"
+
+            # Tickers dropped from the list keep any open position until it exits
+            old = current_state['watchlist']
+            watchlist = {t: old[t] for t in old if old[t]['position']}
+            for ticker in tickers:
+                watchlist.setdefault(ticker, {"current_state": "IDLE", "position": None})
+            for ticker in old:
+                if ticker not in watchlist:
+                    self.price_store.remove(ticker)
+
+            self.state.update_state({
+                "strategy_active": True,
+                "watchlist": watchlist
+            })
+
+            return True, f"Strategy started for {len(tickers)} tickers"
 
     def pause_strategy(self) -> Tuple[bool, str]:
         """Pause the trading strategy"""
-        current_state = self.state.get_state()
+        with self.state.transaction():
+            current_state = self.state.get_state()
 
-        if not current_state['strategy_active']:
-            return False, "Strategy not active"
+            if not current_state['strategy_active']:
+                return False, "Strategy not active"
 
-        self.state.update_state({"strategy_active": False})
+            self.state.update_state({"strategy_active": False})
 
-        if current_state['current_state'] == 'LONG':
-            return True, "Strategy paused (holding position)"
-        else:
-            return True, "Strategy paused"
+            if current_state['current_state'] == 'LONG':
+                return True, "Strategy paused (holding position)"
+            else:
+                return True, "Strategy paused"
 
     def resume_strategy(self) -> Tuple[bool, str]:
         """Resume the trading strategy"""
-        current_state = self.state.get_state()
+        with self.state.transaction():
+            current_state = self.state.get_state()
+
+            if self.exiting:
+                return False, "Emergency exit in progress"
 
-        if current_state['strategy_active']:
-            return False, "Strategy already active"
+            if current_state['strategy_active']:
+                return False, "Strategy already active"
 
-        self.state.update_state({"strategy_active": True})
-        return True, "Strategy resumed"
+            self.state.update_state({"strategy_active": True})
+            return True, "Strategy resumed"
 
     def emergency_exit(self) -> Tuple[bool, str]:
         """Emergency exit - close all positions"""
-        current_state = self.state.get_state()
-
-        if current_state['current_state'] == 'LONG':
-            position = current_state['position']
-            current_price = self._get_current_price(position['ticker'])
-            self._exit_trade(current_price, "EMERGENCY_EXIT")
-
-        self.state.update_state({
-            "strategy_active": False,
-            "current_state": "IDLE"
-        })
-
-        return True, "Emergency exit completed"
+        with self.state.transaction():
+            current_state = self.state.get_state()
+
+            if current_state['current_state'] == 'LONG':
+                position = current_state['position']
+                current_price = self._get_current_price(position['ticker'])
+                self._exit_trade(current_price, "EMERGENCY_EXIT")
+
+            held = [(ticker, entry['position']['quantity'])
+                    for ticker, entry in current_state['watchlist'].items() if entry['position']]
+            results = self._place_orders([
+                {"ticker": ticker, "quantity": -quantity, "order_type": "MARKET",
+                 "price": self._get_current_price(ticker)}
+                for ticker, quantity in held])
+            fills = []
+            for (ticker, _), order_result in zip(held, results):
+                sold = -self._filled_quantity(order_result)
+                if sold > 0:
+                    fills.append((ticker, order_result['executed_price'], "EMERGENCY_EXIT", sold))
+            self.state.exit_positions(fills)
+
+            # A position whose exit order did not fill stays LONG
+            updates = {"strategy_active": False}
+            if not self.state.get_state()['position']:
+                updates["current_state"] = "IDLE"
+            self.state.update_state(updates)
+
+            return True, "Emergency exit completed"
 
     def set_profile(self, profile: str) -> Tuple[bool, str]:
         """Set trading profile"""
-        try:
-            self.state.profile_manager.get_profile(profile)
-            self.state.update_state({"profile": profile})
-            return True, f"Profile set to {profile}"
-        except ValueError as e:
-            return False, str(e)
+        with self.state.transaction():
+            try:
+                self.state.profile_manager.get_profile(profile)
+                self.state.update_state({"profile": profile})
+                return True, f"Profile set to {profile}"
+            except ValueError as e:
+                return False, str(e)
 
     # Strategy management methods (for custom strategies)
     def set_strategy(self, strategy: str) -> Tuple[bool, str]:
         """Set trading strategy"""
-        try:
-            self.state.update_state({"strategy": strategy})
-            return True, f"Strategy set to {strategy}"
-        except Exception as e:
-            return False, str(e)
+        if self.strategy_engine.get_strategy(strategy) is None:
+            return False, f"Unknown strategy '{strategy}'"
+        with self.state.transaction():
+            try:
+                self.state.update_state({"strategy": strategy})
+                return True, f"Strategy set to {strategy}"
+            except Exception as e:
+                return False, str(e)
 
     def create_strategy(self, name: str, config: Dict[str, Any]) -> Tuple[bool, str]:
-        """Create a new trading strategy"""
+        """Create a new trading strategy (saved to the strategies file)"""
         try:
-            # This would save to strategies.yaml in a real implementation
+            self.strategy_engine.create_strategy(name, config)
             return True, f"Strategy '{name}' created successfully"
         except Exception as e:
             return False, str(e)
 
     def get_strategies(self) -> List[str]:
         """Get all available strategies"""
-        return ["default", "mean_reversion", "momentum", "scalping"]
-
-    def start_strategy(self, ticker: str) -> Tuple[bool, str]:
-        """Start trading strategy for a ticker"""
-        current_state = self.state.get_state()
-
-        if current_state['strategy_active']:
-            return False, "Strategy already active"
+        return self.strategy_engine.get_all_strategies()
 
-        self.state.update_state({
-            "strategy_active": True,
-            "ticker": ticker,
-            "current_state": "IDLE"
-        })
-
-        return True, f"Strategy started for {ticker}"
-
-    def pause_strategy(self) -> Tuple[bool, str]:
-        """Pause the trading strategy"""
-        current_state = self.state.get_state()
-
-        if not current_state['strategy_active']:
-            return False, "Strategy not active"
-
-        self.state.update_state({"strategy_active": False})
-
-        if current_state['current_state'] == 'LONG':
-            return True, "Strategy paused (holding position)"
-        else:
-            return True, "Strategy paused"
-
-    def resume_strategy(self) -> Tuple[bool, str]:
-        """Resume the trading strategy"""
-        current_state = self.state.get_state()
-
-        if current_state['strategy_active']:
-            return False, "Strategy already active"
-
-        self.state.update_state({"strategy_active": True})
-        return True, "Strategy resumed"
-
-    def emergency_exit(self) -> Tuple[bool, str]:
-        """Emergency exit - close all positions"""
-        current_state = self.state.get_state()
-
-        if current_state['current_state'] == 'LONG':
-            position = current_state['position']
-            current_price = self._get_current_price(position['ticker'])
-            self._exit_trade(current_price, "EMERGENCY_EXIT")
-
-        self.state.update_state({
-            "strategy_active": False,
-            "current_state": "IDLE"
-        })
-
-        return True, "Emergency exit completed"
-
-    def set_profile(self, profile: str) -> Tuple[bool, str]:
-        """Set trading profile"""
-        try:
-            # Validate profile exists
-            self.state.profile_manager.get_profile(profile)
-            self.state.update_state({"profile": profile})
-            return True, f"Profile set to {profile}"
-        except ValueError as e:
-            return False, str(e)
+    def get_strategy(self, name: str) -> Optional[Dict[str, Any]]:
+        """Configuration of one strategy, None if unknown"""
+        return self.strategy_engine.get_strategy(name)
@@ -0,0 +1,348 @@
+"""Client for the DAS Trader Pro CMD API, a line-based text protocol over TCP.
+
+One DASConnection is a long-lived, logged-in session. Orders are pipelined:
+each NEWORDER carries a client token, and the %ORDER / %OrderAct lines the
+server sends back are matched to the waiting OrderTicket by token and order
+id, so any number of orders can be in flight on one socket. A supervisor
+thread reconnects (with backoff) whenever the session drops, and an ECHO
+heartbeat detects sessions that died without closing.
+
+Lines exchanged (client -> server, then server -> client):
+
+    LOGIN user password account       #LOGIN SUCCESSED | #LOGIN FAILED reason
+    NEWORDER token B|S symbol route qty MKT|price
+                                      %ORDER id token symbol B|S MKT|LMT qty
+                                             lvqty cxlqty price route status time
+                                      %OrderAct id Execute B|S symbol qty price route time
+    CANCEL id                         %ORDER ... Canceled ...
+    ECHO n                            #ECHO n
+    GET POSITIONS                     %POS symbol type qty avgcost ... then #POS END
+    GET BP                            BP buying_power overnight_bp
+"""
+import itertools
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional
+
+# DAS order statuses after which no more updates arrive for an order
+TERMINAL_STATUSES = {'Executed', 'Canceled', 'Rejected', 'Closed'}
+
+
+class OrderTicket:
+    """Tracks one submitted order as status and execution lines arrive"""
+
+    def __init__(self, token: int, symbol: str, side: str, quantity: int):
+        self.token = token
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.order_id: Optional[str] = None
+        self.status = 'Sending'
+        self.filled = 0
+        self.fill_value = 0.0
+        self.error: Optional[str] = None
+        self._changed = threading.Condition()
+
+    @property
+    def average_price(self) -> Optional[float]:
+        return self.fill_value / self.filled if self.filled else None
+
+    @property
+    def done(self) -> bool:
+        if self.error is not None:
+            return True
+        # Execution lines may arrive after the Executed status; wait for them
+        if self.status == 'Executed':
+            return self.filled >= self.quantity
+        return self.status in TERMINAL_STATUSES
+
+    def _update(self, status: Optional[str] = None, fill: Optional[tuple] = None, error: Optional[str] = None):
+        with self._changed:
+            if status:
+                self.status = status
+            if fill:
+                qty, price = fill
+                self.filled += qty
+                self.fill_value += qty * price
+            if error:
+                self.error = error
+            self._changed.notify_all()
+
+    def wait(self, timeout: Optional[float] = None, terminal: bool = True) -> bool:
+        """Wait until the order is done (or just acknowledged, terminal=False)"""
+        def ready():
+            return self.done or (not terminal and self.status != 'Sending')
+        with self._changed:
+            return self._changed.wait_for(ready, timeout)
+
+
+class DASConnection:
+    """One authenticated, self-reconnecting DAS session"""
+
+    def __init__(self, host: str, port: int, username: str, password: str, account: str = '',
+                 timeout: float = 5.0, heartbeat_interval: float = 15.0,
+                 reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0, name: str = "das"):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.account = account
+        self.timeout = timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.name = name
+        self.connects = 0
+
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._connected = threading.Event()
+        self._attempted = threading.Event()
+        self._closed = threading.Event()
+        self.last_error: Optional[str] = None
+        self._tokens = itertools.count(1)
+        self._tickets: Dict[int, OrderTicket] = {}       # token -> ticket
+        self._by_order_id: Dict[str, OrderTicket] = {}   # DAS order id -> ticket
+        self._queries: Dict[str, deque] = {'#ECHO': deque(), '#POS': deque(), 'BP': deque()}
+        self._positions: List[Dict[str, Any]] = []
+        self._supervisor = None
+        self._heartbeat = None
+
+    # Lifecycle
+
+    def start(self, wait: bool = True):
+        """Connect in the background; with wait, block until logged in"""
+        self._closed.clear()
+        self._supervisor = threading.Thread(target=self._supervise, name=f"{self.name}-reader", daemon=True)
+        self._supervisor.start()
+        self._heartbeat = threading.Thread(target=self._beat, name=f"{self.name}-heartbeat", daemon=True)
+        self._heartbeat.start()
+        if wait:
+            self._attempted.wait(self.timeout)
+            if not self._connected.is_set():
+                raise ConnectionError(f"Could not log in to DAS at {self.host}:{self.port}: {self.last_error}")
+
+    def close(self):
+        self._closed.set()
+        self._drop()
+        for thread in (self._supervisor, self._heartbeat):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tickets)
+
+    def _login(self) -> tuple:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Orders are small; send at once
+        reader = sock.makefile('rb')
+        sock.sendall(f"LOGIN {self.username} {self.password} {self.account}\r\n".encode())
+        reply = reader.readline().decode().strip()
+        if not reply.startswith('#LOGIN SUCCESSED'):
+            sock.close()
+            raise ConnectionError(f"DAS login failed: {reply or 'connection closed'}")
+        sock.settimeout(None)  # The heartbeat detects dead sessions from here on
+        return sock, reader
+
+    def _supervise(self):
+        delay = self.reconnect_delay
+        while not self._closed.is_set():
+            try:
+                sock, reader = self._login()
+            except OSError as e:
+                self.last_error = str(e)
+                self._attempted.set()
+                if self._closed.wait(delay):
+                    return
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            with self._state_lock:
+                self._sock = sock
+            if self._closed.is_set():  # close() ran while we were logging in
+                self._drop()
+                return
+            self.connects += 1
+            delay = self.reconnect_delay
+            self._connected.set()
+            self._attempted.set()
+            try:
+                for raw in reader:
+                    self._dispatch(raw.decode().strip())
+            except OSError:
+                pass
+            self._drop()
+
+    def _drop(self):
+        """Close the socket and fail everything waiting on it"""
+        self._connected.clear()
+        with self._state_lock:
+            sock, self._sock = self._sock, None
+            tickets = list(self._tickets.values())
+            self._tickets.clear()
+            self._by_order_id.clear()
+            queries = [f for pending in self._queries.values() for f in pending]
+            for pending in self._queries.values():
+                pending.clear()
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        for ticket in tickets:
+            if not ticket.done:
+                ticket._update(error="Connection lost before the order completed")
+        for future in queries:
+            if not future.done():
+                future.set_exception(ConnectionError("Connection lost"))
+
+    def _beat(self):
+        n = 0
+        while not self._closed.wait(self.heartbeat_interval):
+            if not self._connected.is_set():
+                continue
+            n += 1
+            try:
+                self._query('#ECHO', f"ECHO {n}").result(self.timeout)
+            except Exception:
+                self._drop()  # Unresponsive: the supervisor reconnects
+
+    # Sending
+
+    def _send(self, line: str):
+        with self._send_lock:
+            sock = self._sock
+            if sock is None:
+                raise ConnectionError("Not connected to DAS")
+            sock.sendall((line + "\r\n").encode())
+
+    def _query(self, key: str, line: str) -> Future:
+        future = Future()
+        with self._send_lock:
+            with self._state_lock:
+                sock = self._sock
+                if sock is None:
+                    raise ConnectionError("Not connected to DAS")
+                self._queries[key].append(future)
+            sock.sendall((line + "\r\n").encode())
+        return future
+
+    def place_order(self, side: str, symbol: str, quantity: int, price: str, route: str) -> OrderTicket:
+        """Send NEWORDER without waiting for a reply; price is 'MKT' or a limit"""
+        if not self._connected.wait(self.timeout):
+            raise ConnectionError("Not connected to DAS")
+        token = next(self._tokens)
+        ticket = OrderTicket(token, symbol, side, quantity)
+        with self._state_lock:
+            self._tickets[token] = ticket
+        try:
+            self._send(f"NEWORDER {token} {side} {symbol} {route} {quantity} {price}")
+        except OSError:
+            with self._state_lock:
+                self._tickets.pop(token, None)
+            raise
+        return ticket
+
+    def cancel_order(self, order_id: str):
+        self._send(f"CANCEL {order_id}")
+
+    def positions(self) -> List[Dict[str, Any]]:
+        return self._query('#POS', "GET POSITIONS").result(self.timeout)
+
+    def buying_power(self) -> Dict[str, float]:
+        return self._query('BP', "GET BP").result(self.timeout)
+
+    # Receiving
+
+    def _dispatch(self, line: str):
+        if not line:
+            return
+        fields = line.split()
+        kind = fields[0]
+        if kind == '%ORDER' and len(fields) >= 12:
+            self._on_order(fields)
+        elif kind == '%OrderAct' and len(fields) >= 7:
+            self._on_order_action(fields)
+        elif kind == '%POS' and len(fields) >= 5:
+            self._positions.append({"symbol": fields[1], "quantity": int(fields[3]),
+                                    "average_price": float(fields[4])})
+        elif kind == '#POS':
+            positions, self._positions = self._positions, []
+            self._resolve('#POS', positions)
+        elif kind == '#ECHO':
+            self._resolve('#ECHO', line)
+        elif kind == 'BP' and len(fields) >= 3:
+            self._resolve('BP', {"buying_power": float(fields[1]), "overnight_bp": float(fields[2])})
+
+    def _resolve(self, key: str, value: Any):
+        with self._state_lock:
+            future = self._queries[key].popleft() if self._queries[key] else None
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def _on_order(self, fields: List[str]):
+        order_id, token, status = fields[1], int(fields[2]), fields[11]
+        with self._state_lock:
+            ticket = self._tickets.get(token) or self._by_order_id.get(order_id)
+            if ticket is None:
+                return  # Not ours (placed from another session)
+            ticket.order_id = order_id
+            self._by_order_id[order_id] = ticket
+        ticket._update(status=status)
+        self._settle(ticket)
+
+    def _on_order_action(self, fields: List[str]):
+        order_id, action = fields[1], fields[2]
+        if action != 'Execute':
+            return
+        with self._state_lock:
+            ticket = self._by_order_id.get(order_id)
+        if ticket is not None:
+            ticket._update(fill=(int(fields[5]), float(fields[6])))
+            self._settle(ticket)
+
+    def _settle(self, ticket: OrderTicket):
+        """Stop tracking an order once nothing more can arrive for it"""
+        if ticket.done:
+            with self._state_lock:
+                self._tickets.pop(ticket.token, None)
+                self._by_order_id.pop(ticket.order_id, None)
+
+
+class DASConnectionPool:
+    """A few DAS sessions; each order goes to the least busy live one"""
+
+    def __init__(self, size: int = 1, **connection_args):
+        self.connections = [DASConnection(name=f"das-{i}", **connection_args) for i in range(size)]
+
+    def start(self, wait: bool = True):
+        for connection in self.connections:
+            connection.start(wait=False)
+        if wait:
+            for connection in self.connections:
+                connection._attempted.wait(connection.timeout)
+            if not any(c.connected for c in self.connections):
+                raise ConnectionError(f"No DAS session could log in: {self.connections[0].last_error}")
+
+    def connection(self) -> DASConnection:
+        live = [c for c in self.connections if c.connected]
+        if not live:
+            # Give the reconnecting sessions a chance before failing
+            self.connections[0]._connected.wait(self.connections[0].timeout)
+            live = [c for c in self.connections if c.connected]
+            if not live:
+                raise ConnectionError("No DAS session connected")
+        return min(live, key=lambda c: c.in_flight)
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import threading
+from typing import Any, Optional, Set
+
+
+class EventBroadcaster:
+    """Fans events out to asyncio subscribers (one queue per connected client).
+
+    publish() may be called from any thread. Each event is serialized once and
+    the same string is handed to every subscriber; with no subscribers,
+    publishing costs nothing beyond a set lookup.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new subscriber; must be called on the event loop"""
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, event_type: str, data: Any):
+        """Serialize an event and queue it for every subscriber"""
+        if not self._subscribers:
+            return
+        self.publish_raw(event_type, json.dumps(data, default=str))
+
+    def publish_raw(self, event_type: str, data_json: str):
+        """Like publish(), for a payload that is already JSON"""
+        if not self._subscribers or self._loop is None:
+            return
+        message = f'{{"type": "{event_type}", "data": {data_json}}}'
+        try:
+            self._loop.call_soon_threadsafe(self._fan_out, message)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    def _fan_out(self, message: str):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow to keep up: discard its backlog and tell it to
+                # disconnect; the client resyncs from a snapshot on reconnect
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
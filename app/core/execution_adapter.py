@@ -1,5 +1,9 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from core.market_data import MarketDataSource, BASE_PRICES, DEFAULT_PRICE
+from core.matching import MatchingEngine, SlippageModel, LatencyModel
 
 class ExecutionAdapter(ABC):
     @abstractmethod
@@ -17,56 +21,103 @@ class ExecutionAdapter(ABC):
     @abstractmethod
     def get_account_info(self) -> Dict[str, Any]:
         pass
+    
+    def close(self):
+        """Release connections held by the adapter"""
+        pass
 
 class PaperTradingAdapter(ExecutionAdapter):
-    def __init__(self, initial_equity: float = 100000.0):
+    """Simulated broker backed by a MatchingEngine.
+
+    A MARKET order's price is taken as the latest market price the caller
+    saw and quoted to the engine before the order goes in. Prices fed with
+    on_price move the market in between, filling working limit and stop
+    orders.
+    """
+
+    def __init__(self, initial_equity: float = 100000.0, engine: Optional[MatchingEngine] = None,
+                 market_data: Optional[MarketDataSource] = None):
         self.equity = initial_equity
+        self.realized_pnl = 0.0
         self.positions = {}
-        self.orders = {}
-        self.order_id_counter = 1
-    
+        self.engine = engine or MatchingEngine()
+        self.engine.add_fill_listener(self._on_fill)
+        # Orders can arrive from the monitor thread and the API concurrently
+        self._lock = threading.Lock()
+        # Quote every price the feed hands out, so fills see the strategy's data
+        self.market_data = market_data
+        if market_data is not None:
+            market_data.add_listener(self.on_price)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    market_data: Optional[MarketDataSource] = None) -> "PaperTradingAdapter":
+        """Build from the paper_trading section of config.yaml"""
+        engine = MatchingEngine(
+            slippage=SlippageModel(config.get('slippage_bps', 0.0), config.get('impact_bps', 0.0),
+                                   config.get('impact_depth', 10000)),
+            latency=LatencyModel(config.get('latency_ms', 0.0), config.get('latency_jitter_ms', 0.0)),
+            spread_bps=config.get('spread_bps', 0.0),
+            liquidity=config.get('liquidity')
+        )
+        return cls(config.get('initial_equity', 100000.0), engine, market_data)
+
+    @property
+    def orders(self) -> Dict[str, Any]:
+        return self.engine.orders
+
     def place_order(self, ticker: str, quantity: int, order_type: str, price: float = None) -> Dict[str, Any]:
-        order_id = f"PAPER_{self.order_id_counter}"
-        self.order_id_counter += 1
-        
-        # Simulate order execution
-        if order_type == "MARKET":
-            # Use current market price (simulated)
-            executed_price = price if price else self._get_simulated_price(ticker)
-        else:
-            executed_price = price
-        
-        order_result = {
-            "order_id": order_id,
-            "ticker": ticker,
-            "quantity": quantity,
-            "executed_price": executed_price,
-            "status": "FILLED",
-            "order_type": order_type
-        }
-        
-        # Update position
-        if ticker in self.positions:
-            self.positions[ticker]['quantity'] += quantity
-            self.positions[ticker]['average_price'] = (
-                (self.positions[ticker]['average_price'] * self.positions[ticker]['quantity'] + 
-                 executed_price * quantity) / (self.positions[ticker]['quantity'] + quantity)
-            )
+        with self._lock:
+            return self._place_order(ticker, quantity, order_type, price)
+    
+    def _place_order(self, ticker: str, quantity: int, order_type: str, price: float = None) -> Dict[str, Any]:
+        engine = self.engine
+        if order_type == "MARKET" and price:
+            engine.on_quote(ticker, price)
+        elif engine.book(ticker).last is None:
+            engine.on_quote(ticker, self._reference_price(ticker))
+
+        order = engine.submit(ticker, quantity, order_type, price)
+        # Synchronous callers get the order as it stands once it has reached
+        # the exchange; without newer quotes it trades on the latest one
+        engine.advance(order.arrival)
+        return order.to_result()
+    
+    def on_price(self, ticker: str, price: float, timestamp: float = None, size: int = None):
+        """Feed a market price; working orders for ticker may fill"""
+        with self._lock:
+            self.engine.on_quote(ticker, price, timestamp, size)
+
+    def _on_fill(self, order, quantity: int, price: float):
+        position = self.positions.get(order.ticker)
+        if position is None:
+            position = self.positions[order.ticker] = {'quantity': 0, 'average_price': 0.0}
+        held = position['quantity']
+        new_quantity = held + quantity
+
+        if held == 0 or (held > 0) == (quantity > 0):
+            # Adding to the position: average in the fill
+            position['average_price'] = (position['average_price'] * held + price * quantity) / new_quantity
         else:
-            self.positions[ticker] = {
-                'quantity': quantity,
-                'average_price': executed_price
-            }
-        
-        self.orders[order_id] = order_result
-        return order_result
+            # Reducing: realize P&L on the part closed; a flip opens at the fill price
+            closed = min(abs(quantity), abs(held))
+            pnl = closed * (price - position['average_price']) * (1 if held > 0 else -1)
+            self.realized_pnl += pnl
+            self.equity += pnl
+            if new_quantity == 0:
+                position['average_price'] = 0.0
+            elif (new_quantity > 0) != (held > 0):
+                position['average_price'] = price
+        position['quantity'] = new_quantity
     
     def cancel_order(self, order_id: str) -> bool:
-        if order_id in self.orders:
-            self.orders[order_id]['status'] = 'CANCELLED'
-            return True
-        return False
+        with self._lock:
+            return self.engine.cancel(order_id)
     
+    def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        order = self.engine.orders.get(order_id)
+        return order.to_result() if order else None
+
     def get_position(self, ticker: str) -> Dict[str, Any]:
         return self.positions.get(ticker, {'quantity': 0, 'average_price': 0})
     
@@ -74,48 +125,219 @@ class PaperTradingAdapter(ExecutionAdapter):
         return {
             "equity": self.equity,
             "buying_power": self.equity,
+            "realized_pnl": self.realized_pnl,
             "positions": self.positions
         }
     
-    def _get_simulated_price(self, ticker: str) -> float:
-        # Simple price simulation - in real implementation, this would connect to market data
-        base_prices = {
-            'SPY': 450.0,
-            'AAPL': 175.0,
-            'QQQ': 380.0,
-            'TSLA': 240.0,
-            'MSFT': 370.0
-        }
-        return base_prices.get(ticker, 100.0)
+    def _reference_price(self, ticker: str) -> float:
+        """Starting quote for a ticker no price has been seen for yet"""
+        if self.market_data is not None:
+            return self.market_data.latest(ticker)
+        return BASE_PRICES.get(ticker, DEFAULT_PRICE)
 
 class LiveTradingAdapter(ExecutionAdapter):
+    # DAS order statuses as reported to the controller
+    STATUS_MAP = {'Executed': 'FILLED', 'Canceled': 'CANCELLED', 'Rejected': 'REJECTED', 'Closed': 'CANCELLED'}
+
     def __init__(self, das_api_config: Dict[str, Any]):
         self.api_config = das_api_config
-        # In a real implementation, this would initialize connection to DAS API
+        self.route = das_api_config.get('route', 'SMART')
+        self.order_timeout = das_api_config.get('order_timeout', 10)
+        # Sessions are opened on first use so the app starts while DAS is down
+        self._pool = None
+        self._pool_lock = threading.Lock()
+    
+    @property
+    def pool(self):
+        """Persistent DAS sessions shared by every call.
+
+        The pool is built once. Its sessions log in, and keep reconnecting
+        with backoff while DAS is down, on their own threads; calls made
+        while no session is logged in fail with ConnectionError from
+        pool.connection() rather than building another pool.
+        """
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from core.das_client import DASConnectionPool
+                    config = self.api_config
+                    pool = DASConnectionPool(
+                        size=config.get('pool_size', 1),
+                        host=config['host'],
+                        port=config['port'],
+                        username=config['username'],
+                        password=config['password'],
+                        account=config.get('account', ''),
+                        timeout=config.get('connect_timeout', 5),
+                        heartbeat_interval=config.get('heartbeat_interval', 15)
+                    )
+                    try:
+                        pool.start(wait=False)
+                    except BaseException:
+                        pool.close()  # Stop any session threads already running
+                        raise
+                    self._pool = pool
+        return self._pool
     
     def place_order(self, ticker: str, quantity: int, order_type: str, price: float = None) -> Dict[str, Any]:
-        # This would make actual API calls to DAS Trader
-        # For now, return simulated response
+        side = 'B' if quantity > 0 else 'S'
+        limit = 'MKT' if order_type == "MARKET" else f"{price:.2f}"
+        ticket = self.pool.connection().place_order(side, ticker, abs(quantity), limit, self.route)
+        
+        # Market orders are waited on until filled; others until acknowledged
+        ticket.wait(self.order_timeout, terminal=order_type == "MARKET")
+        filled = ticket.filled
+        if ticket.error:
+            status = "UNKNOWN"  # Connection lost: the order may or may not have executed
+        else:
+            status = self.STATUS_MAP.get(ticket.status, "SUBMITTED")
+            if status == "SUBMITTED" and filled:
+                status = "PARTIALLY_FILLED"  # Still working when the wait ran out
+            elif status == "FILLED":
+                filled = ticket.quantity  # Executed in full; some execution lines may still be in flight
         return {
-            "order_id": f"LIVE_{ticker}_{quantity}",
+            "order_id": ticket.order_id or f"LIVE_{ticket.token}",
             "ticker": ticker,
             "quantity": quantity,
-            "status": "SUBMITTED",
+            "executed_price": ticket.average_price,
+            "filled_quantity": filled if quantity > 0 else -filled,
+            "status": status,
             "order_type": order_type
         }
     
     def cancel_order(self, order_id: str) -> bool:
-        # Actual DAS API call to cancel order
-        return True
+        try:
+            self.pool.connection().cancel_order(order_id)
+            return True
+        except ConnectionError:
+            return False
     
     def get_position(self, ticker: str) -> Dict[str, Any]:
-        # Actual DAS API call to get position
+        for position in self.pool.connection().positions():
+            if position['symbol'] == ticker:
+                return {"quantity": position['quantity'], "average_price": position['average_price']}
         return {"quantity": 0, "average_price": 0}
     
     def get_account_info(self) -> Dict[str, Any]:
-        # Actual DAS API call to get account info
+        connection = self.pool.connection()
+        buying_power = connection.buying_power()['buying_power']
         return {
-            "equity": 100000.0,
-            "buying_power": 100000.0,
-            "positions": {}
-        }
\ No newline at end of file
+            "equity": buying_power,
+            "buying_power": buying_power,
+            "positions": {p['symbol']: {"quantity": p['quantity'], "average_price": p['average_price']}
+                          for p in connection.positions()}
+        }
+    
+    def close(self):
+        """Log out of every DAS session"""
+        if self._pool is not None:
+            self._pool.close()
+
+
+class AsyncExecutionAdapter(ABC):
+    """Execution adapter whose calls are awaited on the event loop"""
+
+    @abstractmethod
+    async def place_order(self, ticker: str, quantity: int, order_type: str, price: float = None) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def cancel_order(self, order_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_position(self, ticker: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_account_info(self) -> Dict[str, Any]:
+        pass
+
+    async def place_orders(self, orders: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Submit orders concurrently; results come back in the same order.
+
+        Each order is a dict of place_order arguments. An order that takes
+        longer than timeout seconds gets status TIMEOUT and one that raises
+        gets status ERROR; neither affects the others. Cancelling the caller
+        cancels every order still pending.
+        """
+        async def submit(order: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return await asyncio.wait_for(self.place_order(**order), timeout)
+            except asyncio.TimeoutError:
+                return {**order, "status": "TIMEOUT", "error": f"No response within {timeout}s"}
+            except Exception as e:
+                return {**order, "status": "ERROR", "error": str(e)}
+
+        return list(await asyncio.gather(*(submit(order) for order in orders)))
+
+
+class ThreadedAsyncAdapter(AsyncExecutionAdapter):
+    """Async front for a synchronous ExecutionAdapter.
+
+    Blocking adapters (offload=True) run each call on a worker thread so a
+    slow broker round trip does not stall the event loop. A timed-out call
+    cannot be interrupted there: the order may still reach the broker.
+    """
+
+    def __init__(self, adapter: ExecutionAdapter, offload: bool = True):
+        self.adapter = adapter
+        self.offload = offload
+
+    async def _call(self, method, *args):
+        if self.offload:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def place_order(self, ticker: str, quantity: int, order_type: str, price: float = None) -> Dict[str, Any]:
+        return await self._call(self.adapter.place_order, ticker, quantity, order_type, price)
+
+    async def cancel_order(self, order_id: str) -> bool:
+        return await self._call(self.adapter.cancel_order, order_id)
+
+    async def get_position(self, ticker: str) -> Dict[str, Any]:
+        return await self._call(self.adapter.get_position, ticker)
+
+    async def get_account_info(self) -> Dict[str, Any]:
+        return await self._call(self.adapter.get_account_info)
+
+
+def run_sync(coro, loop: Optional[asyncio.AbstractEventLoop] = None, timeout: Optional[float] = None):
+    """Run a coroutine to completion from synchronous code.
+
+    With a loop running in another thread (the API server's), the coroutine
+    is scheduled there; otherwise it runs on a fresh loop.
+    """
+    if loop is not None and loop.is_running():
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("run_sync called from the event loop it would wait on")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+    return asyncio.run(coro)
+
+
+class SyncAdapterBridge(ExecutionAdapter):
+    """Synchronous ExecutionAdapter backed by an AsyncExecutionAdapter, for
+    callers running on threads (such as the monitoring scheduler)"""
+
+    def __init__(self, adapter: AsyncExecutionAdapter, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 timeout: Optional[float] = None):
+        self.adapter = adapter
+        self.loop = loop
+        self.timeout = timeout
+
+    def place_order(self, ticker: str, quantity: int, order_type: str, price: float = None) -> Dict[str, Any]:
+        return run_sync(self.adapter.place_order(ticker, quantity, order_type, price), self.loop, self.timeout)
+
+    def cancel_order(self, order_id: str) -> bool:
+        return run_sync(self.adapter.cancel_order(order_id), self.loop, self.timeout)
+
+    def get_position(self, ticker: str) -> Dict[str, Any]:
+        return run_sync(self.adapter.get_position(ticker), self.loop, self.timeout)
+
+    def get_account_info(self) -> Dict[str, Any]:
+        return run_sync(self.adapter.get_account_info(), self.loop, self.timeout)
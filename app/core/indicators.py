@@ -0,0 +1,387 @@
+import math
+from collections import deque
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from core.backtest import ema
+from core.ring_buffer import RingBuffer
+
+NAN = float('nan')
+
+
+class RollingWindow:
+    """Fixed-size window with running sum and Welford-style variance"""
+
+    # Re-sum the window periodically so floating point drift stays bounded
+    RESYNC_EVERY = 10000
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = RingBuffer(window)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._updates = 0
+
+    def update(self, x: float):
+        """Push a new value, evicting the oldest once the window is full"""
+        values = self.values
+        if len(values) < self.window:
+            values.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(values)
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = values[0]  # About to be overwritten
+            values.append(x)
+            old_mean = self.mean
+            self.mean = old_mean + (x - old) / self.window
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+
+        self._updates += 1
+        if self._updates >= self.RESYNC_EVERY:
+            self._resync()
+
+    def _resync(self):
+        values = self.values.view()
+        self.mean = float(values.mean()) if len(values) else 0.0
+        self.m2 = float(((values - self.mean) ** 2).sum())
+        self._updates = 0
+
+    def seed(self, values: np.ndarray):
+        """Set the state to what updating with every value would leave"""
+        self.values.clear()
+        self.values.extend(values[-self.window:])
+        self._resync()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'values': self.values.tolist(), 'mean': self.mean, 'm2': self.m2, 'updates': self._updates}
+
+    def restore(self, data: Dict[str, Any]):
+        self.values.clear()
+        self.values.extend(data['values'])
+        self.mean, self.m2, self._updates = data['mean'], data['m2'], data['updates']
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def sma(self) -> float:
+        """Simple moving average, NaN until the window is full"""
+        return self.mean if self.full else NAN
+
+    def std(self) -> float:
+        """Population standard deviation (ddof=0), NaN until the window is full"""
+        if not self.full:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / self.window)
+
+
+class EMA:
+    """Exponential moving average matching pandas ewm(adjust=False)"""
+
+    def __init__(self, span: Optional[int] = None, alpha: Optional[float] = None,
+                 min_periods: Optional[int] = None):
+        if alpha is None:
+            alpha = 2.0 / (span + 1)
+        self.alpha = alpha
+        self.min_periods = min_periods if min_periods is not None else (span or 0)
+        self.value = NAN
+        self.count = 0
+
+    def update(self, x: float) -> float:
+        """Fold a new observation into the average; NaN inputs are skipped"""
+        if x != x:
+            return self.current()
+        if self.count == 0:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        self.count += 1
+        return self.current()
+
+    def current(self) -> float:
+        return self.value if self.count >= self.min_periods else NAN
+
+    def seed(self, values: np.ndarray):
+        """Set the state to what updating with every value would leave"""
+        values = values[~np.isnan(values)]
+        self.count = len(values)
+        self.value = float(ema(values, alpha=self.alpha, min_periods=0)[-1]) if self.count else NAN
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'value': self.value, 'count': self.count}
+
+    def restore(self, data: Dict[str, Any]):
+        self.value = data['value']
+        self.count = data['count']
+
+
+class WilderRSI:
+    """RSI using Wilder smoothing of gains and losses (same as ta.momentum.rsi)"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.avg_gain = EMA(alpha=1.0 / window, min_periods=window)
+        self.avg_loss = EMA(alpha=1.0 / window, min_periods=window)
+        self.prev = None
+
+    def update(self, price: float) -> float:
+        if self.prev is None:
+            gain = loss = 0.0
+        else:
+            diff = price - self.prev
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else 0.0
+        self.prev = price
+        self.avg_gain.update(gain)
+        self.avg_loss.update(loss)
+        return self.current()
+
+    def current(self) -> float:
+        up = self.avg_gain.current()
+        down = self.avg_loss.current()
+        if down != down:
+            return NAN
+        if down == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + up / down)
+
+    def seed(self, prices: np.ndarray):
+        """Set the state to what updating with every price would leave"""
+        diff = np.diff(prices, prepend=prices[:1])
+        self.avg_gain.seed(np.where(diff > 0, diff, 0.0))
+        self.avg_loss.seed(np.where(diff < 0, -diff, 0.0))
+        self.prev = float(prices[-1]) if len(prices) else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'gain': self.avg_gain.snapshot(), 'loss': self.avg_loss.snapshot(), 'prev': self.prev}
+
+    def restore(self, data: Dict[str, Any]):
+        self.avg_gain.restore(data['gain'])
+        self.avg_loss.restore(data['loss'])
+        self.prev = data['prev']
+
+
+class RollingExtrema:
+    """Rolling max and min over a fixed window using monotonic deques"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.count = 0
+        self._max = deque()  # (index, value), values decreasing
+        self._min = deque()  # (index, value), values increasing
+
+    def update(self, x: float):
+        i = self.count
+        self.count += 1
+        cutoff = i - self.window
+
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((i, x))
+        if self._max[0][0] <= cutoff:
+            self._max.popleft()
+
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((i, x))
+        if self._min[0][0] <= cutoff:
+            self._min.popleft()
+
+    def max(self) -> float:
+        return self._max[0][1] if self._max else NAN
+
+    def min(self) -> float:
+        return self._min[0][1] if self._min else NAN
+
+    def seed(self, values: np.ndarray):
+        """Set the state to what updating with every value would leave
+        (only the last window values can matter)"""
+        tail = values[-self.window:]
+        self._max.clear()
+        self._min.clear()
+        self.count = len(values) - len(tail)
+        for x in tail.tolist():
+            self.update(x)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'count': self.count, 'max': list(self._max), 'min': list(self._min)}
+
+    def restore(self, data: Dict[str, Any]):
+        self.count = data['count']
+        self._max = deque((i, x) for i, x in data['max'])
+        self._min = deque((i, x) for i, x in data['min'])
+
+
+class IndicatorState:
+    """Incremental indicator accumulators for a single ticker.
+
+    Every call to update() costs O(1) and produces the same values as
+    StrategyEngine.calculate_indicators would for the full price history.
+    """
+
+    MIN_HISTORY = 20
+
+    # Accumulators, as saved by snapshot()
+    PARTS = ('sma_5', 'sma_10', 'bands', 'volume_window', 'ema_10', 'ema_20',
+             'ema_fast', 'ema_slow', 'macd_signal', 'rsi', 'extrema')
+
+    def __init__(self):
+        self.count = 0
+        self.price = NAN
+        self.volume = 0.0
+
+        self.sma_5 = RollingWindow(5)
+        self.sma_10 = RollingWindow(10)
+        self.bands = RollingWindow(20)  # sma_20 and Bollinger Bands
+        self.volume_window = RollingWindow(20)
+
+        self.ema_10 = EMA(span=10)
+        self.ema_20 = EMA(span=20)
+        self.ema_fast = EMA(span=12)
+        self.ema_slow = EMA(span=26)
+        self.macd_signal = EMA(span=9)
+        self.rsi = WilderRSI(14)
+        self.extrema = RollingExtrema(20)
+
+    def update(self, price: float, volume: float = 0.0) -> Dict[str, Any]:
+        """Add a new bar and return the current indicator values"""
+        self.count += 1
+        self.price = price
+        self.volume = volume
+
+        self.sma_5.update(price)
+        self.sma_10.update(price)
+        self.bands.update(price)
+        self.volume_window.update(volume)
+
+        self.ema_10.update(price)
+        self.ema_20.update(price)
+        self.ema_fast.update(price)
+        self.ema_slow.update(price)
+        self.macd_signal.update(self._macd())
+        self.rsi.update(price)
+        self.extrema.update(price)
+
+        return self.values()
+
+    @classmethod
+    def from_history(cls, prices, volumes=None) -> "IndicatorState":
+        """The state after updating with every bar of a history, computed in
+        one vectorized pass instead of bar by bar"""
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.zeros_like(prices) if volumes is None else np.asarray(volumes, dtype=np.float64)
+        state = cls()
+        if not len(prices):
+            return state
+
+        state.count = len(prices)
+        state.price = float(prices[-1])
+        state.volume = float(volumes[-1])
+
+        for window in (state.sma_5, state.sma_10, state.bands):
+            window.seed(prices)
+        state.volume_window.seed(volumes)
+
+        for average in (state.ema_10, state.ema_20, state.ema_fast, state.ema_slow):
+            average.seed(prices)
+        state.macd_signal.seed(ema(prices, span=12) - ema(prices, span=26))
+        state.rsi.seed(prices)
+        state.extrema.seed(prices)
+        return state
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable copy of every accumulator"""
+        data = {'count': self.count, 'price': self.price, 'volume': self.volume}
+        for name in self.PARTS:
+            data[name] = getattr(self, name).snapshot()
+        return data
+
+    @classmethod
+    def restore(cls, data: Dict[str, Any]) -> "IndicatorState":
+        state = cls()
+        state.count, state.price, state.volume = data['count'], data['price'], data['volume']
+        for name in cls.PARTS:
+            getattr(state, name).restore(data[name])
+        return state
+
+    def _macd(self) -> float:
+        return self.ema_fast.current() - self.ema_slow.current()
+
+    def values(self) -> Dict[str, Any]:
+        """Current indicator values, empty until enough history is available"""
+        if self.count < self.MIN_HISTORY:
+            return {}
+
+        bb_middle = self.bands.sma()
+        bb_std = self.bands.std()
+
+        return {
+            'price': self.price,
+            'volume': self.volume,
+
+            # Moving averages
+            'sma_5': self.sma_5.sma(),
+            'sma_10': self.sma_10.sma(),
+            'sma_20': bb_middle,
+            'ema_10': self.ema_10.current(),
+            'ema_20': self.ema_20.current(),
+
+            # RSI
+            'rsi': self.rsi.current(),
+
+            # MACD
+            'macd': self._macd(),
+            'macd_signal': self.macd_signal.current(),
+
+            # Bollinger Bands
+            'bb_upper': bb_middle + 2 * bb_std,
+            'bb_lower': bb_middle - 2 * bb_std,
+            'bb_middle': bb_middle,
+
+            # Volume indicators
+            'volume_sma_20': self.volume_window.sma(),
+
+            # Support/Resistance (simplified)
+            'resistance': self.extrema.max(),
+            'support': self.extrema.min()
+        }
+
+
+class IndicatorEngine:
+    """Keeps one IndicatorState per ticker"""
+
+    def __init__(self):
+        self.states: Dict[str, IndicatorState] = {}
+
+    def update(self, ticker: str, price: float, volume: float = 0.0) -> Dict[str, Any]:
+        """Feed a new bar for a ticker and return its indicator values"""
+        state = self.states.get(ticker)
+        if state is None:
+            state = self.states[ticker] = IndicatorState()
+        return state.update(price, volume)
+
+    def get(self, ticker: str) -> Dict[str, Any]:
+        """Latest indicator values for a ticker"""
+        state = self.states.get(ticker)
+        return state.values() if state else {}
+
+    def warm_up(self, ticker: str, prices, volumes=None) -> Dict[str, Any]:
+        """Replace a ticker's state with one built from its bar history"""
+        state = self.states[ticker] = IndicatorState.from_history(prices, volumes)
+        return state.values()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {ticker: state.snapshot() for ticker, state in self.states.items()}
+
+    def restore(self, data: Dict[str, Dict[str, Any]]):
+        for ticker, state in data.items():
+            self.states[ticker] = IndicatorState.restore(state)
+
+    def reset(self, ticker: str = None):
+        """Drop accumulated state for one ticker, or all tickers"""
+        if ticker is None:
+            self.states.clear()
+        else:
+            self.states.pop(ticker, None)
@@ -1,46 +1,487 @@
+import atexit
+import collections
+import gzip
 import json
+import mmap
 import os
-from typing import List, Dict, Any
+import queue
+import re
+import shutil
+import struct
+import threading
+import time
+from typing import List, Dict, Any, Optional, Union, Iterable, Callable
 from datetime import datetime
 
+# Sidecar index record: byte offset of the line, timestamp (epoch seconds), event name
+INDEX_RECORD = struct.Struct('<qd16s')
+
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Upper bound on entries written per group commit
+MAX_BATCH = 1000
+
+
+def _to_epoch(value: Union[str, datetime, float, None]) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value.timestamp()
+
+
+def _event_key(event: Optional[str]) -> bytes:
+    return (event or '').encode()[:16].ljust(16, b'\0')
+
+
+def _serialize(log_entry: Dict[str, Any]) -> str:
+    """JSON-encode an entry, splicing in values that carry their own cached
+    encoding (a to_json() method, as state snapshots have) instead of
+    re-encoding them"""
+    encoded = {key: value.to_json() for key, value in log_entry.items() if hasattr(value, 'to_json')}
+    if not encoded:
+        return json.dumps(log_entry)
+    rest = json.dumps({key: value for key, value in log_entry.items() if key not in encoded})
+    parts = [f'{json.dumps(key)}: {text}' for key, text in encoded.items()]
+    return rest[:-1] + (', ' if len(rest) > 2 else '') + ', '.join(parts) + '}'
+
+
 class TradeLogger:
-    def __init__(self, log_file: str):
+    def __init__(self, log_file: str, index: bool = True, buffered: bool = True,
+                 flush_interval: float = 0.05, fsync: str = 'batch', max_queue: int = 10000,
+                 max_bytes: Optional[int] = None, max_files: Optional[int] = None):
         self.log_file = log_file
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-    
+        self.index_file = log_file + '.idx' if index else None
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        if self.index_file:
+            self._sync_index()
+
+        # Size-based rotation: the active file is sealed as log_file.NNNNNN,
+        # compressed in the background to .gz, and only max_files files are kept
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._segment_re = re.compile(re.escape(os.path.basename(log_file)) + r'\.(\d{6})(\.gz)?$')
+        self._compressors: List[threading.Thread] = []
+        self._retired = set()  # Segments deleted by retention
+        for seq in self._segments():
+            if os.path.exists(self._segment_path(seq)):
+                self._start_compression(seq)  # Interrupted before compression finished
+
+        if fsync not in ('never', 'batch'):
+            raise ValueError(f"Unknown fsync policy '{fsync}'")
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self._write_lock = threading.Lock()
+        self._log_handle = None
+        self._index_handle = None
+        self._listeners: List[Callable[[str], None]] = []
+
+        # Entries are serialized by the caller and written by a background thread
+        self._queue = queue.Queue(maxsize=max_queue) if buffered else None
+        self._writer = None
+        if buffered:
+            self._writer = threading.Thread(target=self._run_writer, name="trade-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
     def log(self, log_entry: Dict[str, Any]):
         """Add a new log entry"""
         if 'timestamp' not in log_entry:
             log_entry['timestamp'] = datetime.now().isoformat()
-        
-        with open(self.log_file, 'a') as f:
-            f.write(json.dumps(log_entry) + '\n')
-    
+
+        line = _serialize(log_entry)
+        item = ((line + '\n').encode(), log_entry.get('timestamp'), log_entry.get('event'))
+        for listener in self._listeners:
+            listener(line)
+        if self._queue is not None:
+            self._queue.put(item)  # Blocks only if the writer falls max_queue entries behind
+        else:
+            self._write_batch([item])
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """Call listener with the serialized JSON of every entry logged from now on"""
+        self._listeners.append(listener)
+
+    def flush(self):
+        """Block until every entry logged so far is on disk"""
+        if self._queue is None or not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Flush pending entries and stop the background writer"""
+        if self._writer is not None:
+            atexit.unregister(self.close)
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        for thread in list(self._compressors):
+            thread.join()
+        with self._write_lock:
+            for handle in (self._log_handle, self._index_handle):
+                if handle:
+                    handle.close()
+            self._log_handle = self._index_handle = None
+
+    def _run_writer(self):
+        while True:
+            batch = []
+            waiters = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+
+            # Group-commit whatever arrives within the flush interval
+            while True:
+                if item is None:
+                    self._write_batch(batch)
+                    for done in waiters:
+                        done.set()
+                    return
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= MAX_BATCH:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            except OSError:
+                pass  # Never let a disk error kill the writer thread
+            for done in waiters:
+                done.set()
+
+    def _write_batch(self, batch: List[tuple]):
+        with self._write_lock:
+            while batch:
+                if self._log_handle is None:
+                    self._log_handle = open(self.log_file, 'ab')
+                    if self.index_file:
+                        self._index_handle = open(self.index_file, 'ab')
+
+                # Take entries only while the segment is under max_bytes, so it
+                # overshoots by at most one entry; the rest go to the next segment
+                offset = self._log_handle.tell()
+                records = []
+                taken = 0
+                for line, timestamp, event in batch:
+                    if self.max_bytes and offset >= self.max_bytes:
+                        break
+                    records.append(self._index_record(offset, {"timestamp": timestamp, "event": event}))
+                    offset += len(line)
+                    taken += 1
+
+                if taken:
+                    self._log_handle.write(b''.join(line for line, _, _ in batch[:taken]))
+                    self._log_handle.flush()
+                    if self._index_handle:
+                        self._index_handle.write(b''.join(records))
+                        self._index_handle.flush()
+
+                    if self.fsync == 'batch':
+                        os.fsync(self._log_handle.fileno())
+                    batch = batch[taken:]
+
+                if self.max_bytes and offset >= self.max_bytes:
+                    self._rotate()
+
+    def _segments(self) -> List[int]:
+        """Sequence numbers of sealed segments, oldest first"""
+        log_dir = os.path.dirname(self.log_file) or '.'
+        found = set()
+        for name in os.listdir(log_dir):
+            match = self._segment_re.match(name)
+            if match:
+                found.add(int(match.group(1)))
+        return sorted(found)
+
+    def _segment_path(self, seq: int) -> str:
+        return f"{self.log_file}.{seq:06d}"
+
+    def _rotate(self):
+        """Seal the active file as the next segment (caller holds _write_lock)"""
+        for handle in (self._log_handle, self._index_handle):
+            if handle:
+                handle.close()
+        self._log_handle = self._index_handle = None
+
+        segments = self._segments()
+        seq = segments[-1] + 1 if segments else 1
+        path = self._segment_path(seq)
+        os.replace(self.log_file, path)
+        if self.index_file and os.path.exists(self.index_file):
+            os.replace(self.index_file, path + '.idx')
+
+        self._start_compression(seq)
+        self._apply_retention(segments + [seq])
+
+    def _start_compression(self, seq: int):
+        thread = threading.Thread(target=self._compress_segment, args=(seq,),
+                                  name=f"trade-log-compress-{seq}", daemon=True)
+        self._compressors.append(thread)
+        thread.start()
+
+    def _compress_segment(self, seq: int):
+        path = self._segment_path(seq)
+        try:
+            with open(path, 'rb') as src, gzip.open(path + '.gz.tmp', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(path + '.gz.tmp', path + '.gz')
+            if seq in self._retired:  # Expired while being compressed
+                os.remove(path + '.gz')
+            os.remove(path)
+        except OSError:
+            pass  # Left uncompressed; retried on the next start
+        finally:
+            self._compressors.remove(threading.current_thread())
+
+    def _apply_retention(self, segments: List[int]):
+        if not self.max_files:
+            return
+        # The active file counts towards max_files, as does a segment whether
+        # or not it has been compressed yet
+        for seq in segments[:max(0, len(segments) - (self.max_files - 1))]:
+            self._retired.add(seq)  # A compressor still working on it discards its output
+            path = self._segment_path(seq)
+            for name in (path, path + '.gz', path + '.gz.tmp', path + '.idx'):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+
+    def _open_segment(self, seq: int):
+        """Open a sealed segment, compressed or not yet compressed"""
+        path = self._segment_path(seq)
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return gzip.open(path + '.gz', 'rb')
+
+    @staticmethod
+    def _index_record(offset: int, log_entry: Dict[str, Any]) -> bytes:
+        try:
+            timestamp = _to_epoch(log_entry.get('timestamp')) or 0.0
+        except (TypeError, ValueError):
+            timestamp = 0.0
+        return INDEX_RECORD.pack(offset, timestamp, _event_key(log_entry.get('event')))
+
+    def _sync_index(self):
+        """Index any log lines written without the index (or rebuild it if missing)"""
+        if not os.path.exists(self.log_file):
+            return
+
+        start = 0
+        if os.path.exists(self.index_file):
+            size = os.path.getsize(self.index_file)
+            # Drop a partially written trailing record
+            if size % INDEX_RECORD.size:
+                size -= size % INDEX_RECORD.size
+                with open(self.index_file, 'r+b') as f:
+                    f.truncate(size)
+            if size:
+                with open(self.index_file, 'rb') as f:
+                    f.seek(size - INDEX_RECORD.size)
+                    last_offset = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[0]
+                if last_offset >= os.path.getsize(self.log_file):
+                    # Log was truncated or replaced; start the index over
+                    with open(self.index_file, 'wb'):
+                        pass
+                else:
+                    with open(self.log_file, 'rb') as f:
+                        f.seek(last_offset)
+                        f.readline()
+                        start = f.tell()
+
+        if start >= os.path.getsize(self.log_file):
+            return
+
+        records = []
+        with open(self.log_file, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                try:
+                    records.append(self._index_record(offset, json.loads(line)))
+                except ValueError:
+                    pass
+                offset += len(line)
+
+        with open(self.index_file, 'ab') as f:
+            f.write(b''.join(records))
+
+    def _tail_lines(self, limit: int, path: Optional[str] = None) -> List[bytes]:
+        """Last `limit` lines of the log (or another uncompressed file),
+        reading backwards from EOF in blocks"""
+        with open(path or self.log_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            while position > 0 and data.count(b'\n') <= limit:
+                step = min(TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+
+        lines = [line for line in data.split(b'\n') if line.strip()]
+        if position > 0:
+            lines = lines[1:]  # First line may be cut in half
+        return lines[-limit:] if limit > 0 else []
+
+    def _segment_tail(self, seq: int, limit: int) -> List[bytes]:
+        """Last `limit` lines of a sealed segment without reading all of it.
+
+        An uncompressed segment is read backwards like the active file; a
+        compressed one is decompressed from the offset its sidecar index
+        gives for the limit-th last entry, keeping at most limit lines.
+        """
+        path = self._segment_path(seq)
+        try:
+            return self._tail_lines(limit, path)
+        except FileNotFoundError:
+            pass  # Already compressed
+        offset = 0
+        try:
+            with open(path + '.idx', 'rb') as f:
+                count = os.fstat(f.fileno()).st_size // INDEX_RECORD.size
+                if count > limit:
+                    f.seek((count - limit) * INDEX_RECORD.size)
+                    offset = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[0]
+        except OSError:
+            pass  # No index: stream the whole segment
+        with gzip.open(path + '.gz', 'rb') as f:
+            f.seek(offset)
+            return list(collections.deque(
+                (line.rstrip(b'\n') for line in f if line.strip()), maxlen=limit))
+
     def get_recent_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent log entries"""
         logs = []
-        if not os.path.exists(self.log_file):
-            return logs
-        
-        with open(self.log_file, 'r') as f:
-            lines = f.readlines()
-        
-        # Get last 'limit' lines
-        for line in lines[-limit:]:
+        self.flush()
+
+        lines = self._tail_lines(limit) if os.path.exists(self.log_file) else []
+        # Continue into sealed segments, newest first, when the active file is short
+        for seq in reversed(self._segments() if len(lines) < limit else []):
+            try:
+                lines = self._segment_tail(seq, limit - len(lines)) + lines
+            except OSError:
+                continue
+            if len(lines) >= limit:
+                break
+
+        for line in lines:
             try:
-                logs.append(json.loads(line.strip()))
+                logs.append(json.loads(line))
             except:
                 continue
-        
+
+        return logs
+
+    def _search(self, index: mmap.mmap, count: int, timestamp: float) -> int:
+        """First record whose timestamp is >= timestamp"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if INDEX_RECORD.unpack_from(index, mid * INDEX_RECORD.size)[1] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _query_index(self, index_path: str, events, start: Optional[float], end: Optional[float],
+                     limit: Optional[int]) -> List[int]:
+        """Offsets of matching lines in one segment, newest first"""
+        if not os.path.exists(index_path) or os.path.getsize(index_path) < INDEX_RECORD.size:
+            return []
+
+        offsets = []
+        with open(index_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            count = len(index) // INDEX_RECORD.size
+            lo = self._search(index, count, start) if start is not None else 0
+            hi = self._search(index, count, end) if end is not None else count
+            for i in range(hi - 1, lo - 1, -1):
+                offset, _, key = INDEX_RECORD.unpack_from(index, i * INDEX_RECORD.size)
+                if events is None or key in events:
+                    offsets.append(offset)
+                    if limit is not None and len(offsets) >= limit:
+                        break
+        return offsets
+
+    @staticmethod
+    def _read_at(f, offsets: List[int]) -> List[Dict[str, Any]]:
+        logs = []
+        for offset in sorted(offsets):
+            f.seek(offset)
+            try:
+                logs.append(json.loads(f.readline()))
+            except ValueError:
+                continue
         return logs
-    
+
+    def query_logs(self, event: Union[str, Iterable[str], None] = None,
+                   start: Union[str, datetime, float, None] = None,
+                   end: Union[str, datetime, float, None] = None,
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Log entries filtered by event type and time range [start, end).
+
+        Uses the sidecar indexes to binary-search the time range and only reads
+        the matching lines, walking from the active file back through sealed
+        segments. With a limit, the most recent matching entries are returned.
+        """
+        if not self.index_file:
+            return []
+        self.flush()
+        with self._write_lock:
+            self._sync_index()
+
+        if isinstance(event, str):
+            event = [event]
+        events = {_event_key(e) for e in event} if event is not None else None
+        start, end = _to_epoch(start), _to_epoch(end)
+
+        remaining = limit
+        logs = []
+        offsets = self._query_index(self.index_file, events, start, end, remaining)
+        if offsets and os.path.exists(self.log_file):
+            with open(self.log_file, 'rb') as f:
+                logs = self._read_at(f, offsets)
+
+        for seq in reversed(self._segments()):
+            if remaining is not None:
+                remaining = limit - len(logs)
+                if remaining <= 0:
+                    break
+            offsets = self._query_index(self._segment_path(seq) + '.idx', events, start, end, remaining)
+            if not offsets:
+                continue
+            try:
+                with self._open_segment(seq) as f:
+                    logs = self._read_at(f, offsets) + logs
+            except OSError:
+                continue
+
+        return logs
+
     def get_last_trade_state(self) -> Dict[str, Any]:
         """Get the last trade state from logs for recovery"""
-        logs = self.get_recent_logs(500)  # Check last 500 logs
-        
+        if self.index_file:
+            logs = self.query_logs(event=['ENTRY', 'EXIT', 'STATE_CHANGE'], limit=500)
+        else:
+            logs = self.get_recent_logs(500)  # Check last 500 logs
+
         for log in reversed(logs):
             if log.get('event') in ['ENTRY', 'EXIT', 'STATE_CHANGE']:
                 if 'after_state' in log:
                     return log['after_state']
-        
-        return None
\ No newline at end of file
+
+        return None
@@ -0,0 +1,295 @@
+"""Market data sources behind one interface, selected by market_data.source.
+
+A source is used two ways:
+
+- poll(tickers, now): the latest price of each ticker, once per scheduler
+  tick. This is how the live controller reads prices.
+- play(tickers, on_tick, speed): push every tick in time order to a
+  callback, paced at 1x or N times real time, or as fast as possible. Load
+  tests and backtests use this.
+
+Every price a source hands out also goes to its listeners (for example the
+paper adapter's matching engine), so the strategy and the simulated
+exchange see the same data.
+
+Sources:
+
+- SimulatedMarketData: the trend plus random walk the controller used to
+  generate one price at a time, drawn for all tickers at once with numpy.
+- ReplayMarketData: recorded ticks or bars read from disk, replayed
+  deterministically.
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Starting prices for simulated tickers
+BASE_PRICES = {
+    'SPY': 450.0, 'AAPL': 175.0, 'QQQ': 380.0, 'TSLA': 240.0, 'MSFT': 370.0,
+    'NVDA': 900.0, 'AMD': 180.0, 'MSTR': 1500.0, 'COIN': 250.0
+}
+DEFAULT_PRICE = 100.0
+SESSION_SECONDS = 6.5 * 3600  # One regular trading day, 9:30 to 16:00
+
+Tick = Tuple[float, str, float]  # (timestamp, ticker, price)
+TickListener = Callable[[str, float, float], None]  # fn(ticker, price, timestamp)
+
+
+class MarketDataSource(ABC):
+    def __init__(self):
+        self._listeners: List[TickListener] = []
+
+    def add_listener(self, fn: TickListener):
+        """Call fn(ticker, price, timestamp) for every price handed out"""
+        self._listeners.append(fn)
+
+    def _emit(self, tickers: Sequence[str], prices: np.ndarray, timestamp: float):
+        for listener in self._listeners:
+            for ticker, price in zip(tickers, prices.tolist()):
+                if price == price:  # Skip NaN: no data for the ticker
+                    listener(ticker, price, timestamp)
+
+    @abstractmethod
+    def poll(self, tickers: Sequence[str], now: Optional[float] = None) -> Tuple[float, np.ndarray]:
+        """Return (timestamp, prices) for tickers as of now (wall time).
+
+        timestamp is the market time of the prices; for replayed data it
+        is the recorded time, not now. Tickers without data get NaN.
+        """
+
+    @abstractmethod
+    def latest(self, ticker: str) -> float:
+        """Most recent price handed out for ticker, without moving the feed"""
+
+    @abstractmethod
+    def ticks(self, tickers: Sequence[str]) -> Iterator[Tick]:
+        """Every tick for tickers in time order"""
+
+    def play(self, tickers: Sequence[str], on_tick: TickListener,
+             speed: Union[float, str, None] = "max", limit: Optional[int] = None) -> int:
+        """Push ticks to on_tick(ticker, price, timestamp) and the listeners.
+
+        speed 1 replays in real time, N at N times real time, "max" (or
+        None) as fast as the consumer keeps up. Returns the number of ticks.
+        """
+        pace = _parse_speed(speed)
+        count = 0
+        start_wall = start_data = None
+        for timestamp, ticker, price in self.ticks(tickers):
+            if limit is not None and count >= limit:
+                break
+            if pace is not None:
+                if start_wall is None:
+                    start_wall, start_data = time.monotonic(), timestamp
+                delay = start_wall + (timestamp - start_data) / pace - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            for listener in self._listeners:
+                listener(ticker, price, timestamp)
+            on_tick(ticker, price, timestamp)
+            count += 1
+        return count
+
+
+def _parse_speed(speed: Union[float, str, None]) -> Optional[float]:
+    """Ticks per real second multiplier, or None for no pacing"""
+    if speed is None or speed == "max":
+        return None
+    speed = float(speed)
+    if speed <= 0:
+        raise ValueError(f"Replay speed must be positive or 'max', got {speed}")
+    return speed
+
+
+class SimulatedMarketData(MarketDataSource):
+    """Trending random walk per ticker.
+
+    Each ticker gets a random daily trend (+/- trend_range) and daily
+    volatility (volatility_range). A day is steps_per_day steps, by default
+    one per interval seconds of a trading session, and every step moves the
+    price by trend / steps_per_day plus a normal draw of
+    volatility / sqrt(steps_per_day), so a day of steps moves it about as
+    much as one day regardless of how often it is polled.
+    """
+
+    def __init__(self, seed: Optional[int] = None, trend_range: float = 0.02,
+                 volatility_range: Tuple[float, float] = (0.01, 0.05),
+                 steps_per_day: Optional[float] = None, interval: float = 1.0):
+        super().__init__()
+        if steps_per_day is None:
+            steps_per_day = SESSION_SECONDS / interval
+        self.trend_range = trend_range
+        self.volatility_range = volatility_range
+        self.steps_per_day = steps_per_day
+        self.step_scale = 1 / np.sqrt(steps_per_day)
+        self.interval = interval  # Seconds between generated ticks in ticks()
+        self._rng = np.random.default_rng(seed)
+        self._index: Dict[str, int] = {}
+        self._price = np.empty(0)
+        self._trend = np.empty(0)
+        self._volatility = np.empty(0)
+
+    def _rows(self, tickers: Sequence[str]) -> np.ndarray:
+        new = [t for t in dict.fromkeys(tickers) if t not in self._index]
+        if new:
+            for ticker in new:
+                self._index[ticker] = len(self._index)
+            self._price = np.append(self._price, [BASE_PRICES.get(t, DEFAULT_PRICE) for t in new])
+            self._trend = np.append(self._trend, self._rng.uniform(-self.trend_range, self.trend_range, len(new)))
+            self._volatility = np.append(self._volatility, self._rng.uniform(*self.volatility_range, len(new)))
+        return np.fromiter((self._index[t] for t in tickers), dtype=np.intp, count=len(tickers))
+
+    def generate(self, tickers: Sequence[str], steps: int) -> np.ndarray:
+        """The next steps prices for tickers as a (steps, len(tickers)) array"""
+        rows = self._rows(tickers)
+        moves = self._trend[rows] / self.steps_per_day + \
+            self._rng.standard_normal((steps, len(rows))) * (self._volatility[rows] * self.step_scale)
+        path = self._price[rows] * np.cumprod(1 + moves, axis=0)
+        self._price[rows] = path[-1]
+        return np.round(path, 2)
+
+    def poll(self, tickers: Sequence[str], now: Optional[float] = None) -> Tuple[float, np.ndarray]:
+        now = time.time() if now is None else now
+        prices = self.generate(tickers, 1)[0]
+        self._emit(tickers, prices, now)
+        return now, prices
+
+    def latest(self, ticker: str) -> float:
+        row = self._rows([ticker])[0]  # May grow the arrays: index after
+        return round(float(self._price[row]), 2)
+
+    def ticks(self, tickers: Sequence[str], block: int = 1024) -> Iterator[Tick]:
+        """Endless ticks, one per ticker every interval seconds"""
+        tickers = list(tickers)
+        timestamp = 0.0
+        while True:
+            for row in self.generate(tickers, block).tolist():
+                timestamp += self.interval
+                for ticker, price in zip(tickers, row):
+                    yield timestamp, ticker, price
+
+
+class ReplayMarketData(MarketDataSource):
+    """Recorded ticks replayed deterministically.
+
+    Polling maps wall time onto the recording: at speed N, t seconds after
+    the first poll shows the prices recorded N * t seconds after the start.
+    At speed "max" every poll steps to the next recorded timestamp. Once the
+    recording runs out, the last prices stay.
+    """
+
+    def __init__(self, timestamps, tickers, prices, speed: Union[float, str, None] = 1):
+        super().__init__()
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        tickers = np.asarray(tickers)
+        prices = np.asarray(prices, dtype=np.float64)
+        order = np.argsort(timestamps, kind='stable')
+        self.timestamps = timestamps[order]
+        self.tickers = tickers[order]
+        self.prices = prices[order]
+        self.speed = _parse_speed(speed)
+
+        self._series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for ticker in np.unique(self.tickers).tolist():
+            mask = self.tickers == ticker
+            self._series[ticker] = (self.timestamps[mask], self.prices[mask])
+        self._steps = np.unique(self.timestamps)
+        self._cursor = -1
+        self._start_wall: Optional[float] = None
+        self.clock = self._steps[0] if len(self._steps) else 0.0
+
+    @classmethod
+    def from_path(cls, path: str, speed: Union[float, str, None] = 1) -> "ReplayMarketData":
+        """Load a CSV/Parquet file with a ticker (or symbol) column, or a
+        directory of per-ticker files named after the ticker.
+
+        Timestamps in the file become seconds since the epoch; bars use
+        their close.
+        """
+        import pandas as pd
+        from core.backtest import load_bars
+
+        if os.path.isdir(path):
+            parts = []
+            for name in sorted(os.listdir(path)):
+                ticker, ext = os.path.splitext(name)
+                if ext.lower() in ('.csv', '.parquet', '.pq'):
+                    bars = load_bars(os.path.join(path, name))
+                    parts.append((bars.timestamp, np.full(len(bars), ticker), bars.close))
+            if not parts:
+                raise ValueError(f"No recorded data files in {path}")
+            timestamps, tickers, prices = (np.concatenate(column) for column in zip(*parts))
+            return cls(_seconds(timestamps), tickers, prices, speed)
+
+        frame = pd.read_parquet(path) if path.endswith(('.parquet', '.pq')) else pd.read_csv(path)
+        columns = {name.lower(): name for name in frame.columns}
+        ticker_column = columns.get('ticker') or columns.get('symbol')
+        if ticker_column is None:
+            raise ValueError(f"No 'ticker' column in {path}")
+        bars = load_bars(path)
+        return cls(_seconds(bars.timestamp), frame[ticker_column].astype(str).to_numpy(), bars.close, speed)
+
+    @property
+    def finished(self) -> bool:
+        return self.clock >= self._steps[-1] if len(self._steps) else True
+
+    def _advance(self, now: float):
+        if self.speed is None:
+            self._cursor = min(self._cursor + 1, len(self._steps) - 1)
+            self.clock = self._steps[self._cursor]
+            return
+        if self._start_wall is None:
+            self._start_wall = now
+        self.clock = self._steps[0] + (now - self._start_wall) * self.speed
+
+    def _price_at(self, ticker: str, clock: float) -> float:
+        series = self._series.get(ticker)
+        if series is None:
+            return np.nan
+        timestamps, prices = series
+        # Latest tick at or before the clock; before the first, the first
+        i = np.searchsorted(timestamps, clock, side='right') - 1
+        return prices[max(i, 0)]
+
+    def poll(self, tickers: Sequence[str], now: Optional[float] = None) -> Tuple[float, np.ndarray]:
+        if len(self._steps):
+            self._advance(time.time() if now is None else now)
+        prices = np.array([self._price_at(t, self.clock) for t in tickers], dtype=np.float64)
+        timestamp = float(self.clock)
+        self._emit(tickers, prices, timestamp)
+        return timestamp, prices
+
+    def latest(self, ticker: str) -> float:
+        price = self._price_at(ticker, self.clock)
+        if price != price:
+            raise KeyError(f"No recorded prices for {ticker}")
+        return float(price)
+
+    def ticks(self, tickers: Sequence[str]) -> Iterator[Tick]:
+        mask = np.isin(self.tickers, list(tickers))
+        return zip(self.timestamps[mask].tolist(), self.tickers[mask].tolist(), self.prices[mask].tolist())
+
+
+def _seconds(timestamps: np.ndarray) -> np.ndarray:
+    """load_bars gives int64 nanoseconds for real dates and row numbers otherwise"""
+    timestamps = np.asarray(timestamps)
+    if len(timestamps) and np.abs(timestamps).max() > 10 ** 12:
+        return timestamps / 1e9
+    return timestamps.astype(np.float64)
+
+
+def create_market_data(config: Dict[str, Any]) -> MarketDataSource:
+    """Build the source named by market_data.source in config.yaml"""
+    source = config.get('source', 'simulated')
+    if source == 'simulated':
+        # One step per poll; steps are scaled to the poll interval
+        return SimulatedMarketData(seed=config.get('seed'), interval=float(config.get('update_interval', 60)))
+    if source == 'replay':
+        replay = config.get('replay', {})
+        if not replay.get('path'):
+            raise ValueError("market_data.replay.path is required for the replay source")
+        return ReplayMarketData.from_path(replay['path'], replay.get('speed', 1))
+    raise ValueError(f"Unknown market data source: {source}")
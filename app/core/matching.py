@@ -0,0 +1,291 @@
+"""Simulated exchange for paper trading.
+
+MatchingEngine keeps one OrderBook per ticker holding our working orders in
+price-time priority, and fills them against a simulated market: quotes fed
+in with on_quote (a last price, turned into a bid/ask by the spread, with an
+optional number of shares available at the touch).
+
+- MARKET orders take liquidity at the touch as soon as they arrive.
+- LIMIT orders fill while the touch is at or through their limit; the best
+  price goes first, then the earliest order at that price.
+- STOP orders wait until the last price trades through the stop, then
+  become market orders.
+
+When a quote carries less size than the orders want, they fill partially and
+the rest waits for later quotes. Fill prices go through a SlippageModel.
+Orders reach the exchange after a delay drawn from a LatencyModel.
+
+Time is the engine's own clock (the quote timestamps), not wall time, so
+replayed data runs as fast as it can be fed.
+"""
+import heapq
+import itertools
+import random
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+ORDER_TYPES = ("MARKET", "LIMIT", "STOP")
+
+# Working orders are SUBMITTED (or PARTIALLY_FILLED); the others are final
+FINAL_STATUSES = {"FILLED", "CANCELLED", "REJECTED"}
+
+
+class SlippageModel:
+    """Adverse price move applied to each fill.
+
+    A fixed bps cost plus market impact that grows linearly with the fill
+    size: impact_bps for every `depth` shares.
+    """
+
+    def __init__(self, bps: float = 0.0, impact_bps: float = 0.0, depth: float = 10000.0):
+        self.bps = bps
+        self.impact_bps = impact_bps
+        self.depth = depth
+
+    def price(self, touch: float, side: int, quantity: int) -> float:
+        cost = self.bps + self.impact_bps * quantity / self.depth
+        return touch * (1 + side * cost / 10000.0)
+
+
+class LatencyModel:
+    """Delay in seconds between submitting an order and the exchange seeing it"""
+
+    def __init__(self, mean_ms: float = 0.0, jitter_ms: float = 0.0, seed: Optional[int] = None):
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if not self.jitter_ms:
+            return self.mean_ms / 1000.0
+        return max(0.0, self._random.gauss(self.mean_ms, self.jitter_ms)) / 1000.0
+
+
+class Order:
+    __slots__ = ("order_id", "ticker", "side", "quantity", "order_type", "price", "seq",
+                 "submitted_at", "arrival", "remaining", "filled_value", "status")
+
+    def __init__(self, order_id: str, ticker: str, quantity: int, order_type: str,
+                 price: Optional[float], seq: int, submitted_at: float, arrival: float):
+        self.order_id = order_id
+        self.ticker = ticker
+        self.side = 1 if quantity > 0 else -1
+        self.quantity = abs(quantity)
+        self.order_type = order_type
+        self.price = price
+        self.seq = seq
+        self.submitted_at = submitted_at
+        self.arrival = arrival
+        self.remaining = self.quantity
+        self.filled_value = 0.0
+        self.status = "SUBMITTED"
+
+    @property
+    def filled(self) -> int:
+        return self.quantity - self.remaining
+
+    @property
+    def average_price(self) -> Optional[float]:
+        filled = self.filled
+        return self.filled_value / filled if filled else None
+
+    @property
+    def working(self) -> bool:
+        return self.status not in FINAL_STATUSES
+
+    def to_result(self) -> Dict:
+        """The order as reported by ExecutionAdapter.place_order"""
+        return {
+            "order_id": self.order_id,
+            "ticker": self.ticker,
+            "quantity": self.side * self.quantity,
+            "executed_price": self.average_price,
+            "filled_quantity": self.side * self.filled,
+            "status": self.status,
+            "order_type": self.order_type
+        }
+
+
+class OrderBook:
+    """Working orders for one ticker and the latest quote they trade against.
+
+    Limits and stops sit in heaps; cancelled orders are left in place and
+    skipped when they reach the top.
+    """
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.bid: Optional[float] = None
+        self.ask: Optional[float] = None
+        self.last: Optional[float] = None
+        self.bid_size: Optional[int] = None  # None: unlimited
+        self.ask_size: Optional[int] = None
+        self.markets: Dict[int, Deque[Order]] = {1: deque(), -1: deque()}
+        # Best first: highest buy limit, lowest sell limit, then earliest
+        self.limits: Dict[int, List[Tuple[float, int, Order]]] = {1: [], -1: []}
+        # Nearest trigger first: lowest buy stop, highest sell stop
+        self.stops: Dict[int, List[Tuple[float, int, Order]]] = {1: [], -1: []}
+
+    def add(self, order: Order):
+        side = order.side
+        if order.order_type == "MARKET":
+            self.markets[side].append(order)
+        elif order.order_type == "LIMIT":
+            heapq.heappush(self.limits[side], (-side * order.price, order.seq, order))
+        else:
+            heapq.heappush(self.stops[side], (side * order.price, order.seq, order))
+
+    def depth(self) -> Dict[str, int]:
+        """Working orders by side"""
+        def count(side):
+            queues = (self.markets[side], self.limits[side], self.stops[side])
+            return sum(1 for queue in queues for entry in queue
+                       if (entry if isinstance(entry, Order) else entry[2]).working)
+        return {"buy": count(1), "sell": count(-1)}
+
+
+class MatchingEngine:
+    """Order books for every ticker plus the simulated market they fill against"""
+
+    def __init__(self, slippage: Optional[SlippageModel] = None, latency: Optional[LatencyModel] = None,
+                 spread_bps: float = 0.0, liquidity: Optional[int] = None, id_prefix: str = "PAPER"):
+        self.slippage = slippage or SlippageModel()
+        self.latency = latency or LatencyModel()
+        self.spread_bps = spread_bps
+        self.liquidity = liquidity
+        self.id_prefix = id_prefix
+        self.clock = 0.0
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[str, Order] = {}
+        self._seq = itertools.count(1)
+        self._in_transit: List[Tuple[float, int, Order]] = []  # (arrival, seq, order)
+        self._fill_listeners: List[Callable[[Order, int, float], None]] = []
+
+    def add_fill_listener(self, fn: Callable[[Order, int, float], None]):
+        """Call fn(order, quantity, price) for every fill"""
+        self._fill_listeners.append(fn)
+
+    def book(self, ticker: str) -> OrderBook:
+        book = self.books.get(ticker)
+        if book is None:
+            book = self.books[ticker] = OrderBook(ticker)
+        return book
+
+    # Orders
+
+    def submit(self, ticker: str, quantity: int, order_type: str = "MARKET",
+               price: Optional[float] = None) -> Order:
+        """Send an order; it joins the book once its latency has elapsed.
+
+        quantity is signed (negative sells). price is the limit for LIMIT
+        orders and the trigger for STOP orders.
+        """
+        seq = next(self._seq)
+        order = Order(f"{self.id_prefix}_{seq}", ticker, quantity, order_type, price,
+                      seq, self.clock, self.clock + self.latency.sample())
+        self.orders[order.order_id] = order
+        if quantity == 0 or order_type not in ORDER_TYPES or \
+                (order_type != "MARKET" and (price is None or price <= 0)):
+            order.status = "REJECTED"
+            return order
+        heapq.heappush(self._in_transit, (order.arrival, seq, order))
+        if order.arrival <= self.clock:
+            self.advance(self.clock)
+        return order
+
+    def cancel(self, order_id: str) -> bool:
+        """Cancel what is left of a working order"""
+        order = self.orders.get(order_id)
+        if order is None or not order.working:
+            return False
+        order.status = "CANCELLED"
+        return True
+
+    # Market
+
+    def on_quote(self, ticker: str, price: float, timestamp: Optional[float] = None,
+                 size: Optional[int] = None):
+        """A new last price for ticker at timestamp (default: now on the
+        engine clock), with size shares available on each side of the quote
+        (default: the engine's liquidity setting)"""
+        if timestamp is not None:
+            self.advance(timestamp)
+        size = self.liquidity if size is None else size
+        half_spread = price * self.spread_bps / 20000.0
+        book = self.book(ticker)
+        book.last = price
+        book.bid, book.ask = price - half_spread, price + half_spread
+        book.bid_size = book.ask_size = size
+        self._trigger_stops(book)
+        self._match(book)
+
+    def advance(self, timestamp: float):
+        """Move the clock forward; orders that have arrived by then join
+        their books and trade against the quotes standing at the time"""
+        while self._in_transit and self._in_transit[0][0] <= timestamp:
+            arrival, _, order = heapq.heappop(self._in_transit)
+            self.clock = max(self.clock, arrival)
+            if not order.working:
+                continue
+            book = self.book(order.ticker)
+            book.add(order)
+            if book.last is not None:
+                self._trigger_stops(book)
+                self._match(book)
+        self.clock = max(self.clock, timestamp)
+
+    def _trigger_stops(self, book: OrderBook):
+        for side in (1, -1):
+            stops = book.stops[side]
+            # Buy stops trigger at or above the stop, sell stops at or below
+            while stops and side * book.last >= stops[0][0]:
+                order = heapq.heappop(stops)[2]
+                if order.working:
+                    book.markets[side].append(order)
+
+    def _match(self, book: OrderBook):
+        for side in (1, -1):
+            touch = book.ask if side == 1 else book.bid
+            if touch is None:
+                continue
+            available = book.ask_size if side == 1 else book.bid_size
+
+            # Market orders first, in arrival order
+            markets = book.markets[side]
+            while markets and available != 0:
+                order = markets[0]
+                if order.working:
+                    available = self._fill(order, touch, available, None)
+                    if order.working:
+                        break  # Out of liquidity until the next quote
+                markets.popleft()
+
+            # Then limits the touch has reached, best price first
+            limits = book.limits[side]
+            while limits and available != 0:
+                order = limits[0][2]
+                if order.working:
+                    if side * (order.price - touch) < 0:
+                        break
+                    available = self._fill(order, touch, available, order.price)
+                    if order.working:
+                        break
+                heapq.heappop(limits)
+
+            if side == 1:
+                book.ask_size = available
+            else:
+                book.bid_size = available
+
+    def _fill(self, order: Order, touch: float, available: Optional[int], limit: Optional[float]) -> Optional[int]:
+        quantity = order.remaining if available is None else min(order.remaining, available)
+        price = self.slippage.price(touch, order.side, quantity)
+        if limit is not None:
+            price = min(price, limit) if order.side == 1 else max(price, limit)
+
+        order.remaining -= quantity
+        order.filled_value += quantity * price
+        order.status = "FILLED" if order.remaining == 0 else "PARTIALLY_FILLED"
+        for listener in self._fill_listeners:
+            listener(order, order.side * quantity, price)
+        return None if available is None else available - quantity
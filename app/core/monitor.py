@@ -0,0 +1,112 @@
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, Any
+
+_TIMEFRAME_RE = re.compile(r'^\s*(\d+)\s*(s|sec|min|m|h|hour|d|day)\s*$', re.IGNORECASE)
+_UNIT_SECONDS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_timeframe(timeframe: str) -> int:
+    """Bar length in seconds for a strategy timeframe such as '1min' or '5min'"""
+    match = _TIMEFRAME_RE.match(str(timeframe))
+    if not match:
+        raise ValueError(f"Unknown timeframe '{timeframe}'")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()]
+
+
+class LatencyStats:
+    """Summary statistics over the most recent latency samples"""
+
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"count": 0}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(samples[-1] * 1000, 3)
+        }
+
+
+class TickScheduler:
+    """Calls a function every interval seconds on a background thread.
+
+    Deadlines are computed from the start time (start + n * interval) rather
+    than from when the previous call finished, so the schedule does not drift.
+    Ticks that are already past due when a slow call returns are skipped and
+    counted, not queued up.
+    """
+
+    def __init__(self, interval: float, func: Callable[[float], None], name: str = "tick-scheduler"):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.func = func
+        self.name = name
+        self.ticks = 0
+        self.missed = 0
+        self.lag = LatencyStats()  # Wake-up time past each deadline
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def shutdown(self, wait: bool = True):
+        self._stop.set()
+        if wait and self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        origin = time.monotonic()
+        wall_origin = time.time()
+        n = 1
+        while True:
+            deadline = origin + n * self.interval
+            if self._stop.wait(max(0.0, deadline - time.monotonic())):
+                return
+            now = time.monotonic()
+            self.lag.record(now - deadline)
+            self.ticks += 1
+            try:
+                self.func(wall_origin + n * self.interval)
+            except Exception as e:
+                print(f"{self.name}: tick failed: {e}")
+
+            # Next deadline strictly in the future
+            behind = int((time.monotonic() - origin) // self.interval) + 1
+            if behind > n + 1:
+                self.missed += behind - n - 1
+            n = max(n + 1, behind)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_s": self.interval,
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "lag": self.lag.summary()
+        }
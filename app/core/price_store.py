@@ -0,0 +1,75 @@
+from typing import Dict, List, Iterable
+
+import numpy as np
+
+
+class PriceStore:
+    """Array-backed price history for many tickers.
+
+    Each ticker owns one row of a (tickers x 2*capacity) float64 matrix and
+    its own write position (its count), so tickers whose bars close at
+    different times keep gap-free histories. Every sample is written twice,
+    capacity columns apart, so the most recent n samples of a row are always
+    one contiguous run of columns.
+    """
+
+    def __init__(self, capacity: int = 50, rows: int = 16):
+        self.capacity = capacity
+        self.data = np.full((rows, 2 * capacity), np.nan)
+        self.counts = np.zeros(rows, dtype=np.int64)
+        self.rows: Dict[str, int] = {}
+        self._free: List[int] = list(range(rows - 1, -1, -1))
+
+    def _grow(self):
+        old = len(self.data)
+        self.data = np.vstack([self.data, np.full((old, 2 * self.capacity), np.nan)])
+        self.counts = np.concatenate([self.counts, np.zeros(old, dtype=np.int64)])
+        self._free.extend(range(2 * old - 1, old - 1, -1))
+
+    def add(self, ticker: str) -> int:
+        """Allocate a row for a ticker (no-op if it already has one)"""
+        if ticker not in self.rows:
+            if not self._free:
+                self._grow()
+            row = self._free.pop()
+            self.data[row] = np.nan
+            self.counts[row] = 0
+            self.rows[ticker] = row
+        return self.rows[ticker]
+
+    def remove(self, ticker: str):
+        row = self.rows.pop(ticker, None)
+        if row is not None:
+            self._free.append(row)
+
+    def index(self, tickers: Iterable[str]) -> np.ndarray:
+        """Row numbers for a list of tickers, allocating rows as needed"""
+        return np.fromiter((self.add(ticker) for ticker in tickers), dtype=np.int64)
+
+    def append(self, rows: np.ndarray, prices: np.ndarray):
+        """Record one sample for each of the given (distinct) rows; other
+        rows are left as they are"""
+        columns = self.counts[rows] % self.capacity
+        self.data[rows, columns] = prices
+        self.data[rows, columns + self.capacity] = prices
+        self.counts[rows] += 1
+
+    def extend(self, row: int, prices: np.ndarray):
+        """Record many samples, oldest first, for one row (e.g. to seed it)"""
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        tail = prices[-self.capacity:]  # Anything older would be overwritten anyway
+        columns = (self.counts[row] + n - len(tail) + np.arange(len(tail))) % self.capacity
+        self.data[row, columns] = tail
+        self.data[row, columns + self.capacity] = tail
+        self.counts[row] += n
+
+    def window(self, rows: np.ndarray, n: int) -> np.ndarray:
+        """Last n samples (oldest first) for the given rows, NaN before a
+        row's first sample"""
+        ends = (self.counts[rows] - 1) % self.capacity + self.capacity + 1
+        columns = ends[:, None] - n + np.arange(n)
+        return self.data[np.asarray(rows)[:, None], columns]
+
+    def latest(self, rows: np.ndarray) -> np.ndarray:
+        return self.window(rows, 1)[:, 0]
@@ -1,81 +1,109 @@
 import sqlite3
 import json
+import threading
 from typing import Dict, Any, List
 
+DEFAULT_PROFILES = {
+    'safe_mode': {
+        'stop_loss_pct': 1.0,
+        'take_profit_pct': 2.0,
+        'capital_allocation_pct': 1.0
+    },
+    'risky_business': {
+        'stop_loss_pct': 3.0,
+        'take_profit_pct': 6.0,
+        'capital_allocation_pct': 5.0
+    }
+}
+
+def _create_profiles(cursor: sqlite3.Cursor):
+    """Migration 1: profiles table seeded with the default profiles"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS profiles (
+            name TEXT PRIMARY KEY,
+            config TEXT NOT NULL
+        )
+    ''')
+    # Databases created before migrations existed already have the defaults,
+    # possibly edited by the user; keep those rows as they are
+    for name, config in DEFAULT_PROFILES.items():
+        cursor.execute(
+            'INSERT OR IGNORE INTO profiles (name, config) VALUES (?, ?)',
+            (name, json.dumps(config))
+        )
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    _create_profiles,
+]
+
 class ProfileManager:
     def __init__(self, db_file: str):
         self.db_file = db_file
+        # One long-lived connection shared by all threads, serialized by a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        # Parsed profiles by name; None until first loaded
+        self._cache = None
         self.init_db()
-    
+
     def init_db(self):
-        """Initialize database with default profiles"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS profiles (
-                name TEXT PRIMARY KEY,
-                config TEXT NOT NULL
-            )
-        ''')
-        
-        # Insert default profiles
-        default_profiles = {
-            'safe_mode': {
-                'stop_loss_pct': 1.0,
-                'take_profit_pct': 2.0,
-                'capital_allocation_pct': 1.0
-            },
-            'risky_business': {
-                'stop_loss_pct': 3.0,
-                'take_profit_pct': 6.0,
-                'capital_allocation_pct': 5.0
-            }
-        }
-        
-        for name, config in default_profiles.items():
-            cursor.execute(
-                'INSERT OR REPLACE INTO profiles (name, config) VALUES (?, ?)',
-                (name, json.dumps(config))
-            )
-        
-        conn.commit()
-        conn.close()
-    
+        """Bring the schema up to date, running each migration exactly once"""
+        with self._lock:
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= len(MIGRATIONS):
+                return
+
+            # BEGIN IMMEDIATE so concurrent processes cannot migrate twice
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+                for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+                    migration(self._conn.cursor())
+                    self._conn.execute(f'PRAGMA user_version = {number}')
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            self._cache = None
+
+    def _profiles(self) -> Dict[str, Dict[str, Any]]:
+        """All profiles, loaded from the database once and then served from memory"""
+        cache = self._cache
+        if cache is None:
+            with self._lock:
+                if self._cache is None:
+                    rows = self._conn.execute('SELECT name, config FROM profiles').fetchall()
+                    self._cache = {name: json.loads(config) for name, config in rows}
+                cache = self._cache
+        return cache
+
     def get_profile(self, profile_name: str) -> Dict[str, Any]:
         """Get profile configuration"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT config FROM profiles WHERE name = ?', (profile_name,))
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return json.loads(result[0])
+        profile = self._profiles().get(profile_name)
+
+        if profile is not None:
+            return dict(profile)
         else:
             raise ValueError(f"Profile '{profile_name}' not found")
-    
+
     def get_all_profiles(self) -> List[str]:
         """Get all available profile names"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT name FROM profiles')
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [result[0] for result in results]
-    
+        return list(self._profiles().keys())
+
     def create_profile(self, name: str, config: Dict[str, Any]):
         """Create a new trading profile"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            'INSERT OR REPLACE INTO profiles (name, config) VALUES (?, ?)',
-            (name, json.dumps(config))
-        )
-        
-        conn.commit()
-        conn.close()
\ No newline at end of file
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO profiles (name, config) VALUES (?, ?)',
+                (name, json.dumps(config))
+            )
+            self._conn.commit()
+            self._cache = None
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,91 @@
+from array import array
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity float64 history with O(1) append and no reallocation.
+
+    Values live in a preallocated array('d') of twice the capacity; each
+    append writes the value twice, capacity slots apart (the same mirror
+    layout as PriceStore), so the most recent n values are always one
+    contiguous run. view() returns them as a numpy array sharing that
+    memory, so windowed reads copy nothing.
+    """
+
+    __slots__ = ("capacity", "count", "_data", "_array")
+
+    def __init__(self, capacity: int, values: Iterable[float] = ()):
+        if capacity < 1:
+            raise ValueError("RingBuffer capacity must be at least 1")
+        self.capacity = capacity
+        self.count = 0  # Values appended so far
+        self._data = array('d', bytes(16 * capacity))
+        self._array = np.frombuffer(self._data, dtype=np.float64)  # Shares _data
+        self.extend(values)
+
+    def append(self, x: float):
+        capacity = self.capacity
+        i = self.count % capacity
+        data = self._data
+        data[i] = x
+        data[i + capacity] = x
+        self.count += 1
+
+    def extend(self, values: Iterable[float]):
+        """Append many values with one vectorized write"""
+        values = np.asarray(values if hasattr(values, '__len__') else list(values), dtype=np.float64)
+        n = len(values)
+        if not n:
+            return
+        capacity = self.capacity
+        tail = values[-capacity:]  # Anything older would be overwritten anyway
+        slots = (self.count + n - len(tail) + np.arange(len(tail))) % capacity
+        self._array[slots] = tail
+        self._array[slots + capacity] = tail
+        self.count += n
+
+    def clear(self):
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count if self.count < self.capacity else self.capacity
+
+    def _end(self) -> int:
+        """One past the newest value in the mirrored array"""
+        return (self.count - 1) % self.capacity + self.capacity + 1
+
+    def __getitem__(self, i: int) -> float:
+        """i-th value, oldest first; negative indexes count back from the newest"""
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("RingBuffer index out of range")
+        return self._data[self._end() - n + i]
+
+    @property
+    def last(self) -> float:
+        return self[-1]
+
+    def view(self, n: Optional[int] = None) -> np.ndarray:
+        """The last n values (all by default), oldest first, without copying"""
+        size = len(self)
+        n = size if n is None or n > size else n
+        if n == 0:
+            return self._array[:0]
+        end = self._end()
+        return self._array[end - n:end]
+
+    def __iter__(self) -> Iterator[float]:
+        n = len(self)
+        if n:
+            end = self._end()
+            yield from self._data[end - n:end]
+
+    def tolist(self):
+        return self.view().tolist()
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.capacity}, {self.tolist()})"
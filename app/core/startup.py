@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+
+class StartupTimer:
+    """Records how long each phase of process startup takes"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self.finished = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of startup work"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "phase": name,
+                "ms": round((time.perf_counter() - started) * 1000, 2)
+            })
+
+    def finish(self):
+        """Mark startup as complete"""
+        self.finished = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        """Phases in order plus total time from timer creation to finish()"""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "total_ms": round((end - self.origin) * 1000, 2),
+            "phases": list(self.phases)
+        }
+
+    def format(self) -> str:
+        report = self.report()
+        lines = [f"Startup finished in {report['total_ms']:.1f} ms"]
+        for phase in report['phases']:
+            lines.append(f"  {phase['phase']:<12}{phase['ms']:>10.1f} ms")
+        return "\n".join(lines)
@@ -1,17 +1,112 @@
 import json
 import os
+import threading
+import time
+from functools import wraps
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from core.logger import TradeLogger
 from core.profiles import ProfileManager
 
+
+class FrozenDict(dict):
+    """A dict that refuses modification, so it can be shared between readers"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("state snapshots are read-only; use TradingState.update_state")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively convert dicts to FrozenDict and lists to tuples"""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class StateSnapshot(FrozenDict):
+    """One immutable version of the trading state.
+
+    Readers share the same object; updates publish a new snapshot. The JSON
+    encoding is computed at most once and reused for the state file, log
+    entries and HTTP responses.
+    """
+
+    def __init__(self, values: Dict[str, Any], version: int, etag_prefix: str):
+        dict.__init__(self, ((key, _freeze(item)) for key, item in values.items()))
+        self.version = version
+        self.etag = f'"{etag_prefix}-{version}"'
+        self._json = None
+
+    def to_json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self)
+        return self._json
+
+    def to_bytes(self) -> bytes:
+        return self.to_json().encode()
+
+
+def _transition(method):
+    """Run a state-changing method under the state's write lock"""
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
 class TradingState:
-    def __init__(self, logger: TradeLogger, profile_manager: ProfileManager):
+    """Trading state with serialized writes and lock-free reads.
+
+    Every change runs under one re-entrant lock and publishes a new immutable
+    snapshot; readers just take the current snapshot reference.
+    """
+
+    def __init__(self, logger: TradeLogger, profile_manager: ProfileManager,
+                 checkpoint_interval: int = 100, fsync: bool = True,
+                 state_file: str = "trading_state.json"):
         self.logger = logger
         self.profile_manager = profile_manager
-        self.state_file = "trading_state.json"
+        self.state_file = state_file
+        # Updates are appended to a journal; every checkpoint_interval records
+        # the full state is checkpointed to state_file and the journal dropped
+        self.checkpoint_interval = checkpoint_interval
+        self.fsync = fsync
+        self._journal = None
+        self._journal_records = 0
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Distinguishes ETags across restarts, when versions start over
+        self._etag_prefix = format(time.time_ns(), 'x')
+        self._snapshot: StateSnapshot = None
+        self._lock = threading.RLock()
         self.load_state()
     
+    @property
+    def state(self) -> StateSnapshot:
+        """The current snapshot (read-only)"""
+        return self._snapshot
+    
+    def transaction(self) -> threading.RLock:
+        """Lock to hold across a read-check-write sequence (e.g. checking a
+        position, placing its exit order and recording the exit)"""
+        return self._lock
+    
+    def _publish(self, values: Dict[str, Any]):
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        self._snapshot = StateSnapshot(values, version, self._etag_prefix)
+    
+    @_transition
     def load_state(self):
         """Load state from file or initialize default state"""
         default_state = {
@@ -21,20 +116,46 @@ class TradingState:
             "equity": 100000.0,
             "position": None,
             "strategy_active": False,
+            "watchlist": {},  # ticker -> {"current_state", "position"} in multi-ticker mode
             "last_updated": datetime.now().isoformat()
         }
+        required_keys = ["current_state", "ticker", "profile", "equity", "position", "strategy_active"]
         
+        state = default_state
         if os.path.exists(self.state_file):
             try:
                 with open(self.state_file, 'r') as f:
-                    self.state = json.load(f)
-                # Validate loaded state
-                if not all(key in self.state for key in default_state.keys()):
-                    self.state = default_state
-            except:
-                self.state = default_state
-        else:
-            self.state = default_state
+                    loaded = json.load(f)
+                # Validate loaded state, filling in keys added since it was saved
+                if not all(key in loaded for key in required_keys):
+                    raise ValueError(f"missing keys: {[k for k in required_keys if k not in loaded]}")
+                state = {**default_state, **loaded}
+            except (OSError, ValueError, TypeError) as e:
+                # Set the bad checkpoint aside so the next save can't destroy it
+                corrupt_file = self.state_file + '.corrupt'
+                os.replace(self.state_file, corrupt_file)
+                self.logger.log({
+                    "timestamp": datetime.now().isoformat(),
+                    "event": "STATE_CORRUPT",
+                    "message": f"Unreadable checkpoint moved to {corrupt_file}: {e}",
+                })
+                self.logger.flush()
+        
+        # Replay updates made since the checkpoint. Records hold absolute
+        # values, so replaying ones the checkpoint already covers is harmless
+        self._close_journal()
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        changes = json.loads(line)
+                    except ValueError:
+                        break  # Torn final record from a crash mid-append
+                    state.update(changes)
+        self._publish(state)
+        if os.path.exists(self.journal_file):
+            # Checkpoint even if nothing replayed, so appends never follow a torn record
+            self.save_state()
         
         # Log state recovery
         if self.state['current_state'] != 'IDLE':
@@ -42,24 +163,75 @@ class TradingState:
                 "timestamp": datetime.now().isoformat(),
                 "event": "STATE_RECOVERY",
                 "message": f"Recovered state: {self.state['current_state']}",
-                "state": self.state.copy()
+                "state": self.state
             })
+            self.logger.flush()
     
+    @property
+    def journal_file(self) -> str:
+        return self.state_file + '.journal'
+    
+    @_transition
     def save_state(self):
-        """Save current state to file"""
-        self.state['last_updated'] = datetime.now().isoformat()
-        with open(self.state_file, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        """Checkpoint the full state to file atomically and start a new journal"""
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(self.state.to_bytes())
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_file, self.state_file)
+        
+        self._close_journal()
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._journal_records = 0
     
-    def get_state(self) -> Dict[str, Any]:
-        """Get current state"""
-        return self.state.copy()
+    def _append_journal(self, changes: Dict[str, Any]):
+        """Durably record one update, checkpointing once the journal is long enough"""
+        if self._journal is None or self._journal.name != self.journal_file:
+            self._close_journal()
+            self._journal = open(self.journal_file, 'ab')
+        self._journal.write((json.dumps(changes) + '\n').encode())
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        
+        self._journal_records += 1
+        if self._journal_records >= self.checkpoint_interval:
+            self.save_state()
+    
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+    
+    @_transition
+    def close(self):
+        """Write a final checkpoint and close the journal"""
+        if self._journal_records:
+            self.save_state()
+        self._close_journal()
+    
+    def get_state(self) -> StateSnapshot:
+        """Get the current state snapshot; it is shared and must not be modified"""
+        return self._snapshot
     
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call listener with the changed keys after every state update"""
+        self._listeners.append(listener)
+    
+    @_transition
     def update_state(self, updates: Dict[str, Any]):
         """Update state with new values"""
-        before_state = self.state.copy()
-        self.state.update(updates)
-        self.save_state()
+        before_state = self._snapshot
+        self._publish({**before_state, **updates, "last_updated": datetime.now().isoformat()})
+        
+        diff = {key: self.state[key] for key in updates}
+        diff['last_updated'] = self.state['last_updated']
+        self._append_journal(diff)
+        for listener in self._listeners:
+            listener(diff)
         
         # Log state change if significant
         if any(key in updates for key in ['current_state', 'position', 'equity']):
@@ -67,23 +239,15 @@ class TradingState:
                 "timestamp": datetime.now().isoformat(),
                 "event": "STATE_CHANGE",
                 "before_state": before_state,
-                "after_state": self.state.copy()
+                "after_state": self.state
             })
     
+    @_transition
     def enter_trade(self, ticker: str, entry_price: float, quantity: int):
         """Enter a new trade with detailed logging"""
-        profile = self.profile_manager.get_profile(self.state['profile'])
-        stop_loss = entry_price * (1 - profile['stop_loss_pct'] / 100)
-        take_profit = entry_price * (1 + profile['take_profit_pct'] / 100)
-        
-        position = {
-            "ticker": ticker,
-            "entry_price": entry_price,
-            "quantity": quantity,
-            "stop_loss": stop_loss,
-            "take_profit": take_profit,
-            "entry_time": datetime.now().isoformat()
-        }
+        position = self._build_position(ticker, entry_price, quantity)
+        stop_loss = position['stop_loss']
+        take_profit = position['take_profit']
         
         self.update_state({
             "current_state": "LONG",
@@ -117,31 +281,115 @@ class TradingState:
             }
         })
     
-    def exit_trade(self, exit_price: float, reason: str):
-        """Exit current trade"""
+    @_transition
+    def exit_trade(self, exit_price: float, reason: str, quantity: Optional[int] = None):
+        """Exit current trade; quantity less than the position's (a partly
+        filled exit order) closes only that many shares"""
         if not self.state['position']:
             return
         
         position = self.state['position']
-        pnl = (exit_price - position['entry_price']) * position['quantity']
+        pnl, remaining = self._reduce(position, exit_price, quantity)
         new_equity = self.state['equity'] + pnl
         
-        before_state = self.state.copy()
+        before_state = self.state
         
         self.update_state({
-            "current_state": "IDLE",
+            "current_state": "LONG" if remaining else "IDLE",
             "equity": new_equity,
-            "position": None
+            "position": remaining
         })
         
         # Log trade exit
         self.logger.log({
             "timestamp": datetime.now().isoformat(),
-            "event": "EXIT",
+            "event": "PARTIAL_EXIT" if remaining else "EXIT",
             "ticker": position['ticker'],
             "exit_reason": reason,
             "exit_price": exit_price,
+            "quantity": position['quantity'] - (remaining['quantity'] if remaining else 0),
             "pnl": pnl,
             "before_state": before_state,
-            "after_state": self.state.copy()
-        })
\ No newline at end of file
+            "after_state": self.state
+        })
+    
+    @staticmethod
+    def _reduce(position: Dict[str, Any], exit_price: float,
+                quantity: Optional[int]) -> Tuple[float, Optional[Dict[str, Any]]]:
+        """P&L of selling quantity shares (None: all) and what is left open"""
+        held = position['quantity']
+        sold = held if quantity is None else min(quantity, held)
+        pnl = (exit_price - position['entry_price']) * sold
+        return pnl, ({**position, "quantity": held - sold} if sold < held else None)
+    
+    def _build_position(self, ticker: str, entry_price: float, quantity: int) -> Dict[str, Any]:
+        profile = self.profile_manager.get_profile(self.state['profile'])
+        return {
+            "ticker": ticker,
+            "entry_price": entry_price,
+            "quantity": quantity,
+            "stop_loss": entry_price * (1 - profile['stop_loss_pct'] / 100),
+            "take_profit": entry_price * (1 + profile['take_profit_pct'] / 100),
+            "entry_time": datetime.now().isoformat()
+        }
+    
+    def open_position_count(self) -> int:
+        """Number of open positions across single-ticker and watchlist mode"""
+        count = 1 if self.state['position'] else 0
+        return count + sum(1 for entry in self.state['watchlist'].values() if entry['position'])
+    
+    @_transition
+    def enter_positions(self, fills: List[Tuple[str, float, int]]):
+        """Open watchlist positions for a batch of (ticker, price, quantity) fills"""
+        if not fills:
+            return
+        
+        watchlist = dict(self.state['watchlist'])
+        for ticker, entry_price, quantity in fills:
+            position = self._build_position(ticker, entry_price, quantity)
+            watchlist[ticker] = {"current_state": "LONG", "position": position}
+            self.logger.log({
+                "timestamp": datetime.now().isoformat(),
+                "event": "ENTRY",
+                "ticker": ticker,
+                "profile": self.state['profile'],
+                "action": "BUY",
+                "quantity": quantity,
+                "entry_price": entry_price,
+                "position_value": entry_price * quantity,
+                "stop_loss": position['stop_loss'],
+                "take_profit": position['take_profit'],
+                "message": f"BUY {quantity} shares of {ticker} at ${entry_price:.2f}"
+            })
+        
+        self.update_state({"watchlist": watchlist})
+    
+    @_transition
+    def exit_positions(self, fills: List[Tuple]):
+        """Close watchlist positions for a batch of (ticker, price, reason)
+        fills; a fourth element, the shares sold, makes a partial exit"""
+        watchlist = dict(self.state['watchlist'])
+        equity = self.state['equity']
+        closed = False
+        
+        for ticker, exit_price, reason, *quantity in fills:
+            entry = watchlist.get(ticker)
+            if not entry or not entry['position']:
+                continue
+            position = entry['position']
+            pnl, remaining = self._reduce(position, exit_price, quantity[0] if quantity else None)
+            equity += pnl
+            watchlist[ticker] = {"current_state": "LONG" if remaining else "IDLE", "position": remaining}
+            closed = True
+            self.logger.log({
+                "timestamp": datetime.now().isoformat(),
+                "event": "PARTIAL_EXIT" if remaining else "EXIT",
+                "ticker": ticker,
+                "exit_reason": reason,
+                "exit_price": exit_price,
+                "quantity": position['quantity'] - (remaining['quantity'] if remaining else 0),
+                "pnl": pnl
+            })
+        
+        if closed:
+            self.update_state({"watchlist": watchlist, "equity": equity})
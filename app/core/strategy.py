@@ -1,13 +1,38 @@
+import copy
+import os
+import threading
 import yaml
 import json
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
-import ta  # Technical analysis library
+import numpy as np
+from core.backtest import compute_indicators
+from core.indicators import IndicatorEngine, IndicatorState
+from core.conditions import CompiledStrategy, compile_condition
+from core.monitor import TickScheduler, parse_timeframe
 
 class StrategyEngine:
-    def __init__(self, config_file: str = "strategies.yaml"):
+    """Strategy definitions, compiled once and swapped in whole on change.
+
+    Definitions come from config_file when it exists, otherwise from
+    defaults (e.g. the strategies section of config.yaml). reload() re-reads
+    the file when its mtime or size changes and publishes the recompiled set
+    with a single reference swap, so readers never see a half-updated
+    registry; a file that fails to parse or compile leaves the previous
+    strategies in place. watch() polls for changes on a background thread.
+    """
+
+    def __init__(self, config_file: str = "strategies.yaml", defaults: Optional[Dict[str, Any]] = None):
         self.config_file = config_file
+        self.defaults = defaults
+        self._lock = threading.Lock()  # Serializes reloads and edits
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._signature = self._file_signature()
         self.strategies = self.load_strategies()
+        self.compiled = self.compile_strategies(self.strategies)
+        self.indicators = IndicatorEngine()
+        self.reloads = 0
+        self.watcher: Optional[TickScheduler] = None
     
     def load_strategies(self) -> Dict[str, Any]:
         """Load strategies from YAML configuration"""
@@ -15,6 +40,8 @@ class StrategyEngine:
             with open(self.config_file, 'r') as f:
                 return yaml.safe_load(f) or {}
         except FileNotFoundError:
+            if self.defaults:
+                return copy.deepcopy(self.defaults)
             # Return default strategies
             return {
                 "default": {
@@ -24,7 +51,7 @@ class StrategyEngine:
                         "entry": [
                             "price > ema_20",
                             "rsi < 70",
-                            "volume > volume_sma_20"
+                            "ema_10 > ema_20"
                         ],
                         "exit": [
                             "price < ema_10 OR rsi > 80"
@@ -34,15 +61,80 @@ class StrategyEngine:
                 }
             }
     
+    def compile_strategies(self, strategies: Dict[str, Any]) -> Dict[str, CompiledStrategy]:
+        """Parse every strategy's conditions once, up front"""
+        return {name: self._compile(name, config) for name, config in strategies.items()}
+    
+    @staticmethod
+    def _compile(name: str, config: Dict[str, Any]) -> CompiledStrategy:
+        compiled = CompiledStrategy(name, config)  # Raises ValueError on bad conditions
+        if compiled.timeframe is not None:
+            try:
+                parse_timeframe(compiled.timeframe)
+            except ValueError as e:
+                raise ValueError(f"Strategy '{name}': {e}")
+        return compiled
+    
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.config_file)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def add_reload_listener(self, fn: Callable[[Dict[str, Any]], None]):
+        """Call fn(strategies) whenever a new set of strategies is published"""
+        self._listeners.append(fn)
+    
+    def _publish(self, strategies: Dict[str, Any], compiled: Dict[str, CompiledStrategy]):
+        # Compiled first: anything named in strategies is then always evaluable
+        self.compiled = compiled
+        self.strategies = strategies
+        for listener in self._listeners:
+            listener(strategies)
+    
+    def reload(self, force: bool = False) -> bool:
+        """Re-read and recompile the file if it changed; True if a new set was published"""
+        with self._lock:
+            signature = self._file_signature()
+            if signature == self._signature and not force:
+                return False
+            self._signature = signature
+            try:
+                strategies = self.load_strategies()
+                compiled = self.compile_strategies(strategies)
+            except (yaml.YAMLError, ValueError, AttributeError) as e:
+                print(f"Keeping current strategies, {self.config_file} is invalid: {e}")
+                return False
+            self._publish(strategies, compiled)
+            self.reloads += 1
+            return True
+    
+    def watch(self, interval: float = 2.0):
+        """Check the file for changes every interval seconds until close()"""
+        if self.watcher is None:
+            self.watcher = TickScheduler(interval, lambda _: self.reload(), name="strategy-reload")
+            self.watcher.start()
+    
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.shutdown()
+            self.watcher = None
+    
     def save_strategies(self):
-        """Save strategies to YAML file"""
-        with open(self.config_file, 'w') as f:
+        """Save strategies to YAML file (atomically, so a watcher never reads a partial file)"""
+        tmp = self.config_file + ".tmp"
+        with open(tmp, 'w') as f:
             yaml.dump(self.strategies, f, default_flow_style=False)
+        os.replace(tmp, self.config_file)
+        self._signature = self._file_signature()
     
     def create_strategy(self, name: str, config: Dict[str, Any]):
         """Create a new trading strategy"""
-        self.strategies[name] = config
-        self.save_strategies()
+        compiled = self._compile(name, config)
+        with self._lock:
+            self._publish({**self.strategies, name: config}, {**self.compiled, name: compiled})
+            self.save_strategies()
     
     def get_strategy(self, name: str) -> Optional[Dict[str, Any]]:
         """Get strategy configuration"""
@@ -54,80 +146,71 @@ class StrategyEngine:
     
     def evaluate_conditions(self, strategy_name: str, market_data: Dict[str, Any]) -> Dict[str, bool]:
         """Evaluate strategy conditions against market data"""
-        strategy = self.get_strategy(strategy_name)
-        if not strategy:
+        compiled = self.compiled.get(strategy_name)
+        if not compiled:
             return {"entry": False, "exit": False}
         
-        results = {"entry": True, "exit": False}
-        
-        # Evaluate entry conditions
-        for condition in strategy.get('conditions', {}).get('entry', []):
-            if not self.evaluate_condition(condition, market_data):
-                results["entry"] = False
-                break
-        
-        # Evaluate exit conditions
-        for condition in strategy.get('conditions', {}).get('exit', []):
-            if self.evaluate_condition(condition, market_data):
-                results["exit"] = True
-                break
-        
-        return results
+        return compiled.evaluate(market_data)
+    
+    def evaluate_conditions_batch(self, strategy_name: str, market_data: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Entry/exit masks for many tickers at once, from per-ticker vectors
+        such as calculate_indicators_batch returns"""
+        length = len(market_data.get('price', ()))
+        entry = np.zeros(length, dtype=bool)
+        exits = np.zeros(length, dtype=bool)
+        compiled = self.compiled.get(strategy_name)
+        if not compiled or not length:
+            return {"entry": entry, "exit": exits}
+
+        entry[:] = True
+        for condition in compiled.entry:
+            entry &= np.broadcast_to(np.asarray(condition.evaluate_array(market_data), dtype=bool), (length,))
+        for condition in compiled.exit:
+            exits |= np.broadcast_to(np.asarray(condition.evaluate_array(market_data), dtype=bool), (length,))
+        return {"entry": entry, "exit": exits}
     
     def evaluate_condition(self, condition: str, market_data: Dict[str, Any]) -> bool:
         """Evaluate a single condition string"""
         try:
-            # Replace variable names with actual values from market_data
-            evaluated_condition = condition
-            for key, value in market_data.items():
-                if isinstance(value, (int, float)):
-                    evaluated_condition = evaluated_condition.replace(key, str(value))
-            
-            # Safe evaluation of the condition
-            return eval(evaluated_condition, {"__builtins__": {}}, {})
-        except:
+            return compile_condition(condition)(market_data)
+        except ValueError:
             return False
     
+    def update_indicators(self, ticker: str, price: float, volume: float = 0.0) -> Dict[str, Any]:
+        """Feed the latest bar for a ticker and return its indicators in O(1)"""
+        return self.indicators.update(ticker, price, volume)
+    
     def calculate_indicators(self, price_data: List[float], volume_data: List[float]) -> Dict[str, Any]:
         """Calculate technical indicators from price and volume data"""
         if len(price_data) < 20:
             return {}
         
-        import pandas as pd
+        # Replay the history through a fresh incremental state; volumes are
+        # aligned to the newest prices (missing ones count as 0) by index
+        # rather than by building a padded copy, so RingBuffers work too
+        offset = len(price_data) - len(volume_data)
+        state = IndicatorState()
+        for i, price in enumerate(price_data):
+            state.update(price, volume_data[i - offset] if i >= offset else 0.0)
+        indicators = state.values()
         
-        # Convert to pandas Series for technical analysis
-        prices = pd.Series(price_data)
-        volumes = pd.Series(volume_data)
+        indicators['volume'] = volume_data[-1] if volume_data else 0
+        if len(volume_data) < 20:
+            indicators['volume_sma_20'] = indicators['volume']
         
-        indicators = {
-            'price': price_data[-1],
-            'volume': volume_data[-1] if volume_data else 0,
-            
-            # Moving averages
-            'sma_5': ta.trend.sma_indicator(prices, window=5).iloc[-1],
-            'sma_10': ta.trend.sma_indicator(prices, window=10).iloc[-1],
-            'sma_20': ta.trend.sma_indicator(prices, window=20).iloc[-1],
-            'ema_10': ta.trend.ema_indicator(prices, window=10).iloc[-1],
-            'ema_20': ta.trend.ema_indicator(prices, window=20).iloc[-1],
-            
-            # RSI
-            'rsi': ta.momentum.rsi(prices, window=14).iloc[-1],
-            
-            # MACD
-            'macd': ta.trend.macd(prices).iloc[-1],
-            'macd_signal': ta.trend.macd_signal(prices).iloc[-1],
-            
-            # Bollinger Bands
-            'bb_upper': ta.volatility.bollinger_hband(prices).iloc[-1],
-            'bb_lower': ta.volatility.bollinger_lband(prices).iloc[-1],
-            'bb_middle': ta.volatility.bollinger_mavg(prices).iloc[-1],
-            
-            # Volume indicators
-            'volume_sma_20': ta.trend.sma_indicator(volumes, window=20).iloc[-1] if len(volume_data) >= 20 else volume_data[-1],
-            
-            # Support/Resistance (simplified)
-            'resistance': max(price_data[-20:]),
-            'support': min(price_data[-20:])
-        }
+        return indicators
+    
+    def calculate_indicators_batch(self, prices, volumes=None) -> Dict[str, np.ndarray]:
+        """calculate_indicators for a whole watchlist in one pass.
+
+        prices is a (tickers, bars) matrix, oldest bar first; volumes has the
+        same shape (None: no volume). Returns each indicator as a vector with
+        one value per ticker, equal to calculate_indicators on that row.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.ndim != 2 or prices.shape[1] < 20:
+            return {}
+        volumes = np.zeros_like(prices) if volumes is None else np.asarray(volumes, dtype=np.float64)
         
-        return indicators
\ No newline at end of file
+        series = compute_indicators(prices, volumes)
+        return {name: values[:, -1] for name, values in series.items()}
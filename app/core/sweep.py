@@ -0,0 +1,156 @@
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+from typing import Dict, Any, List, Callable, Optional
+
+import numpy as np
+import yaml
+
+from core.backtest import load_bars, compute_indicators, signal_masks, simulate
+from core.conditions import CompiledStrategy
+
+PROFILE_FIELDS = ('stop_loss_pct', 'take_profit_pct', 'capital_allocation_pct')
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def parse_range(spec: str) -> List[float]:
+    """Parse 'start:stop:step' (inclusive) or a comma separated list of values"""
+    if ':' in spec:
+        start, stop, step = (float(part) for part in spec.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(count)]
+    return [float(part) for part in spec.split(',')]
+
+
+def build_grid(strategies: List[str], ranges: Dict[str, List[float]],
+               base_profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every combination of strategy and profile parameter values"""
+    values = [ranges.get(field) or [base_profile[field]] for field in PROFILE_FIELDS]
+    grid = []
+    for strategy in strategies:
+        for combo in itertools.product(*values):
+            params = dict(zip(PROFILE_FIELDS, combo))
+            params['strategy'] = strategy
+            grid.append(params)
+    return grid
+
+
+def _init_worker(data_file: str, keys: List[str], strategies: Dict[str, Any], initial_equity: float):
+    # Memory-mapped, so every worker shares the same pages instead of a pickled copy
+    matrix = np.load(data_file, mmap_mode='r')
+    _worker['indicators'] = {key: matrix[i] for i, key in enumerate(keys)}
+    _worker['strategies'] = strategies
+    _worker['initial_equity'] = initial_equity
+    _worker['masks'] = {}
+
+
+def _run_combo(params: Dict[str, Any]) -> Dict[str, Any]:
+    name = params['strategy']
+    indicators = _worker['indicators']
+    masks = _worker['masks'].get(name)
+    if masks is None:
+        strategy = CompiledStrategy(name, _worker['strategies'][name])
+        masks = _worker['masks'][name] = signal_masks(strategy, indicators)
+
+    result = simulate(indicators['price'], masks, params, indicators, _worker['initial_equity'], name)
+    summary = result.summary()
+    summary.update(params)
+    return summary
+
+
+def run_sweep(close: np.ndarray, volume: np.ndarray, strategies: Dict[str, Any], grid: List[Dict[str, Any]],
+              processes: Optional[int] = None, initial_equity: float = 100000.0,
+              on_result: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+    """Backtest every grid combination across a process pool, ranked by PnL.
+
+    Indicators are computed once here and handed to the workers through a
+    memory-mapped file. Results are passed to on_result as they arrive.
+    """
+    indicators = compute_indicators(close, volume)
+    keys = list(indicators.keys())
+
+    workdir = tempfile.mkdtemp(prefix="sweep_")
+    try:
+        data_file = os.path.join(workdir, "indicators.npy")
+        np.save(data_file, np.stack([indicators[key] for key in keys]))
+        del indicators
+
+        processes = processes or os.cpu_count() or 1
+        chunksize = max(1, len(grid) // (processes * 16))
+        results = []
+        with Pool(processes, _init_worker, (data_file, keys, strategies, initial_equity)) as pool:
+            for summary in pool.imap_unordered(_run_combo, grid, chunksize):
+                results.append(summary)
+                if on_result:
+                    on_result(summary)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results.sort(key=lambda r: r['pnl'], reverse=True)
+    return results
+
+
+def format_table(results: List[Dict[str, Any]], limit: int = 20) -> str:
+    """Ranked results as a plain text table"""
+    lines = [f"{'rank':>4}  {'strategy':<16}{'sl %':>6}{'tp %':>6}{'alloc %':>8}"
+             f"{'trades':>8}{'pnl':>14}{'win %':>8}{'max dd %':>10}"]
+    for rank, r in enumerate(results[:limit], 1):
+        lines.append(f"{rank:>4}  {r['strategy']:<16}{r['stop_loss_pct']:>6.2f}{r['take_profit_pct']:>6.2f}"
+                     f"{r['capital_allocation_pct']:>8.2f}{r['trades']:>8}{r['pnl']:>14.2f}"
+                     f"{r['win_rate']:>8.1f}{r['max_drawdown_pct']:>10.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search strategies and profile parameters over historical bars")
+    parser.add_argument("data", help="CSV or Parquet file with OHLCV bars")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--strategy", action="append", help="Strategy name, repeatable (default: all)")
+    parser.add_argument("--profile", help="Base profile for parameters that are not swept")
+    parser.add_argument("--stop-loss", help="e.g. 0.5:3:0.25 or 0.5,1,2")
+    parser.add_argument("--take-profit", help="e.g. 1:6:0.5")
+    parser.add_argument("--allocation", help="e.g. 1:10:1")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--equity", type=float, default=100000.0)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    from core.profiles import ProfileManager
+    profiles_db = os.path.join(os.path.dirname(os.path.abspath(args.config)), config['profiles_db'])
+    base_profile = ProfileManager(profiles_db).get_profile(args.profile or config.get('default_profile', 'safe_mode'))
+
+    strategies = config.get('strategies', {})
+    names = args.strategy or list(strategies.keys())
+    ranges = {
+        'stop_loss_pct': parse_range(args.stop_loss) if args.stop_loss else None,
+        'take_profit_pct': parse_range(args.take_profit) if args.take_profit else None,
+        'capital_allocation_pct': parse_range(args.allocation) if args.allocation else None,
+    }
+    grid = build_grid(names, ranges, base_profile)
+
+    bars = load_bars(args.data)
+    started = time.perf_counter()
+    done = [0]
+
+    def progress(summary):
+        done[0] += 1
+        if done[0] % 500 == 0 or done[0] == len(grid):
+            print(f"  {done[0]}/{len(grid)} combinations ({time.perf_counter() - started:.1f}s)")
+
+    print(f"Sweeping {len(grid)} combinations over {len(bars)} bars")
+    results = run_sweep(bars.close, bars.volume, {name: strategies[name] for name in names}, grid,
+                        args.processes, args.equity, progress)
+    print(format_table(results, args.top))
+
+
+if __name__ == "__main__":
+    main()
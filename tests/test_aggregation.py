@@ -0,0 +1,104 @@
+import unittest
+import time
+import numpy as np
+from core.aggregation import BarAggregator, BarBuffer
+
+
+def reference_bars(timestamps, prices, volumes, seconds):
+    """OHLCV per bucket computed directly from the ticks"""
+    buckets = np.floor(timestamps / seconds).astype(np.int64)
+    bars = []
+    for bucket in np.unique(buckets):
+        mask = buckets == bucket
+        p = prices[mask]
+        bars.append((bucket * seconds, p[0], p.max(), p.min(), p[-1], volumes[mask].sum()))
+    return np.array(bars)
+
+
+class TestBarAggregator(unittest.TestCase):
+    def test_one_minute_ohlcv(self):
+        aggregator = BarAggregator([60])
+        for ts, price in [(0, 10.0), (10, 12.0), (20, 9.0), (59, 11.0)]:
+            self.assertEqual(aggregator.on_tick("AAPL", price, ts, volume=100), [])
+        closed = aggregator.on_tick("AAPL", 11.5, 61)
+        self.assertEqual(closed, [(60, (0.0, 10.0, 12.0, 9.0, 11.0, 400.0))])
+        self.assertEqual(aggregator.current("AAPL", 60), (60.0, 11.5, 11.5, 11.5, 11.5, 0.0))
+
+    def test_cascade_matches_direct_aggregation(self):
+        rng = np.random.default_rng(5)
+        timestamps = np.cumsum(rng.uniform(0.5, 20, 5000))
+        prices = 100 + np.cumsum(rng.normal(0, 0.1, 5000))
+        volumes = rng.integers(1, 500, 5000).astype(float)
+
+        aggregator = BarAggregator([60, 300, 900, 3600])
+        for ts, price, volume in zip(timestamps.tolist(), prices.tolist(), volumes.tolist()):
+            aggregator.on_tick("AAPL", price, ts, volume)
+
+        for seconds in (60, 300, 900, 3600):
+            expected = reference_bars(timestamps, prices, volumes, seconds)[:-1]  # Last is in progress
+            got = aggregator.buffer("AAPL", seconds).window()
+            n = min(len(expected), got.shape[1])
+            np.testing.assert_allclose(got.T[-n:], expected[-n:])
+
+    def test_longer_bars_close_with_the_tick_that_ends_them(self):
+        aggregator = BarAggregator([60, 300])
+        for ts in range(0, 300, 30):
+            aggregator.on_tick("AAPL", 100.0 + ts, ts)
+        closed = aggregator.on_tick("AAPL", 1.0, 301)
+        self.assertEqual([seconds for seconds, _ in closed], [60, 300])
+        self.assertEqual(closed[1][1], (0.0, 100.0, 370.0, 100.0, 370.0, 0.0))
+
+    def test_non_dividing_timeframes_aggregate_from_ticks(self):
+        aggregator = BarAggregator([60, 90])
+        for ts in range(0, 200, 10):
+            aggregator.on_tick("AAPL", float(ts), ts)
+        self.assertEqual(aggregator.bars("AAPL", 90).close.tolist(), [80.0, 170.0])
+        self.assertEqual(aggregator.bars("AAPL", 60).close.tolist(), [50.0, 110.0, 170.0])
+
+    def test_late_ticks_ignored_and_gaps_skipped(self):
+        aggregator = BarAggregator([60])
+        aggregator.on_tick("AAPL", 10.0, 0)
+        aggregator.on_tick("AAPL", 11.0, 600)  # Nothing traded in between
+        aggregator.on_tick("AAPL", 99.0, 30)   # Late
+        aggregator.on_tick("AAPL", 12.0, 660)
+        bars = aggregator.bars("AAPL", 60)
+        self.assertEqual(bars.close.tolist(), [10.0, 11.0])
+        self.assertEqual(bars.timestamp.tolist(), [0, 600 * 10 ** 9])
+
+    def test_timeframe_added_later(self):
+        aggregator = BarAggregator([60])
+        aggregator.on_tick("AAPL", 1.0, 0)
+        aggregator.add_timeframe(300)
+        for ts in range(60, 360, 60):
+            aggregator.on_tick("AAPL", float(ts), ts)
+        self.assertEqual(len(aggregator.bars("AAPL", 300)), 1)
+
+    def test_more_timeframes_do_not_multiply_work(self):
+        ticks = [(float(i), 100.0 + (i % 17)) for i in range(100000)]
+
+        def run(timeframes):
+            aggregator = BarAggregator(timeframes)
+            started = time.perf_counter()
+            for ts, price in ticks:
+                aggregator.on_tick("AAPL", price, ts)
+            return time.perf_counter() - started
+
+        # Aggregating each timeframe from the ticks would take ~4x as long
+        one = min(run([60]) for _ in range(5))
+        four = min(run([60, 300, 900, 3600]) for _ in range(5))
+        self.assertLess(four, one * 2)
+
+
+class TestBarBuffer(unittest.TestCase):
+    def test_window_is_contiguous_view_after_wrap(self):
+        buffer = BarBuffer(capacity=4)
+        for i in range(10):
+            buffer.append((i, i, i, i, float(i), 0))
+        window = buffer.window()
+        self.assertEqual(window[4].tolist(), [6.0, 7.0, 8.0, 9.0])
+        self.assertTrue(np.shares_memory(window, buffer.data))
+        self.assertEqual(buffer.column("close", 2).tolist(), [8.0, 9.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import unittest
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+from core.execution_adapter import (AsyncExecutionAdapter, ThreadedAsyncAdapter, SyncAdapterBridge,
+                                    PaperTradingAdapter, run_sync)
+from core.async_controller import AsyncTradingController
+from core.controller import TradingController
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+
+
+class SlowAdapter(AsyncExecutionAdapter):
+    """Fills after a per-ticker delay; raises for tickers in `broken`"""
+
+    def __init__(self, delays=None, broken=()):
+        self.delays = delays or {}
+        self.broken = set(broken)
+        self.cancelled = []
+
+    async def place_order(self, ticker, quantity, order_type, price=None):
+        try:
+            await asyncio.sleep(self.delays.get(ticker, 0.05))
+        except asyncio.CancelledError:
+            self.cancelled.append(ticker)
+            raise
+        if ticker in self.broken:
+            raise ConnectionError("broker unavailable")
+        return {"order_id": f"T_{ticker}", "ticker": ticker, "quantity": quantity,
+                "executed_price": price, "status": "FILLED", "order_type": order_type}
+
+    async def cancel_order(self, order_id):
+        return True
+
+    async def get_position(self, ticker):
+        return {"quantity": 0, "average_price": 0}
+
+    async def get_account_info(self):
+        return {}
+
+
+def order(ticker, quantity=10, price=100.0):
+    return {"ticker": ticker, "quantity": quantity, "order_type": "MARKET", "price": price}
+
+
+class TestAsyncAdapters(unittest.TestCase):
+    def test_orders_run_concurrently(self):
+        adapter = SlowAdapter()
+        started = time.perf_counter()
+        results = asyncio.run(adapter.place_orders([order(t) for t in "ABCDEFGH"]))
+        self.assertLess(time.perf_counter() - started, 0.2)  # Sequential would be 0.4s
+        self.assertEqual([r['ticker'] for r in results], list("ABCDEFGH"))
+
+    def test_timeout_and_errors_are_per_order(self):
+        adapter = SlowAdapter(delays={"SLOW": 5.0}, broken={"BAD"})
+        results = asyncio.run(adapter.place_orders([order("SLOW"), order("OK"), order("BAD")], timeout=0.2))
+        self.assertEqual([r['status'] for r in results], ["TIMEOUT", "FILLED", "ERROR"])
+        self.assertEqual(adapter.cancelled, ["SLOW"])
+
+    def test_cancelling_caller_cancels_pending_orders(self):
+        adapter = SlowAdapter(delays={"A": 5.0, "B": 5.0})
+
+        async def scenario():
+            task = asyncio.create_task(adapter.place_orders([order("A"), order("B")]))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        self.assertEqual(sorted(adapter.cancelled), ["A", "B"])
+
+    def test_blocking_adapter_does_not_stall_loop(self):
+        class Blocking(PaperTradingAdapter):
+            def place_order(self, *args):
+                time.sleep(0.2)
+                return super().place_order(*args)
+
+        adapter = ThreadedAsyncAdapter(Blocking())
+
+        async def scenario():
+            beats = 0
+            orders = asyncio.create_task(adapter.place_orders([order("A"), order("B")]))
+            while not orders.done():
+                beats += 1
+                await asyncio.sleep(0.01)
+            return beats, await orders
+
+        beats, results = asyncio.run(scenario())
+        self.assertGreater(beats, 10)
+        self.assertEqual([r['status'] for r in results], ["FILLED", "FILLED"])
+
+    def test_sync_bridge_uses_loop_in_other_thread(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            bridge = SyncAdapterBridge(SlowAdapter(), loop, timeout=1.0)
+            result = bridge.place_order("AAPL", 5, "MARKET", 101.0)
+            self.assertEqual(result['status'], "FILLED")
+            self.assertEqual(result['executed_price'], 101.0)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def test_run_sync_without_loop(self):
+        self.assertEqual(run_sync(SlowAdapter().get_position("AAPL"))['quantity'], 0)
+
+
+class TestAsyncController(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+        self.controller = TradingController(self.state, {'mode': 'paper'})
+        self.controller.scheduler.shutdown()
+
+    def tearDown(self):
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_emergency_exit_closes_what_fills(self):
+        self.controller.start_watchlist(["AAPL", "MSFT", "TSLA"])
+        self.state.enter_positions([("AAPL", 100.0, 10), ("MSFT", 300.0, 5), ("TSLA", 200.0, 2)])
+        adapter = SlowAdapter(delays={"AAPL": 0.1, "MSFT": 0.1}, broken={"TSLA"})
+        async_controller = AsyncTradingController(self.controller, adapter, order_timeout=1.0)
+
+        started = time.perf_counter()
+        success, message = asyncio.run(async_controller.emergency_exit())
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        self.assertFalse(success)
+        self.assertIn("TSLA", message)
+        watchlist = self.state.get_state()['watchlist']
+        self.assertIsNone(watchlist['AAPL']['position'])
+        self.assertIsNone(watchlist['MSFT']['position'])
+        self.assertIsNotNone(watchlist['TSLA']['position'])
+        self.assertFalse(self.state.get_state()['strategy_active'])
+        self.assertEqual(self.logger.query_logs(event="ORDER_FAILED")[-1]['ticker'], "TSLA")
+
+    def test_emergency_exit_records_partial_fills(self):
+        paper = self.controller.execution
+        paper.engine.liquidity = 7
+        self.controller.start_watchlist(["AAPL", "MSFT"])
+        self.controller._enter_positions(["AAPL", "MSFT"], [10.0, 20.0])
+
+        paper.engine.liquidity = 5
+        async_controller = AsyncTradingController(self.controller, ThreadedAsyncAdapter(paper))
+        success, message = asyncio.run(async_controller.emergency_exit())
+
+        self.assertFalse(success)
+        watchlist = self.state.get_state()['watchlist']
+        self.assertEqual([watchlist[t]['position']['quantity'] for t in ("AAPL", "MSFT")], [2, 2])
+        self.assertEqual([paper.get_position(t)['quantity'] for t in ("AAPL", "MSFT")], [2, 2])
+        self.assertFalse([o for o in paper.orders.values() if o.working])  # Remainders cancelled
+        failed = self.logger.query_logs(event="ORDER_FAILED")
+        self.assertEqual([(e['ticker'], e['filled_quantity']) for e in failed], [("AAPL", -5), ("MSFT", -5)])
+
+    def test_strategy_cannot_restart_while_exit_orders_are_out(self):
+        self.controller.start_strategy("AAPL")
+        self.state.enter_trade("AAPL", 100.0, 10)
+        async_controller = AsyncTradingController(self.controller, SlowAdapter(delays={"AAPL": 0.2}))
+
+        async def scenario():
+            exit_task = asyncio.create_task(async_controller.emergency_exit())
+            await asyncio.sleep(0.1)
+            rejected = [await async_controller.resume_strategy(),
+                        await async_controller.start_strategy("AAPL")]
+            return rejected, await exit_task
+
+        rejected, (success, _) = asyncio.run(scenario())
+        self.assertEqual(rejected, [(False, "Emergency exit in progress")] * 2)
+        self.assertTrue(success)
+        self.assertEqual(self.controller.resume_strategy(), (True, "Strategy resumed"))
+
+    def test_emergency_exit_single_position(self):
+        self.controller.start_strategy("AAPL")
+        self.state.enter_trade("AAPL", 100.0, 10)
+        async_controller = AsyncTradingController(self.controller, SlowAdapter())
+
+        success, _ = asyncio.run(async_controller.emergency_exit())
+        self.assertTrue(success)
+        self.assertEqual(self.state.get_state()['current_state'], "IDLE")
+        self.assertIsNone(self.state.get_state()['position'])
+
+
+if __name__ == '__main__':
+    unittest.main()
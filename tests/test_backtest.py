@@ -0,0 +1,77 @@
+import unittest
+import math
+import numpy as np
+from core.backtest import Bars, compute_indicators, run_backtest
+from core.conditions import CompiledStrategy
+from core.indicators import IndicatorState
+from core.utils import calculate_position_size
+
+PROFILE = {'stop_loss_pct': 1.0, 'take_profit_pct': 2.0, 'capital_allocation_pct': 5.0}
+
+SCALPING = {
+    "conditions": {
+        "entry": ["price > sma_5", "rsi between 40 and 60"],
+        "exit": ["price < entry_price * 0.995", "price > entry_price * 1.01"]
+    }
+}
+
+
+def reference_backtest(close, volume, strategy, profile, equity=100000.0):
+    """Bar-by-bar replay using the streaming indicators and scalar conditions"""
+    state = IndicatorState()
+    position = None
+    trades = []
+    for i, (price, vol) in enumerate(zip(close, volume)):
+        values = state.update(price, vol)
+        if position:
+            values.update(position)
+            if price <= position['stop_loss'] or price >= position['take_profit'] or \
+                    (values and strategy.should_exit(values)):
+                pnl = (price - position['entry_price']) * position['quantity']
+                equity += pnl
+                trades.append((position['index'], i, pnl))
+                position = None
+        elif values and i < len(close) - 1 and strategy.should_enter(values):
+            quantity = calculate_position_size(equity, price, profile['capital_allocation_pct'])
+            position = {
+                "index": i,
+                "entry_price": price,
+                "quantity": quantity,
+                "stop_loss": price * (1 - profile['stop_loss_pct'] / 100),
+                "take_profit": price * (1 + profile['take_profit_pct'] / 100)
+            }
+    return trades
+
+
+class TestBacktest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.close = np.round(450 * np.exp(np.cumsum(rng.normal(0, 0.002, 3000))), 2)
+        self.volume = rng.integers(1000, 50000, 3000).astype(float)
+
+    def test_indicators_match_streaming(self):
+        vectors = compute_indicators(self.close, self.volume)
+        state = IndicatorState()
+        for i, (price, volume) in enumerate(zip(self.close, self.volume)):
+            values = state.update(price, volume)
+            for key, value in values.items():
+                if math.isnan(value):
+                    self.assertTrue(math.isnan(vectors[key][i]), key)
+                else:
+                    self.assertAlmostEqual(vectors[key][i], value, places=6, msg=key)
+
+    def test_matches_bar_by_bar_replay(self):
+        strategy = CompiledStrategy("scalping", SCALPING)
+        result = run_backtest(Bars(self.close, volume=self.volume), strategy, PROFILE)
+        expected = reference_backtest(self.close, self.volume, strategy, PROFILE)
+
+        self.assertTrue(expected)
+        self.assertEqual(
+            [(t['entry_index'], t['exit_index']) for t in result.trades if t['exit_reason'] != "END_OF_DATA"],
+            [(entry, exit) for entry, exit, _ in expected]
+        )
+        self.assertAlmostEqual(result.equity_curve[expected[-1][1]], 100000.0 + sum(p for _, _, p in expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from core.bar_store import BarStore, BarFile, timeframe_name
+from core.backtest import load_bars
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+from core.controller import TradingController
+
+MINUTE = 60 * 10 ** 9
+
+
+class TestBarStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = BarStore(self.tmpdir)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def append_minutes(self, start, n):
+        ts = np.arange(start, start + n, dtype=np.int64) * MINUTE
+        close = np.arange(start, start + n, dtype=np.float64)
+        self.store.append("AAPL", "1min", ts, close, close + 1, close - 1, close, 100.0)
+
+    def test_append_and_read_across_growth(self):
+        self.append_minutes(0, 1000)
+        before = self.store.read("AAPL", "1min")
+        self.append_minutes(1000, 3000)  # Past the initial capacity
+
+        bars = self.store.read("AAPL", "1min")
+        self.assertEqual(len(bars), 4000)
+        np.testing.assert_array_equal(bars.close, np.arange(4000.0))
+        np.testing.assert_array_equal(bars.high, np.arange(4000.0) + 1)
+        self.assertEqual(bars.volume[-1], 100.0)
+        self.assertEqual(len(before), 1000)  # Old view unaffected by the rewrite
+        self.assertEqual(before.close[-1], 999.0)
+
+    def test_reads_are_memory_mapped(self):
+        self.append_minutes(0, 100)
+        bar_file = self.store.file("AAPL", "1min")
+        bars = bar_file.bars()
+        self.assertTrue(np.shares_memory(bars.close, bar_file._mapping()))
+        self.assertFalse(bars.close.flags.writeable)
+
+    def test_range_lookup_by_timestamp(self):
+        self.append_minutes(0, 500)
+        bars = self.store.read("AAPL", "1min", start=100 * MINUTE, end=110 * MINUTE)
+        self.assertEqual(bars.close.tolist(), list(np.arange(100.0, 110.0)))
+        self.assertEqual(len(self.store.tail("AAPL", "1min", 5)), 5)
+        self.assertEqual(self.store.file("AAPL", "1min").locate(250 * MINUTE + 1), 251)
+
+    def test_rejects_out_of_order_bars(self):
+        self.append_minutes(0, 10)
+        with self.assertRaises(ValueError):
+            self.append_minutes(5, 10)
+        with self.assertRaises(ValueError):
+            self.store.append("AAPL", "1min", [20 * MINUTE, 20 * MINUTE], 1, 1, 1, 1, 0)
+
+    def test_survives_reopen_and_loads_for_backtest(self):
+        self.append_minutes(0, 50)
+        self.store.close()
+        reopened = BarStore(self.tmpdir)
+        self.assertEqual(reopened.count("AAPL", "1min"), 50)
+        self.assertEqual(reopened.count("MSFT", "1min"), 0)
+        reopened.close()
+
+        bars = load_bars(self.store.path("AAPL", "1min"))
+        self.assertEqual(len(bars), 50)
+        self.assertEqual(bars.timestamp[1], MINUTE)
+
+    def test_timeframe_name(self):
+        self.assertEqual([timeframe_name(s) for s in (15, 60, 300, 3600, 86400)],
+                         ["15s", "1min", "5min", "1h", "1d"])
+
+    def test_not_a_bar_file(self):
+        path = os.path.join(self.tmpdir, "junk.bars")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 128)
+        with self.assertRaises(ValueError):
+            BarFile(path)
+
+
+class TestControllerBarHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+        self.config = {'mode': 'paper',
+                       'market_data': {'bar_store': os.path.join(self.tmpdir, "bars")},
+                       'strategies': {'default': {'timeframe': '1min'}}}
+
+    def tearDown(self):
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def controller(self):
+        controller = TradingController(self.state, self.config)
+        controller.scheduler.shutdown()
+        return controller
+
+    def test_history_survives_restart(self):
+        first = self.controller()
+        first.start_strategy("AAPL")
+        for i in range(6):
+            first.on_price("AAPL", 100.0 + i, timestamp=i * 60.0)
+        bars = first.bar_store.read("AAPL", "1min")
+        self.assertEqual(bars.close.tolist(), [100.0, 101.0, 102.0, 103.0, 104.0])
+        self.assertEqual(bars.timestamp[1], 60 * 10 ** 9)  # Stamped with the bar's start
+        first.bar_store.close()
+
+        second = self.controller()
+        second.on_price("AAPL", 110.0, timestamp=600.0)
+        second.on_price("AAPL", 111.0, timestamp=660.0)
+        self.assertEqual(second.price_history["AAPL"].tolist(), [100.0, 101.0, 102.0, 103.0, 104.0, 110.0])
+        second.bar_store.close()
+
+    def feed(self, controller, start, n):
+        controller.start_strategy("AAPL")
+        for i in range(start, start + n + 1):  # The last tick closes the n-th bar
+            controller.on_price("AAPL", 100.0 + (i * 7) % 11, timestamp=i * 60.0)
+
+    def test_indicators_rebuilt_from_stored_bars(self):
+        first = self.controller()
+        self.feed(first, 0, 40)
+        first.bar_store.close()
+
+        second = self.controller()
+        second._load_history("AAPL")
+        restored, expected = second.indicators.get("AAPL"), first.indicators.get("AAPL")
+        self.assertEqual(restored.keys(), expected.keys())
+        for key, value in expected.items():
+            self.assertAlmostEqual(restored[key], value, places=9, msg=key)
+        self.assertEqual(second.price_history["AAPL"].tolist(), first.price_history["AAPL"].tolist())
+        second.bar_store.close()
+
+    def test_indicator_snapshot_restored_unless_stale(self):
+        self.config['market_data']['indicator_snapshot'] = os.path.join(self.tmpdir, "indicators.json")
+        self.config['market_data']['indicator_snapshot_interval'] = 0
+        first = self.controller()
+        self.feed(first, 0, 30)
+        first._monitor_trading()  # Interval elapsed: snapshots
+        self.assertTrue(os.path.exists(self.config['market_data']['indicator_snapshot']))
+        first.save_indicator_snapshot()
+        saved = first.indicators.states["AAPL"].snapshot()
+        first.bar_store.close()
+
+        second = self.controller()
+        second._load_history("AAPL")
+        self.assertEqual(second.indicators.states["AAPL"].snapshot(), saved)
+        self.assertEqual(len(second.indicators.get("AAPL")), len(first.indicators.get("AAPL")))
+
+        # A bar stored after the snapshot makes it stale: rebuild from the store
+        self.feed(second, 31, 1)
+        second.bar_store.close()
+        third = self.controller()
+        third._load_history("AAPL")
+        self.assertEqual(third.price_history["AAPL"].tolist(), second.price_history["AAPL"].tolist())
+        self.assertEqual(third.indicators.states["AAPL"].count, 32)
+        third.bar_store.close()
+
+    def test_watchlist_rows_seeded_after_restart(self):
+        snapshot = self.config['market_data']['indicator_snapshot'] = os.path.join(self.tmpdir, "indicators.json")
+        first = self.controller()
+        first.start_watchlist(["AAPL", "MSFT"])
+        for i in range(41):
+            first._monitor_watchlist(i * 60.0, {"AAPL": 100.0 + (i * 7) % 11, "MSFT": 200.0 + i % 3})
+        first.save_indicator_snapshot()
+        first.bar_store.close()
+        rows = first.price_store.index(["AAPL", "MSFT"])
+        expected = first.price_store.window(rows, 40).tolist()
+
+        for restored_from in ("snapshot", "bar store"):
+            controller = self.controller()
+            controller._monitor_watchlist(41 * 60.0, {"AAPL": 150.0, "MSFT": 250.0})
+            rows = controller.price_store.index(["AAPL", "MSFT"])
+            self.assertEqual(controller.price_store.counts[rows].tolist(), [40, 40], restored_from)
+            self.assertEqual(controller.price_store.window(rows, 40).tolist(), expected, restored_from)
+            restored, saved = controller.indicators.get("MSFT"), first.indicators.get("MSFT")
+            for key, value in saved.items():
+                self.assertAlmostEqual(restored[key], value, places=9, msg=f"{key} from {restored_from}")
+            controller.bar_store.close()
+            if restored_from == "snapshot":
+                os.remove(snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
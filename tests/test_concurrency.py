@@ -0,0 +1,115 @@
+import unittest
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+from core.controller import TradingController
+from core.market_data import ReplayMarketData
+
+
+class TestConcurrentTransitions(unittest.TestCase):
+    """Stress test: the monitor loop racing API commands on one position"""
+
+    TICKS = 2000
+    COMMANDS_PER_THREAD = 250
+    API_THREADS = 4
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+        self.controller = TradingController(self.state, {
+            'mode': 'paper', 'risk_management': {'max_open_positions': 1},
+            'strategies_file': os.path.join(self.tmpdir, "strategies.yaml"),
+            'strategies': {'default': {'conditions': {'entry': ['price < sma_20']}, 'timeframe': '1min'}}})
+        self.controller.scheduler.shutdown(wait=False)
+
+        # Wide independent price swings so entries, stops and targets all fire
+        # often, replayed one per monitor tick on one-minute timestamps
+        rng = random.Random(7)
+        self.controller.market_data = ReplayMarketData(
+            [i * 60.0 for i in range(self.TICKS)], ["AAPL"] * self.TICKS,
+            [round(100 * (1 + rng.gauss(0, 0.02)), 2) for _ in range(self.TICKS)], speed="max")
+
+    def tearDown(self):
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_monitor_racing_api_commands(self):
+        controller = self.controller
+        controller.start_strategy("AAPL")
+        errors = []
+        reads = [0]
+
+        def monitor():
+            # One-minute bars and a tick per minute, so every tick closes a bar
+            for i in range(self.TICKS):
+                controller._monitor_trading(i * 60.0)
+
+        def api(seed):
+            rng = random.Random(seed)
+            commands = [controller.emergency_exit, controller.pause_strategy,
+                        controller.resume_strategy, lambda: controller.start_strategy("AAPL")]
+            # Mostly keep the strategy running so the monitor keeps trading
+            for _ in range(self.COMMANDS_PER_THREAD):
+                rng.choices(commands, weights=[1, 1, 4, 4])[0]()
+                time.sleep(0)
+
+        def reader():
+            # Lock-free reads must always see a consistent snapshot
+            while not done.is_set():
+                snapshot = self.state.get_state()
+                if (snapshot['current_state'] == 'LONG') != (snapshot['position'] is not None):
+                    errors.append(dict(snapshot))
+                    return
+                reads[0] += 1
+
+        def guarded(target, *args):
+            def run():
+                try:
+                    target(*args)
+                except Exception as e:  # Surface thread failures in the test
+                    errors.append(e)
+            return threading.Thread(target=run)
+
+        done = threading.Event()
+        writers = [guarded(monitor)] + [guarded(api, i) for i in range(self.API_THREADS)]
+        readers = [guarded(reader)]
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(reads[0], 0)
+
+        entries = self.logger.query_logs(event="ENTRY")
+        exits = self.logger.query_logs(event="EXIT")
+        self.assertGreater(len(entries), 0)
+        self.assertGreater(len(exits), 0)
+
+        # Every entry is closed at most once; only the final one may still be open
+        final = self.state.get_state()
+        still_open = 1 if final['position'] else 0
+        self.assertEqual(len(entries) - len(exits), still_open)
+
+        # Equity moved by exactly the logged P&L, and the broker agrees on size
+        self.assertAlmostEqual(final['equity'], 100000.0 + sum(e['pnl'] for e in exits), places=6)
+        held = controller.execution.get_position("AAPL")['quantity']
+        self.assertEqual(held, final['position']['quantity'] if still_open else 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
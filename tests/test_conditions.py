@@ -0,0 +1,55 @@
+import unittest
+import os
+import yaml
+from core.conditions import compile_condition, CompiledStrategy
+
+
+class TestConditions(unittest.TestCase):
+    def test_similar_names_do_not_collide(self):
+        condition = compile_condition("ema_10x > ema_10")
+        self.assertTrue(condition({"ema_10": 1.0, "ema_10x": 2.0}))
+        self.assertFalse(condition({"ema_10": 3.0, "ema_10x": 2.0}))
+
+    def test_between(self):
+        condition = compile_condition("rsi between 40 and 60")
+        self.assertTrue(condition({"rsi": 50.0}))
+        self.assertTrue(condition({"rsi": 40.0}))
+        self.assertFalse(condition({"rsi": 65.0}))
+
+    def test_and_or_precedence(self):
+        condition = compile_condition("price < ema_10 OR rsi > 80 AND macd > 0")
+        self.assertTrue(condition({"price": 1, "ema_10": 2, "rsi": 50, "macd": -1}))
+        self.assertFalse(condition({"price": 3, "ema_10": 2, "rsi": 90, "macd": -1}))
+        self.assertTrue(condition({"price": 3, "ema_10": 2, "rsi": 90, "macd": 1}))
+
+    def test_entry_price_arithmetic(self):
+        condition = compile_condition("price < entry_price * 0.995")
+        self.assertTrue(condition({"price": 99.0, "entry_price": 100.0}))
+        self.assertFalse(condition({"price": 99.6, "entry_price": 100.0}))
+
+    def test_missing_values_are_false(self):
+        condition = compile_condition("price > entry_price * 1.01")
+        self.assertFalse(condition({"price": 100.0}))
+        self.assertFalse(condition({"price": 100.0, "entry_price": None}))
+
+    def test_invalid_condition_raises(self):
+        with self.assertRaises(ValueError):
+            compile_condition("price >> 5")
+        with self.assertRaises(ValueError):
+            CompiledStrategy("broken", {"conditions": {"entry": ["rsi between 40"]}})
+
+    def test_config_strategies_compile(self):
+        config_file = os.path.join(os.path.dirname(__file__), "..", "config.yaml")
+        with open(config_file) as f:
+            config = yaml.safe_load(f)
+        for name, strategy in config['strategies'].items():
+            compiled = CompiledStrategy(name, strategy)
+            self.assertTrue(compiled.entry)
+
+        scalping = CompiledStrategy("scalping", config['strategies']['scalping'])
+        self.assertTrue(scalping.should_enter({"price": 101, "sma_5": 100, "rsi": 55}))
+        self.assertTrue(scalping.should_exit({"price": 98, "entry_price": 100}))
+
+
+if __name__ == '__main__':
+    unittest.main()
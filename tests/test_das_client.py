@@ -0,0 +1,318 @@
+import unittest
+import os
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from core.das_client import DASConnection
+from core.execution_adapter import LiveTradingAdapter
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+from core.controller import TradingController
+
+
+class FakeDASServer(socketserver.ThreadingTCPServer):
+    """Local stand-in for the DAS CMD API speaking the same line protocol"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(('127.0.0.1', port), FakeDASHandler)
+        self.port = self.server_address[1]
+        self.prices = {}
+        self.fill_delay = {}          # symbol -> seconds before the fill
+        self.partial = {}             # symbol -> shares filled; the rest stays working
+        self.cancels = 0
+        self.open_orders = {}         # Account-wide: any session may cancel
+        self.status_first = False     # send Executed before the execution line
+        self.mute_heartbeat = False
+        self.positions = {"AAPL": (100, 175.5)}
+        self.logins = 0
+        self.orders = 0
+        self.handlers = []
+        self._ids = iter(range(1000, 10 ** 9))
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def next_id(self) -> int:
+        with self._lock:
+            self.orders += 1
+            return next(self._ids)
+
+    def drop_all(self):
+        for handler in list(self.handlers):
+            handler.drop()
+
+    def stop(self):
+        self.shutdown()
+        self.drop_all()
+        self.server_close()
+
+
+class FakeDASHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.write_lock = threading.Lock()
+        self.open_orders = self.server.open_orders
+        self.server.handlers.append(self)
+
+    def finish(self):
+        self.server.handlers.remove(self)
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def send(self, line: str):
+        with self.write_lock:
+            try:
+                self.wfile.write((line + "\r\n").encode())
+                self.wfile.flush()
+            except (OSError, ValueError):
+                pass
+
+    def drop(self):
+        try:
+            self.request.shutdown(2)
+        except OSError:
+            pass
+
+    def handle(self):
+        server = self.server
+        login = self.rfile.readline().decode().split()
+        if login[1:3] != ["trader", "secret"]:
+            self.send("#LOGIN FAILED invalid credentials")
+            return
+        server.logins += 1
+        self.send("#LOGIN SUCCESSED")
+
+        for raw in self.rfile:
+            fields = raw.decode().split()
+            if not fields:
+                continue
+            if fields[0] == "NEWORDER":
+                self.new_order(*fields[1:7])
+            elif fields[0] == "CANCEL":
+                token, symbol, side, qty = self.open_orders.pop(fields[1])
+                server.cancels += 1
+                self.order_line(fields[1], token, symbol, side, "LMT", qty, 0, "Canceled")
+            elif fields[0] == "ECHO" and not server.mute_heartbeat:
+                self.send(f"#ECHO {fields[1]}")
+            elif fields[0] == "GET" and fields[1] == "POSITIONS":
+                for symbol, (qty, cost) in server.positions.items():
+                    self.send(f"%POS {symbol} 1 {qty} {cost} 0 0")
+                self.send("#POS END")
+            elif fields[0] == "GET" and fields[1] == "BP":
+                self.send("BP 250000.00 100000.00")
+
+    def order_line(self, order_id, token, symbol, side, kind, qty, price, status):
+        self.send(f"%ORDER {order_id} {token} {symbol} {side} {kind} {qty} {qty} 0 {price} SMART {status} 09:30:00")
+
+    def new_order(self, token, side, symbol, route, qty, price):
+        server = self.server
+        order_id = str(server.next_id())
+        if symbol == "BAD":
+            self.order_line(order_id, token, symbol, side, "MKT", qty, 0, "Rejected")
+            return
+        if price != "MKT":
+            self.open_orders[order_id] = (token, symbol, side, qty)
+            self.order_line(order_id, token, symbol, side, "LMT", qty, price, "Accepted")
+            return
+
+        self.order_line(order_id, token, symbol, side, "MKT", qty, 0, "Accepted")
+        fill_price = server.prices.get(symbol, 100.0)
+        if symbol in server.partial:
+            self.open_orders[order_id] = (token, symbol, side, qty)
+            self.send(f"%OrderAct {order_id} Execute {side} {symbol} {server.partial[symbol]} {fill_price} SMART 09:30:01")
+            return
+
+        def fill():
+            executed = f"%OrderAct {order_id} Execute {side} {symbol} {qty} {fill_price} SMART 09:30:01"
+            if server.status_first:
+                self.order_line(order_id, token, symbol, side, "MKT", qty, fill_price, "Executed")
+                self.send(executed)
+            else:
+                self.send(executed)
+                self.order_line(order_id, token, symbol, side, "MKT", qty, fill_price, "Executed")
+
+        # Fills complete out of submission order when delays differ
+        threading.Timer(server.fill_delay.get(symbol, 0.0), fill).start()
+
+
+class TestDASConnection(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeDASServer()
+        self.connections = []
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.close()
+        self.server.stop()
+
+    def connect(self, **kwargs) -> DASConnection:
+        args = dict(host='127.0.0.1', port=self.server.port, username='trader', password='secret',
+                    timeout=1.0, reconnect_delay=0.05)
+        args.update(kwargs)
+        connection = DASConnection(**args)
+        self.connections.append(connection)
+        connection.start()
+        return connection
+
+    def test_bad_login(self):
+        with self.assertRaises(ConnectionError):
+            self.connect(password='wrong')
+
+    def test_pipelined_orders_matched_by_token(self):
+        connection = self.connect()
+        symbols = ["AAPL", "MSFT", "TSLA", "NVDA", "AMD"]
+        for i, symbol in enumerate(symbols):
+            self.server.prices[symbol] = 100.0 + i
+            self.server.fill_delay[symbol] = 0.2 - i * 0.04  # Later orders fill first
+
+        started = time.perf_counter()
+        tickets = [connection.place_order('B', s, 10, 'MKT', 'SMART') for s in symbols]
+        for ticket in tickets:
+            self.assertTrue(ticket.wait(2.0))
+        self.assertLess(time.perf_counter() - started, 0.6)  # One at a time would take ~0.6s
+
+        for i, ticket in enumerate(tickets):
+            self.assertEqual(ticket.status, 'Executed')
+            self.assertEqual(ticket.filled, 10)
+            self.assertAlmostEqual(ticket.average_price, 100.0 + i)
+        self.assertEqual(self.server.logins, 1)
+        self.assertEqual(connection.in_flight, 0)
+
+    def test_fill_after_executed_status(self):
+        self.server.status_first = True
+        connection = self.connect()
+        ticket = connection.place_order('S', 'AAPL', 5, 'MKT', 'SMART')
+        self.assertTrue(ticket.wait(1.0))
+        self.assertEqual(ticket.filled, 5)
+
+    def test_reconnects_after_drop(self):
+        connection = self.connect()
+        self.server.drop_all()
+        time.sleep(0.2)
+        ticket = connection.place_order('B', 'AAPL', 1, 'MKT', 'SMART')
+        self.assertTrue(ticket.wait(1.0))
+        self.assertEqual(ticket.status, 'Executed')
+        self.assertEqual(connection.connects, 2)
+
+    def test_missed_heartbeat_forces_reconnect(self):
+        connection = self.connect(heartbeat_interval=0.05, timeout=0.1)
+        self.server.mute_heartbeat = True
+        time.sleep(0.4)
+        self.server.mute_heartbeat = False
+        time.sleep(0.3)
+        self.assertGreater(connection.connects, 1)
+        self.assertTrue(connection.connected)
+
+    def test_pending_order_fails_on_disconnect(self):
+        connection = self.connect()
+        self.server.fill_delay['AAPL'] = 5.0
+        ticket = connection.place_order('B', 'AAPL', 1, 'MKT', 'SMART')
+        self.assertTrue(ticket.wait(1.0, terminal=False))
+        self.server.drop_all()
+        self.assertTrue(ticket.wait(1.0))
+        self.assertIsNotNone(ticket.error)
+
+
+class TestLiveTradingAdapter(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeDASServer()
+        self.adapter = LiveTradingAdapter({
+            'host': '127.0.0.1', 'port': self.server.port, 'username': 'trader',
+            'password': 'secret', 'pool_size': 2, 'order_timeout': 1.0, 'connect_timeout': 1.0})
+
+    def tearDown(self):
+        self.adapter.close()
+        self.server.stop()
+
+    def test_market_order_fills(self):
+        self.server.prices['AAPL'] = 175.25
+        result = self.adapter.place_order('AAPL', 10, "MARKET", 175.0)
+        self.assertEqual(result['status'], "FILLED")
+        self.assertEqual(result['executed_price'], 175.25)
+        sell = self.adapter.place_order('AAPL', -10, "MARKET", 175.0)
+        self.assertEqual(sell['filled_quantity'], -10)
+
+    def test_limit_order_acknowledged_and_cancelled(self):
+        result = self.adapter.place_order('AAPL', 10, "LIMIT", 170.0)
+        self.assertEqual(result['status'], "SUBMITTED")
+        self.assertTrue(self.adapter.cancel_order(result['order_id']))
+
+    def test_rejected(self):
+        self.assertEqual(self.adapter.place_order('BAD', 1, "MARKET")['status'], "REJECTED")
+
+    def test_account_queries(self):
+        self.assertEqual(self.adapter.get_position('AAPL'), {"quantity": 100, "average_price": 175.5})
+        self.assertEqual(self.adapter.get_position('MSFT')['quantity'], 0)
+        self.assertEqual(self.adapter.get_account_info()['buying_power'], 250000.0)
+
+    def test_partial_fill_at_timeout_is_reported(self):
+        self.adapter.order_timeout = 0.2
+        self.server.partial['AAPL'] = 4
+        result = self.adapter.place_order('AAPL', -10, "MARKET", 175.0)
+        self.assertEqual((result['status'], result['filled_quantity']), ("PARTIALLY_FILLED", -4))
+
+    def test_controller_records_partial_fill_and_cancels_rest(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        logger = TradeLogger(os.path.join(tmpdir, "trade_log.jsonl"))
+        profile_manager = ProfileManager(os.path.join(tmpdir, "profiles.db"))
+        state = TradingState(logger, profile_manager, state_file=os.path.join(tmpdir, "state.json"))
+        self.addCleanup(profile_manager.close)
+        self.addCleanup(logger.close)
+        self.addCleanup(state.close)
+        controller = TradingController(state, {'mode': 'live', 'das_api_config': self.adapter.api_config})
+        controller.scheduler.shutdown()
+        self.addCleanup(controller.execution.close)
+        controller.execution.order_timeout = 0.2
+
+        self.server.partial['AAPL'] = 4
+        controller.start_strategy("AAPL")
+        controller._enter_trade("AAPL", 100.0)
+        self.assertEqual(state.get_state()['position']['quantity'], 4)
+        deadline = time.monotonic() + 2
+        while self.server.cancels < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.server.cancels, 1)
+
+    def test_one_pool_reconnects_while_das_is_down(self):
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+        probe.close()  # Nothing listens here yet
+        adapter = LiveTradingAdapter({
+            'host': '127.0.0.1', 'port': port, 'username': 'trader', 'password': 'secret',
+            'pool_size': 2, 'order_timeout': 1.0, 'connect_timeout': 0.3})
+        self.addCleanup(adapter.close)
+
+        with self.assertRaises(ConnectionError):
+            adapter.place_order('AAPL', 1, "MARKET")
+        pool, threads = adapter._pool, threading.active_count()
+        with self.assertRaises(ConnectionError):
+            adapter.place_order('AAPL', 1, "MARKET")
+        self.assertIs(adapter._pool, pool)
+        self.assertEqual(threading.active_count(), threads)
+
+        server = FakeDASServer(port)
+        self.addCleanup(server.stop)
+        deadline = time.monotonic() + 5
+        while not any(c.connected for c in pool.connections) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(adapter.place_order('AAPL', 1, "MARKET")['status'], "FILLED")
+
+    def test_sessions_are_reused(self):
+        for _ in range(20):
+            self.adapter.place_order('AAPL', 1, "MARKET")
+        self.assertEqual(self.server.logins, 2)  # pool_size sessions, not one per order
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import asyncio
+import json
+import threading
+from core.events import EventBroadcaster
+
+
+class TestEventBroadcaster(unittest.TestCase):
+    def test_publish_without_subscribers_is_noop(self):
+        events = EventBroadcaster()
+        events.publish("state", {"equity": object()})  # Never serialized
+        self.assertFalse(events.has_subscribers)
+
+    def test_fan_out_from_other_thread(self):
+        events = EventBroadcaster()
+
+        async def scenario():
+            first, second = events.subscribe(), events.subscribe()
+            thread = threading.Thread(target=events.publish, args=("state", {"equity": 101.5}))
+            thread.start()
+            thread.join()
+            events.publish_raw("log", '{"event": "ENTRY"}')
+            return [await first.get(), await first.get(), await second.get()]
+
+        state_msg, log_msg, other = asyncio.run(scenario())
+        self.assertEqual(json.loads(state_msg), {"type": "state", "data": {"equity": 101.5}})
+        self.assertEqual(json.loads(log_msg), {"type": "log", "data": {"event": "ENTRY"}})
+        self.assertIs(state_msg, other)  # Serialized once, shared by all subscribers
+
+    def test_slow_subscriber_dropped(self):
+        events = EventBroadcaster(max_queue=2)
+
+        async def scenario():
+            queue = events.subscribe()
+            for i in range(3):
+                events.publish("log", {"i": i})
+            await asyncio.sleep(0)
+            return queue
+
+        queue = asyncio.run(scenario())
+        self.assertFalse(events.has_subscribers)
+        self.assertIsNone(queue.get_nowait())
+
+
+if __name__ == '__main__':
+    unittest.main()
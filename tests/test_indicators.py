@@ -0,0 +1,127 @@
+import unittest
+import json
+import math
+import random
+import numpy as np
+import pandas as pd
+import ta
+from core.indicators import IndicatorEngine, IndicatorState
+from core.strategy import StrategyEngine
+
+
+def reference_indicators(price_data, volume_data):
+    """Indicators computed the original way, with pandas and ta"""
+    prices = pd.Series(price_data)
+    volumes = pd.Series(volume_data)
+    return {
+        'sma_5': ta.trend.sma_indicator(prices, window=5).iloc[-1],
+        'sma_10': ta.trend.sma_indicator(prices, window=10).iloc[-1],
+        'sma_20': ta.trend.sma_indicator(prices, window=20).iloc[-1],
+        'ema_10': ta.trend.ema_indicator(prices, window=10).iloc[-1],
+        'ema_20': ta.trend.ema_indicator(prices, window=20).iloc[-1],
+        'rsi': ta.momentum.rsi(prices, window=14).iloc[-1],
+        'macd': ta.trend.macd(prices).iloc[-1],
+        'macd_signal': ta.trend.macd_signal(prices).iloc[-1],
+        'bb_upper': ta.volatility.bollinger_hband(prices).iloc[-1],
+        'bb_lower': ta.volatility.bollinger_lband(prices).iloc[-1],
+        'bb_middle': ta.volatility.bollinger_mavg(prices).iloc[-1],
+        'volume_sma_20': ta.trend.sma_indicator(volumes, window=20).iloc[-1],
+        'resistance': max(price_data[-20:]),
+        'support': min(price_data[-20:])
+    }
+
+
+class TestIndicators(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        price = 450.0
+        self.prices = []
+        self.volumes = []
+        for _ in range(300):
+            price *= 1 + rng.gauss(0, 0.002)
+            self.prices.append(round(price, 2))
+            self.volumes.append(float(rng.randint(1000, 50000)))
+
+    def assertMatches(self, actual, expected):
+        for key, value in expected.items():
+            if math.isnan(value):
+                self.assertTrue(math.isnan(actual[key]), key)
+            else:
+                self.assertAlmostEqual(actual[key], value, places=6, msg=key)
+
+    def test_streaming_matches_ta(self):
+        engine = IndicatorEngine()
+        for i, (price, volume) in enumerate(zip(self.prices, self.volumes)):
+            values = engine.update("SPY", price, volume)
+            if i + 1 < 20:
+                self.assertEqual(values, {})
+            elif i + 1 in (20, 30, 34, 50, 300):
+                expected = reference_indicators(self.prices[:i + 1], self.volumes[:i + 1])
+                self.assertMatches(values, expected)
+
+    def test_tickers_are_independent(self):
+        engine = IndicatorEngine()
+        for price, volume in zip(self.prices, self.volumes):
+            engine.update("SPY", price, volume)
+            engine.update("AAPL", price * 0.5, volume)
+        self.assertAlmostEqual(engine.get("AAPL")['sma_20'] * 2, engine.get("SPY")['sma_20'])
+
+    def test_vectorized_warm_up_matches_streaming(self):
+        for n in (5, 20, 26, 34, 300):
+            streamed = IndicatorState()
+            for price, volume in zip(self.prices[:n], self.volumes[:n]):
+                streamed.update(price, volume)
+            warmed = IndicatorState.from_history(self.prices[:n], self.volumes[:n])
+            self.assertEqual(warmed.count, n)
+            self.assertMatches(warmed.values(), streamed.values())
+            # Both keep producing the same values afterwards
+            self.assertMatches(warmed.update(451.0, 1000.0), streamed.update(451.0, 1000.0))
+
+    def test_snapshot_round_trip(self):
+        engine = IndicatorEngine()
+        for price, volume in zip(self.prices[:100], self.volumes[:100]):
+            engine.update("SPY", price, volume)
+        restored = IndicatorEngine()
+        restored.restore(json.loads(json.dumps(engine.snapshot())))
+        for price, volume in zip(self.prices[100:], self.volumes[100:]):
+            self.assertEqual(restored.update("SPY", price, volume), engine.update("SPY", price, volume))
+
+
+class TestBatchedIndicators(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.prices = 100 * np.cumprod(1 + rng.normal(0, 0.004, (60, 50)), axis=1)
+        self.volumes = rng.integers(1000, 50000, (60, 50)).astype(float)
+        self.engine = StrategyEngine(config_file="missing-strategies.yaml")
+
+    def test_rows_match_calculate_indicators(self):
+        batch = self.engine.calculate_indicators_batch(self.prices, self.volumes)
+        for i in (0, 17, 59):
+            expected = self.engine.calculate_indicators(self.prices[i].tolist(), self.volumes[i].tolist())
+            for key, value in expected.items():
+                if math.isnan(value):
+                    self.assertTrue(math.isnan(batch[key][i]), key)
+                else:
+                    self.assertAlmostEqual(batch[key][i], value, places=6, msg=key)
+
+    def test_short_windows_have_no_indicators(self):
+        self.assertEqual(self.engine.calculate_indicators_batch(self.prices[:, :19]), {})
+
+    def test_condition_masks_match_per_ticker_evaluation(self):
+        batch = self.engine.calculate_indicators_batch(self.prices, self.volumes)
+        masks = self.engine.evaluate_conditions_batch("default", batch)
+        self.assertTrue(masks["entry"].any() and not masks["entry"].all())
+        for i in range(len(self.prices)):
+            row = {key: float(values[i]) for key, values in batch.items()}
+            self.assertEqual(self.engine.evaluate_conditions("default", row),
+                             {"entry": bool(masks["entry"][i]), "exit": bool(masks["exit"][i])})
+
+    def test_unknown_strategy_gives_empty_masks(self):
+        batch = self.engine.calculate_indicators_batch(self.prices)
+        masks = self.engine.evaluate_conditions_batch("nope", batch)
+        self.assertFalse(masks["entry"].any() or masks["exit"].any())
+        self.assertEqual(masks["entry"].shape, (60,))
+
+
+if __name__ == '__main__':
+    unittest.main()
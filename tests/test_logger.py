@@ -0,0 +1,145 @@
+import unittest
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from core.logger import TradeLogger
+
+
+class TestTradeLogger(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.tmpdir, "logs", "trade_log.jsonl")
+        self.start = datetime(2025, 1, 2, 9, 30)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def write_entries(self, logger, count):
+        for i in range(count):
+            logger.log({
+                "timestamp": (self.start + timedelta(minutes=i)).isoformat(),
+                "event": "ENTRY" if i % 3 == 0 else "STATE_CHANGE",
+                "seq": i
+            })
+
+    def test_recent_logs_tail(self):
+        logger = TradeLogger(self.log_file)
+        self.write_entries(logger, 5000)
+        logs = logger.get_recent_logs(100)
+        self.assertEqual([log['seq'] for log in logs], list(range(4900, 5000)))
+        self.assertEqual(len(logger.get_recent_logs(10000)), 5000)
+        self.assertEqual(logger.get_recent_logs(0), [])
+
+    def test_query_by_event_and_time(self):
+        logger = TradeLogger(self.log_file)
+        self.write_entries(logger, 300)
+        logs = logger.query_logs(event="ENTRY",
+                                 start=self.start + timedelta(minutes=30),
+                                 end=self.start + timedelta(minutes=60))
+        self.assertEqual([log['seq'] for log in logs], list(range(30, 60, 3)))
+        self.assertEqual([log['seq'] for log in logger.query_logs(event="ENTRY", limit=2)], [294, 297])
+
+    def test_index_rebuilt_for_existing_log(self):
+        os.makedirs(os.path.dirname(self.log_file))
+        with open(self.log_file, 'w') as f:
+            for i in range(10):
+                f.write(json.dumps({"timestamp": self.start.isoformat(), "event": "EXIT", "seq": i}) + '\n')
+        logger = TradeLogger(self.log_file)
+        self.write_entries(logger, 3)
+        self.assertEqual(len(logger.query_logs(event="EXIT")), 10)
+        self.assertEqual(len(logger.query_logs()), 13)
+
+    def test_buffered_writes_from_many_threads(self):
+        logger = TradeLogger(self.log_file, flush_interval=0.01)
+
+        def writer(n):
+            for i in range(500):
+                logger.log({"event": "STATE_CHANGE", "writer": n, "seq": i})
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        logger.flush()
+        with open(self.log_file) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 2000)
+        for n in range(4):
+            self.assertEqual([e['seq'] for e in entries if e['writer'] == n], list(range(500)))
+        self.assertEqual(len(logger.query_logs(event="STATE_CHANGE")), 2000)
+
+        logger.log({"event": "EXIT"})
+        logger.close()
+        self.assertEqual(TradeLogger(self.log_file, buffered=False).get_recent_logs(1)[0]['event'], "EXIT")
+
+    def test_rotation_spans_segments(self):
+        logger = TradeLogger(self.log_file, buffered=False, max_bytes=4096, max_files=3)
+        self.write_entries(logger, 200)
+        logger.close()
+
+        names = sorted(os.listdir(os.path.dirname(self.log_file)))
+        segments = [name for name in names if name.endswith('.gz')]
+        self.assertEqual(len(segments), 2)
+        self.assertFalse([name for name in names if name[-1].isdigit()])  # All compressed
+
+        logs = logger.get_recent_logs(150)
+        seqs = [log['seq'] for log in logs]
+        self.assertEqual(seqs, list(range(seqs[0], 200)))
+        self.assertGreater(len(logs), 100)
+
+        entries = logger.query_logs(event="ENTRY")
+        self.assertEqual(entries[-1]['seq'], 198)
+        self.assertEqual([e['seq'] for e in entries], list(range(entries[0]['seq'], 200, 3)))
+        self.assertEqual(len(logger.query_logs(event="ENTRY", limit=30)), 30)
+
+    def test_rotation_splits_a_batch(self):
+        logger = TradeLogger(self.log_file, flush_interval=1.0, max_bytes=4096)
+        self.write_entries(logger, 200)  # All in one group commit
+        logger.close()
+
+        log_dir = os.path.dirname(self.log_file)
+        segments = sorted(name for name in os.listdir(log_dir) if name.endswith('.gz'))
+        self.assertGreater(len(segments), 1)
+        for name in segments:
+            with gzip.open(os.path.join(log_dir, name)) as f:
+                self.assertLess(len(f.read()), 4096 + 100)  # Over by at most one entry
+        self.assertEqual([log['seq'] for log in logger.get_recent_logs(200)], list(range(200)))
+
+    def test_recent_logs_from_segment_tails(self):
+        logger = TradeLogger(self.log_file, buffered=False, max_bytes=4096)
+        self.write_entries(logger, 300)
+        logger.close()
+
+        expected = list(range(200, 300))
+        self.assertEqual([log['seq'] for log in logger.get_recent_logs(100)], expected)
+        # Without sidecar indexes compressed segments are streamed instead
+        log_dir = os.path.dirname(self.log_file)
+        for name in os.listdir(log_dir):
+            if name.endswith('.gz'):
+                os.remove(os.path.join(log_dir, name[:-3] + '.idx'))
+        self.assertEqual([log['seq'] for log in logger.get_recent_logs(100)], expected)
+
+    def test_retention_counts_uncompressed_segments(self):
+        class UncompressedLogger(TradeLogger):
+            def _start_compression(self, seq):
+                pass  # As if every compression failed
+
+        logger = UncompressedLogger(self.log_file, buffered=False, max_bytes=4096, max_files=3)
+        self.write_entries(logger, 200)
+        logger.close()
+
+        names = os.listdir(os.path.dirname(self.log_file))
+        self.assertEqual(len([name for name in names if name[-1].isdigit()]), 2)
+        self.assertEqual(len([name for name in names if name.endswith('.idx')]), 3)
+        seqs = [log['seq'] for log in logger.get_recent_logs(60)]
+        self.assertEqual(seqs, list(range(140, 200)))
+
+
+if __name__ == '__main__':
+    unittest.main()
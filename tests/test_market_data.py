@@ -0,0 +1,148 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from core.market_data import SimulatedMarketData, ReplayMarketData, create_market_data
+from core.execution_adapter import PaperTradingAdapter
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+from core.controller import TradingController
+
+
+class TestSimulatedMarketData(unittest.TestCase):
+    def test_seeded_paths_repeat(self):
+        a = SimulatedMarketData(seed=1).generate(["AAPL", "MSFT", "XYZ"], 500)
+        b = SimulatedMarketData(seed=1).generate(["AAPL", "MSFT", "XYZ"], 500)
+        self.assertEqual(a.shape, (500, 3))
+        np.testing.assert_array_equal(a, b)
+
+    def test_poll_continues_path(self):
+        feed = SimulatedMarketData(seed=3)
+        self.assertEqual(feed.latest("AAPL"), 175.0)
+        _, prices = feed.poll(["AAPL", "NEW"], now=10.0)
+        self.assertEqual(feed.latest("AAPL"), prices[0])
+        self.assertEqual(feed.latest("NEW"), prices[1])
+
+    def test_moves_scale_with_poll_interval(self):
+        # Five minutes of 0.5 s polls is 600 steps: a fraction of a day's move
+        feed = create_market_data({'seed': 1, 'update_interval': 0.5})
+        for i in range(600):
+            _, prices = feed.poll(["AAPL", "TSLA"], now=i * 0.5)
+        np.testing.assert_allclose(prices, [175.0, 240.0], rtol=0.05)
+
+        # A whole session of steps moves about as much as a day, at any interval
+        for interval in (0.5, 60):
+            feed = SimulatedMarketData(seed=2, interval=interval, trend_range=0.0,
+                                       volatility_range=(0.02, 0.02))
+            steps = int(feed.steps_per_day)
+            closes = np.stack([feed.generate(["AAPL"], steps)[-1, 0] for _ in range(200)])
+            daily = np.diff(np.log(np.concatenate([[175.0], closes])))
+            self.assertAlmostEqual(daily.std(), 0.02, delta=0.004)
+
+
+class TestReplayMarketData(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "ticks.csv")
+        with open(self.path, "w") as f:
+            f.write("timestamp,ticker,price\n")
+            for i in range(10):
+                f.write(f"{i},AAPL,{100 + i}\n")
+                if i % 2 == 0:
+                    f.write(f"{i},MSFT,{300 + i}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_max_speed_steps_through_recording(self):
+        feed = ReplayMarketData.from_path(self.path, speed="max")
+        seen = [feed.poll(["AAPL", "MSFT"])[1].tolist() for _ in range(3)]
+        self.assertEqual(seen, [[100, 300], [101, 300], [102, 302]])
+        for _ in range(20):
+            feed.poll(["AAPL"])
+        self.assertTrue(feed.finished)
+        self.assertEqual(feed.latest("AAPL"), 109)  # Holds the last price
+
+    def test_speed_maps_wall_time(self):
+        feed = ReplayMarketData.from_path(self.path, speed=4)
+        self.assertEqual(feed.poll(["AAPL"], now=1000.0), (0.0, np.array([100.0])))
+        timestamp, prices = feed.poll(["AAPL", "TSLA"], now=1001.0)
+        self.assertEqual(timestamp, 4.0)
+        self.assertEqual(prices[0], 104.0)
+        self.assertTrue(np.isnan(prices[1]))
+
+    def test_play_is_deterministic_and_paced(self):
+        feed = ReplayMarketData.from_path(self.path)
+        ticks = []
+        self.assertEqual(feed.play(["AAPL", "MSFT"], lambda *tick: ticks.append(tick)), 15)
+        self.assertEqual(ticks[:3], [("AAPL", 100.0, 0.0), ("MSFT", 300.0, 0.0), ("AAPL", 101.0, 1.0)])
+
+        started = time.perf_counter()
+        feed.play(["AAPL"], lambda *tick: None, speed=30)  # 9 seconds of data
+        self.assertAlmostEqual(time.perf_counter() - started, 0.3, delta=0.1)
+
+    def test_directory_of_per_ticker_files(self):
+        data = os.path.join(self.tmpdir, "bars")
+        os.mkdir(data)
+        for ticker, base in (("AAPL", 100), ("SPY", 450)):
+            with open(os.path.join(data, f"{ticker}.csv"), "w") as f:
+                f.write("timestamp,open,high,low,close,volume\n")
+                for i in range(3):
+                    f.write(f"2024-01-02 09:3{i}:00,{base},{base + 1},{base - 1},{base + i},1000\n")
+        feed = create_market_data({'source': 'replay', 'replay': {'path': data, 'speed': 'max'}})
+        feed.poll(["AAPL", "SPY"])
+        timestamp, prices = feed.poll(["AAPL", "SPY"])
+        self.assertEqual(prices.tolist(), [101.0, 451.0])
+        self.assertEqual(timestamp, 1704187860.0)
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            create_market_data({'source': 'carrier-pigeon'})
+
+
+class TestSharedFeed(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+
+        path = os.path.join(self.tmpdir, "ticks.csv")
+        with open(path, "w") as f:
+            f.write("timestamp,ticker,price\n")
+            for i, price in enumerate([100, 101, 99, 90, 95]):
+                f.write(f"{i * 60},AAPL,{price}\n")
+        self.controller = TradingController(self.state, {
+            'mode': 'paper',
+            'market_data': {'source': 'replay', 'replay': {'path': path, 'speed': 'max'}}})
+        self.controller.scheduler.shutdown()
+
+    def tearDown(self):
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_controller_and_paper_adapter_see_same_prices(self):
+        adapter = self.controller.execution
+        self.assertIsInstance(adapter, PaperTradingAdapter)
+        self.controller.start_strategy("AAPL")
+        resting = adapter.place_order("AAPL", 10, "LIMIT", 95.0)
+
+        prices = []
+        for _ in range(4):
+            self.controller._monitor_trading()
+            prices.append(adapter.engine.book("AAPL").last)
+        self.assertEqual(prices, [100.0, 101.0, 99.0, 90.0])
+        # Every tick closes the one-minute bar before it
+        self.assertEqual(self.controller.price_history["AAPL"].tolist(), [100.0, 101.0, 99.0])
+        self.assertEqual(adapter.get_order(resting['order_id'])['status'], "FILLED")
+        self.assertEqual(adapter.engine.clock, 180.0)  # Recorded time, not wall time
+
+
+if __name__ == '__main__':
+    unittest.main()
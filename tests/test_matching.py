@@ -0,0 +1,194 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from core.matching import MatchingEngine, SlippageModel, LatencyModel
+from core.execution_adapter import PaperTradingAdapter
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+from core.controller import TradingController
+
+
+class TestMatchingEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = MatchingEngine()
+        self.engine.on_quote("AAPL", 100.0, timestamp=0.0)
+
+    def test_market_order_fills_at_touch(self):
+        engine = MatchingEngine(spread_bps=10)
+        engine.on_quote("AAPL", 100.0)
+        buy = engine.submit("AAPL", 10)
+        sell = engine.submit("AAPL", -10)
+        self.assertEqual(buy.status, "FILLED")
+        self.assertAlmostEqual(buy.average_price, 100.05)  # Pays the ask
+        self.assertAlmostEqual(sell.average_price, 99.95)  # Hits the bid
+
+    def test_limit_waits_for_price(self):
+        order = self.engine.submit("AAPL", 10, "LIMIT", 99.0)
+        self.assertEqual(order.status, "SUBMITTED")
+        self.engine.on_quote("AAPL", 99.5, timestamp=1.0)
+        self.assertEqual(order.status, "SUBMITTED")
+        self.engine.on_quote("AAPL", 98.5, timestamp=2.0)
+        self.assertEqual(order.status, "FILLED")
+        self.assertEqual(order.average_price, 98.5)
+
+    def test_price_time_priority(self):
+        engine = MatchingEngine(liquidity=10)
+        engine.on_quote("AAPL", 100.0)
+        first = engine.submit("AAPL", 10, "LIMIT", 99.0)
+        second = engine.submit("AAPL", 10, "LIMIT", 99.0)
+        better = engine.submit("AAPL", 10, "LIMIT", 99.5)
+
+        engine.on_quote("AAPL", 98.0)
+        self.assertEqual([o.status for o in (better, first, second)], ["FILLED", "SUBMITTED", "SUBMITTED"])
+        self.assertEqual(better.average_price, 98.0)
+        engine.on_quote("AAPL", 98.0)
+        self.assertEqual([first.status, second.status], ["FILLED", "SUBMITTED"])
+
+    def test_partial_fills_across_quotes(self):
+        engine = MatchingEngine(liquidity=300)
+        engine.on_quote("AAPL", 100.0)
+        order = engine.submit("AAPL", 1000)
+        self.assertEqual((order.status, order.filled), ("PARTIALLY_FILLED", 300))
+        engine.on_quote("AAPL", 101.0)
+        engine.on_quote("AAPL", 102.0, size=1000)
+        self.assertEqual(order.status, "FILLED")
+        self.assertAlmostEqual(order.average_price, (300 * 100 + 300 * 101 + 400 * 102) / 1000)
+
+    def test_stop_triggers_market_order(self):
+        stop = self.engine.submit("AAPL", -10, "STOP", 95.0)
+        self.engine.on_quote("AAPL", 96.0, timestamp=1.0)
+        self.assertEqual(stop.status, "SUBMITTED")
+        self.engine.on_quote("AAPL", 94.0, timestamp=2.0)  # Gapped through the stop
+        self.assertEqual(stop.status, "FILLED")
+        self.assertEqual(stop.average_price, 94.0)
+
+    def test_cancel_removes_working_order(self):
+        order = self.engine.submit("AAPL", 10, "LIMIT", 90.0)
+        self.assertTrue(self.engine.cancel(order.order_id))
+        self.engine.on_quote("AAPL", 85.0, timestamp=1.0)
+        self.assertEqual((order.status, order.filled), ("CANCELLED", 0))
+        self.assertFalse(self.engine.cancel(order.order_id))
+
+    def test_slippage_grows_with_size(self):
+        engine = MatchingEngine(slippage=SlippageModel(bps=1, impact_bps=10, depth=1000))
+        engine.on_quote("AAPL", 100.0)
+        small = engine.submit("AAPL", 100)
+        large = engine.submit("AAPL", 1000)
+        self.assertAlmostEqual(small.average_price, 100.0 * (1 + 2 / 10000))
+        self.assertAlmostEqual(large.average_price, 100.0 * (1 + 11 / 10000))
+
+    def test_latency_fills_at_price_on_arrival(self):
+        engine = MatchingEngine(latency=LatencyModel(mean_ms=50))
+        engine.on_quote("AAPL", 100.0, timestamp=0.0)
+        order = engine.submit("AAPL", 10)
+        self.assertEqual(order.status, "SUBMITTED")
+        engine.on_quote("AAPL", 101.0, timestamp=0.03)
+        engine.on_quote("AAPL", 102.0, timestamp=0.06)  # Arrived at 0.05, saw the 0.03 quote
+        self.assertEqual(order.average_price, 101.0)
+
+    def test_rejects_invalid_orders(self):
+        self.assertEqual(self.engine.submit("AAPL", 10, "LIMIT").status, "REJECTED")
+        self.assertEqual(self.engine.submit("AAPL", 0).status, "REJECTED")
+
+    def test_throughput(self):
+        engine = MatchingEngine(liquidity=500)
+        engine.on_quote("AAPL", 100.0)
+        n = 50000
+        started = time.perf_counter()
+        for i in range(n):
+            side = 1 if i % 2 else -1
+            engine.submit("AAPL", side * 100, "LIMIT", 100.0 - side * (i % 50) * 0.01)
+            if i % 10 == 0:
+                engine.on_quote("AAPL", 100.0 + (i % 7 - 3) * 0.1)
+        rate = n / (time.perf_counter() - started)
+        self.assertGreater(rate, 20000)
+
+
+class TestPaperTradingAdapter(unittest.TestCase):
+    def test_average_price_and_pnl(self):
+        adapter = PaperTradingAdapter(initial_equity=10000.0)
+        adapter.place_order("AAPL", 10, "MARKET", 100.0)
+        adapter.place_order("AAPL", 10, "MARKET", 110.0)
+        self.assertEqual(adapter.get_position("AAPL"), {'quantity': 20, 'average_price': 105.0})
+
+        result = adapter.place_order("AAPL", -5, "MARKET", 115.0)
+        self.assertEqual((result['status'], result['filled_quantity']), ("FILLED", -5))
+        self.assertEqual(adapter.get_position("AAPL")['average_price'], 105.0)
+        adapter.place_order("AAPL", -15, "MARKET", 100.0)
+        self.assertEqual(adapter.get_position("AAPL")['quantity'], 0)
+        self.assertAlmostEqual(adapter.get_account_info()['realized_pnl'], 50.0 - 75.0)
+        self.assertAlmostEqual(adapter.equity, 10000.0 - 25.0)
+
+    def test_resting_order_fills_on_price_feed(self):
+        adapter = PaperTradingAdapter()
+        result = adapter.place_order("MSFT", 10, "LIMIT", 360.0)
+        self.assertEqual(result['status'], "SUBMITTED")
+        adapter.on_price("MSFT", 359.0)
+        self.assertEqual(adapter.get_order(result['order_id'])['status'], "FILLED")
+        self.assertEqual(adapter.get_position("MSFT")['quantity'], 10)
+
+    def test_from_config(self):
+        adapter = PaperTradingAdapter.from_config({'spread_bps': 20, 'liquidity': 5, 'initial_equity': 5000})
+        result = adapter.place_order("AAPL", 10, "MARKET", 100.0)
+        self.assertEqual((result['status'], result['filled_quantity']), ("PARTIALLY_FILLED", 5))
+        self.assertAlmostEqual(result['executed_price'], 100.1)
+        self.assertEqual(adapter.equity, 5000)
+
+
+class TestControllerPartialFills(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+        self.controller = TradingController(self.state, {
+            'mode': 'paper', 'paper_trading': {'liquidity': 7}})
+        self.controller.scheduler.shutdown()
+        self.adapter = self.controller.execution
+
+    def tearDown(self):
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def assertInSync(self, ticker, quantity):
+        self.assertEqual(self.adapter.get_position(ticker)['quantity'], quantity)
+        self.assertFalse([o for o in self.adapter.orders.values() if o.working])
+
+    def test_single_ticker_records_what_filled(self):
+        self.controller.start_strategy("AAPL")
+        self.controller._enter_trade("AAPL", 100.0)
+        self.assertEqual(self.state.get_state()['position']['quantity'], 7)
+        self.assertInSync("AAPL", 7)
+
+        self.adapter.engine.liquidity = 4
+        self.controller._exit_trade(101.0, "TAKE_PROFIT")
+        state = self.state.get_state()
+        self.assertEqual((state['current_state'], state['position']['quantity']), ("LONG", 3))
+        self.assertInSync("AAPL", 3)
+
+        self.controller._exit_trade(101.0, "TAKE_PROFIT")
+        self.assertIsNone(self.state.get_state()['position'])
+        self.assertInSync("AAPL", 0)
+
+    def test_watchlist_and_emergency_exit_record_what_filled(self):
+        self.controller.start_watchlist(["AAPL", "MSFT"])
+        self.controller._enter_positions(["AAPL", "MSFT"], [10.0, 20.0])
+        watchlist = self.state.get_state()['watchlist']
+        self.assertEqual([watchlist[t]['position']['quantity'] for t in ("AAPL", "MSFT")], [7, 7])
+
+        self.adapter.engine.liquidity = 5
+        self.controller.emergency_exit()
+        watchlist = self.state.get_state()['watchlist']
+        self.assertEqual([watchlist[t]['position']['quantity'] for t in ("AAPL", "MSFT")], [2, 2])
+        self.assertInSync("AAPL", 2)
+        self.assertInSync("MSFT", 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
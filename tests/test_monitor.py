@@ -0,0 +1,100 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from core.monitor import parse_timeframe, LatencyStats, TickScheduler
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+from core.controller import TradingController
+
+
+class TestMonitorPrimitives(unittest.TestCase):
+    def test_parse_timeframe(self):
+        self.assertEqual(parse_timeframe("1min"), 60)
+        self.assertEqual(parse_timeframe("5min"), 300)
+        self.assertEqual(parse_timeframe("15s"), 15)
+        self.assertEqual(parse_timeframe("1h"), 3600)
+        with self.assertRaises(ValueError):
+            parse_timeframe("fortnight")
+
+    def test_latency_summary(self):
+        stats = LatencyStats()
+        for ms in range(1, 101):
+            stats.record(ms / 1000)
+        summary = stats.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['p50_ms'], 51.0)
+        self.assertAlmostEqual(summary['max_ms'], 100.0)
+
+    def test_scheduler_does_not_drift(self):
+        woke = []
+        scheduler = TickScheduler(0.02, lambda ts: (woke.append(time.monotonic()), time.sleep(0.005)))
+        scheduler.start()
+        time.sleep(0.5)
+        scheduler.shutdown()
+
+        # 5 ms of work per tick would add up to ~100 ms if each wait started
+        # after the work; on a fixed grid the span stays (n - 1) intervals
+        self.assertGreaterEqual(len(woke), 20)
+        self.assertEqual(scheduler.missed, 0)
+        self.assertAlmostEqual(woke[-1] - woke[0], (len(woke) - 1) * 0.02, delta=0.015)
+
+    def test_scheduler_skips_overrun_ticks(self):
+        scheduler = TickScheduler(0.01, lambda ts: time.sleep(0.035))
+        scheduler.start()
+        time.sleep(0.3)
+        scheduler.shutdown()
+        self.assertGreater(scheduler.missed, 0)
+        self.assertLess(scheduler.ticks, 15)
+
+
+class TestEventDrivenController(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+        self.controller = TradingController(self.state, {
+            'mode': 'paper',
+            'market_data': {'update_interval': 0.25},
+            'strategies': {'default': {'timeframe': '1min'}}})
+        self.controller.scheduler.shutdown()
+
+    def tearDown(self):
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_update_interval_from_config(self):
+        self.assertEqual(self.controller.scheduler.interval, 0.25)
+        self.assertEqual(self.controller.aggregator.timeframes, [60])
+
+    def test_entries_on_bar_close_only(self):
+        self.controller.start_strategy("AAPL")
+        # Many ticks inside one bar add a single close to the history: the
+        # bar's last tick, once the first tick of the next bar arrives
+        for i in range(10):
+            self.controller.on_price("AAPL", 100.0 + i, timestamp=i)
+        self.assertEqual(self.controller.price_history["AAPL"].tolist(), [])
+        self.controller.on_price("AAPL", 100.0, timestamp=60)
+        self.assertEqual(self.controller.price_history["AAPL"].tolist(), [109.0])
+
+    def test_stop_loss_checked_every_tick(self):
+        self.controller.start_strategy("AAPL")
+        self.state.enter_trade("AAPL", 100.0, 10)
+        stop = self.state.get_state()['position']['stop_loss']
+
+        self.controller.on_price("AAPL", stop + 0.5, timestamp=1.0)
+        self.assertEqual(self.state.get_state()['current_state'], "LONG")
+        self.controller.on_price("AAPL", stop - 0.01, timestamp=1.5)  # Same bar
+        self.assertEqual(self.state.get_state()['current_state'], "IDLE")
+        self.assertEqual(self.logger.query_logs(event="EXIT")[-1]['exit_reason'], "STOP_LOSS")
+        self.assertEqual(self.controller.monitor_stats()['decision_latency']['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
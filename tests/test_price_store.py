@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+from core.price_store import PriceStore
+
+
+class TestPriceStore(unittest.TestCase):
+    def test_rows_keep_their_own_history(self):
+        store = PriceStore(capacity=4, rows=2)
+        aapl, msft = store.index(["AAPL", "MSFT"])
+        for i in range(6):
+            store.append(np.array([aapl]), np.array([100.0 + i]))
+            if i % 3 == 0:  # MSFT bars close less often
+                store.append(np.array([msft]), np.array([200.0 + i]))
+
+        np.testing.assert_array_equal(store.window(np.array([aapl]), 4), [[102.0, 103.0, 104.0, 105.0]])
+        np.testing.assert_array_equal(store.window(np.array([msft]), 2), [[200.0, 203.0]])
+        np.testing.assert_array_equal(store.window(np.array([msft]), 3)[0, 0], np.nan)
+        np.testing.assert_array_equal(store.latest(np.array([aapl, msft])), [105.0, 203.0])
+        self.assertEqual(store.counts[[aapl, msft]].tolist(), [6, 2])
+
+    def test_rows_are_reused_and_grown(self):
+        store = PriceStore(capacity=3, rows=1)
+        store.append(store.index(["AAPL"]), np.array([1.0]))
+        store.remove("AAPL")
+        rows = store.index(["MSFT", "SPY"])
+        self.assertEqual(len(store.data), 2)
+        self.assertEqual(store.counts[rows].tolist(), [0, 0])
+        self.assertTrue(np.isnan(store.window(rows, 3)).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
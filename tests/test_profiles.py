@@ -0,0 +1,64 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from core.profiles import ProfileManager
+
+
+class TestProfileManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.tmpdir, "profiles.db")
+        self.manager = ProfileManager(self.db_file)
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_cache_invalidated_on_create(self):
+        self.assertEqual(self.manager.get_profile("safe_mode")['stop_loss_pct'], 1.0)
+        self.manager.create_profile("tight", {'stop_loss_pct': 0.5, 'take_profit_pct': 1.0,
+                                              'capital_allocation_pct': 2.0})
+        self.assertIn("tight", self.manager.get_all_profiles())
+        self.assertEqual(self.manager.get_profile("tight")['stop_loss_pct'], 0.5)
+
+    def test_returned_profiles_do_not_alias_cache(self):
+        profile = self.manager.get_profile("safe_mode")
+        profile['stop_loss_pct'] = 99.0
+        self.assertEqual(self.manager.get_profile("safe_mode")['stop_loss_pct'], 1.0)
+
+    def test_user_edits_survive_restart(self):
+        self.manager.create_profile("safe_mode", {'stop_loss_pct': 0.75, 'take_profit_pct': 2.0,
+                                                  'capital_allocation_pct': 1.0})
+        self.manager.close()
+        self.manager = ProfileManager(self.db_file)
+        self.assertEqual(self.manager.get_profile("safe_mode")['stop_loss_pct'], 0.75)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            self.manager.get_profile("missing")
+
+    def test_concurrent_access(self):
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(50):
+                    self.manager.create_profile(f"p{n}_{i}", {'stop_loss_pct': i})
+                    self.manager.get_profile("safe_mode")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.manager.get_all_profiles()), 2 + 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
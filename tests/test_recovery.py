@@ -16,7 +16,9 @@ class TestRecovery(unittest.TestCase):
     
     def tearDown(self):
         # Clean up test files
-        for file in [self.log_file, self.state_file, self.db_file]:
+        self.logger.close()
+        self.profile_manager.close()
+        for file in [self.log_file, self.log_file + ".idx", self.state_file, self.db_file]:
             if os.path.exists(file):
                 os.remove(file)
     
@@ -42,9 +44,7 @@ class TestRecovery(unittest.TestCase):
             json.dump(test_state, f)
         
         # Try to load state
-        state = TradingState(self.logger, self.profile_manager)
-        state.state_file = self.state_file
-        state.load_state()
+        state = TradingState(self.logger, self.profile_manager, state_file=self.state_file)
         
         # Verify state was recovered
         self.assertEqual(state.state['current_state'], "LONG")
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from core.ring_buffer import RingBuffer
+from core.indicators import RollingWindow
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_keeps_last_capacity_values_in_order(self):
+        ring = RingBuffer(4)
+        self.assertEqual(ring.tolist(), [])
+        ring.extend([1.0, 2.0, 3.0])
+        self.assertEqual(ring.tolist(), [1.0, 2.0, 3.0])
+        ring.extend([4.0, 5.0, 6.0])
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(list(ring), [3.0, 4.0, 5.0, 6.0])
+        self.assertEqual((ring[0], ring[-1], ring[-4]), (3.0, 6.0, 3.0))
+        self.assertEqual(ring.last, 6.0)
+        with self.assertRaises(IndexError):
+            ring[-5]
+
+    def test_view_is_contiguous_and_shares_memory(self):
+        ring = RingBuffer(5)
+        for i in range(13):
+            ring.append(float(i))
+            expected = list(range(max(0, i - 4), i + 1))
+            self.assertEqual(ring.view().tolist(), expected)
+            self.assertEqual(ring.view(2).tolist(), expected[-2:])
+        view = ring.view(3)
+        self.assertTrue(np.shares_memory(view, ring._array))
+        self.assertEqual(float(view.sum()), 10.0 + 11.0 + 12.0)
+
+    def test_rejects_empty_capacity(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+
+class TestRollingWindowOnRingBuffer(unittest.TestCase):
+    def test_matches_numpy_and_survives_resync(self):
+        values = np.random.default_rng(3).normal(100, 5, 500)
+        window = RollingWindow(20)
+        window.RESYNC_EVERY = 7
+        for i, x in enumerate(values.tolist()):
+            window.update(x)
+            if i >= 19:
+                recent = values[i - 19:i + 1]
+                self.assertAlmostEqual(window.sma(), recent.mean(), places=9)
+                self.assertAlmostEqual(window.std(), recent.std(), places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+
+
+class TestStateSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+
+    def tearDown(self):
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_snapshots_are_shared_and_read_only(self):
+        snapshot = self.state.get_state()
+        self.assertIs(self.state.get_state(), snapshot)
+        with self.assertRaises(TypeError):
+            snapshot['equity'] = 0.0
+        with self.assertRaises(TypeError):
+            snapshot['watchlist']['AAPL'] = {}
+
+    def test_update_publishes_new_version(self):
+        before = self.state.get_state()
+        self.state.enter_trade("AAPL", 100.0, 10)
+        after = self.state.get_state()
+
+        self.assertEqual(after.version, before.version + 1)
+        self.assertNotEqual(after.etag, before.etag)
+        self.assertEqual(before['current_state'], "IDLE")  # Old readers unaffected
+        self.assertEqual(after['position']['ticker'], "AAPL")
+        with self.assertRaises(TypeError):
+            after['position']['quantity'] = 0
+
+        self.assertEqual(json.loads(after.to_bytes()), dict(after))
+
+    def test_logged_snapshots_round_trip(self):
+        self.state.enter_trade("AAPL", 100.0, 10)
+        change = self.logger.query_logs(event="STATE_CHANGE")[-1]
+        self.assertEqual(change['before_state']['current_state'], "IDLE")
+        self.assertEqual(change['after_state']['position']['quantity'], 10)
+        self.assertEqual(change['event'], "STATE_CHANGE")
+
+
+class TestStateJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state_file = os.path.join(self.tmpdir, "state.json")
+
+    def tearDown(self):
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def open_state(self, **kwargs) -> TradingState:
+        return TradingState(self.logger, self.profile_manager, state_file=self.state_file, **kwargs)
+
+    def test_recovers_from_journal_without_checkpoint(self):
+        state = self.open_state()
+        state.enter_trade("AAPL", 100.0, 10)
+        self.assertFalse(os.path.exists(self.state_file))  # Only journaled so far
+        expected = dict(state.get_state())
+
+        # Simulate a crash: no close(), so no final checkpoint
+        recovered = self.open_state()
+        self.assertEqual(dict(recovered.get_state()), expected)
+        # Recovery compacts the journal into a checkpoint
+        self.assertTrue(os.path.exists(self.state_file))
+        self.assertFalse(os.path.exists(recovered.journal_file))
+        recovered.close()
+
+    def test_torn_final_record_is_ignored(self):
+        state = self.open_state()
+        state.update_state({"equity": 101000.0})
+        state.update_state({"equity": 102000.0})
+        with open(state.journal_file, 'ab') as f:
+            f.write(b'{"equity": 1')
+
+        recovered = self.open_state()
+        self.assertEqual(recovered.get_state()['equity'], 102000.0)
+        recovered.close()
+
+    def test_torn_first_record_is_cleared(self):
+        state = self.open_state()
+        with open(state.journal_file, 'wb') as f:
+            f.write(b'{"equity": 1')
+
+        # Later updates must not land behind the torn record, where recovery would drop them
+        recovered = self.open_state()
+        self.assertFalse(os.path.exists(recovered.journal_file))
+        recovered.update_state({"equity": 101000.0})
+        self.assertEqual(self.open_state().get_state()['equity'], 101000.0)
+
+    def test_corrupt_checkpoint_is_kept_and_logged(self):
+        with open(self.state_file, 'w') as f:
+            f.write('{"equity": ')
+
+        state = self.open_state()
+        self.assertEqual(state.get_state()['equity'], 100000.0)
+        state.update_state({"equity": 101000.0})
+        state.close()
+        with open(self.state_file + '.corrupt') as f:
+            self.assertEqual(f.read(), '{"equity": ')
+        self.assertEqual(self.logger.query_logs(event="STATE_CORRUPT")[-1]['event'], "STATE_CORRUPT")
+
+    def test_checkpoint_interval_bounds_journal(self):
+        state = self.open_state(checkpoint_interval=5)
+        for i in range(12):
+            state.update_state({"equity": 100000.0 + i})
+
+        with open(state.journal_file) as f:
+            self.assertEqual(len(f.readlines()), 2)
+        with open(self.state_file) as f:
+            self.assertEqual(json.load(f)['equity'], 100009.0)
+        self.assertEqual(self.open_state().get_state()['equity'], 100011.0)
+
+    def test_replay_after_checkpoint_is_idempotent(self):
+        state = self.open_state()
+        state.update_state({"equity": 101000.0})
+        with open(state.journal_file, 'rb') as f:
+            journal = f.read()
+        state.close()
+        # Crash between checkpoint rename and journal removal
+        with open(state.journal_file, 'wb') as f:
+            f.write(journal)
+
+        self.assertEqual(self.open_state().get_state()['equity'], 101000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
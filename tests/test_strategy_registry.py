@@ -0,0 +1,216 @@
+import unittest
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import yaml
+from core.strategy import StrategyEngine
+from core.state import TradingState
+from core.logger import TradeLogger
+from core.profiles import ProfileManager
+from core.controller import TradingController
+
+BREAKOUT = {'conditions': {'entry': ['price > ema_20'], 'exit': ['rsi > 80']}, 'timeframe': '5min'}
+SCALP = {'conditions': {'entry': ['rsi between 40 and 60']}, 'timeframe': '1min'}
+
+
+class TestStrategyEngineReload(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "strategies.yaml")
+        self.engine = StrategyEngine(self.path, defaults={'default': BREAKOUT})
+
+    def tearDown(self):
+        self.engine.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def write(self, strategies, mtime):
+        with open(self.path, 'w') as f:
+            f.write(strategies if isinstance(strategies, str) else yaml.dump(strategies))
+        os.utime(self.path, (mtime, mtime))  # Distinct even on coarse-mtime filesystems
+
+    def test_defaults_until_file_exists(self):
+        self.assertEqual(self.engine.get_all_strategies(), ['default'])
+        self.assertFalse(self.engine.reload())
+
+    def test_reload_swaps_in_recompiled_strategies(self):
+        published = []
+        self.engine.add_reload_listener(published.append)
+        before = self.engine.compiled
+        self.write({'scalping': SCALP}, 1000)
+
+        self.assertTrue(self.engine.reload())
+        self.assertFalse(self.engine.reload())  # Unchanged since
+        self.assertEqual(self.engine.get_all_strategies(), ['scalping'])
+        self.assertEqual(set(self.engine.compiled), {'scalping'})
+        self.assertEqual(set(before), {'default'})  # Old registry left intact
+        self.assertEqual(published, [{'scalping': SCALP}])
+        masks = self.engine.evaluate_conditions('scalping', {'rsi': 50})
+        self.assertEqual(masks, {'entry': True, 'exit': False})
+
+    def test_invalid_file_keeps_current_strategies(self):
+        self.write({'scalping': SCALP}, 1000)
+        self.engine.reload()
+        for broken in ("scalping: [unclosed", {'bad': {'conditions': {'entry': ['price >']}}},
+                       {'bad': {'timeframe': 'fortnight'}}):
+            self.write(broken, 1000 + len(str(broken)))
+            self.assertFalse(self.engine.reload())
+            self.assertEqual(self.engine.get_all_strategies(), ['scalping'])
+
+    def test_created_strategy_is_saved_without_triggering_reload(self):
+        self.engine.create_strategy('scalping', SCALP)
+        self.assertFalse(self.engine.reload())
+        with open(self.path) as f:
+            self.assertEqual(yaml.safe_load(f), {'default': BREAKOUT, 'scalping': SCALP})
+        with self.assertRaises(ValueError):
+            self.engine.create_strategy('bad', {'conditions': {'entry': ['price >']}})
+        self.assertNotIn('bad', self.engine.strategies)
+
+    def test_watcher_picks_up_edits(self):
+        self.engine.watch(0.02)
+        self.write({'default': BREAKOUT, 'scalping': SCALP}, 1000)
+        deadline = time.monotonic() + 2
+        while 'scalping' not in self.engine.compiled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn('scalping', self.engine.compiled)
+        self.assertEqual(self.engine.reloads, 1)
+
+
+class TestControllerStrategies(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = TradeLogger(os.path.join(self.tmpdir, "trade_log.jsonl"))
+        self.profile_manager = ProfileManager(os.path.join(self.tmpdir, "profiles.db"))
+        self.state = TradingState(self.logger, self.profile_manager,
+                                  state_file=os.path.join(self.tmpdir, "state.json"))
+        self.controller = TradingController(self.state, {
+            'mode': 'paper',
+            'strategies_file': os.path.join(self.tmpdir, "strategies.yaml"),
+            'strategies': {'default': BREAKOUT}})
+        self.controller.scheduler.shutdown()
+
+    def tearDown(self):
+        self.controller.strategy_engine.close()
+        self.state.close()
+        self.logger.close()
+        self.profile_manager.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_strategies_come_from_the_registry(self):
+        self.assertEqual(self.controller.get_strategies(), ['default'])
+        self.assertEqual(self.controller.get_strategy('default'), BREAKOUT)
+        self.assertIsNone(self.controller.get_strategy('momentum'))
+        self.assertEqual(self.controller.set_strategy('momentum')[0], False)
+
+    def test_new_strategy_adds_its_timeframe(self):
+        self.assertEqual(self.controller.aggregator.timeframes, [300])
+        success, _ = self.controller.create_strategy('scalping', SCALP)
+        self.assertTrue(success)
+        self.assertEqual(self.controller.aggregator.timeframes, [60, 300])
+        self.assertTrue(self.controller.set_strategy('scalping')[0])
+        self.assertEqual(self.controller._timeframe_seconds(), 60)
+
+        success, message = self.controller.create_strategy('bad', {'timeframe': 'fortnight'})
+        self.assertFalse(success)
+        self.assertIn('fortnight', message)
+
+    def test_entries_and_exits_follow_active_strategy(self):
+        self.controller.create_strategy('trend', {
+            'conditions': {'entry': ['price > sma_20'], 'exit': ['price < entry_price * 0.998']},
+            'timeframe': '1min'})
+        self.controller.set_strategy('trend')
+        self.controller.start_strategy("AAPL")
+        # Each tick closes the one-minute bar of the tick before it
+        for i, price in enumerate([100.0] * 21 + [100.5, 100.5, 100.2, 100.2]):
+            self.controller.on_price("AAPL", price, timestamp=i * 60.0)
+
+        entry, = self.logger.query_logs(event="ENTRY")
+        exit_, = self.logger.query_logs(event="EXIT")
+        self.assertEqual(entry['entry_price'], 100.5)  # Flat closes never entered
+        self.assertEqual(exit_['exit_reason'], "STRATEGY_EXIT")
+        self.assertEqual(exit_['exit_price'], 100.2)
+        self.assertEqual(self.state.get_state()['current_state'], "IDLE")
+
+    def test_watchlist_conditions_evaluated_in_one_batch(self):
+        self.controller.create_strategy('trend', {
+            'conditions': {'entry': ['price > sma_20'], 'exit': ['price < entry_price * 0.998']},
+            'timeframe': '1min'})
+        self.controller.set_strategy('trend')
+        self.controller.start_watchlist(["AAPL", "MSFT"])
+        aapl = [100.0] * 21 + [100.5, 100.5, 100.2, 100.2]
+        for i, price in enumerate(aapl):
+            self.controller._monitor_watchlist(i * 60.0, {"AAPL": price, "MSFT": 200.0})
+
+        entry, = self.logger.query_logs(event="ENTRY")
+        exit_, = self.logger.query_logs(event="EXIT")
+        self.assertEqual((entry['ticker'], entry['entry_price']), ("AAPL", 100.5))
+        self.assertEqual((exit_['exit_reason'], exit_['exit_price']), ("STRATEGY_EXIT", 100.2))
+
+        # The batch sees the same indicator values as a per-ticker calculation
+        rows = self.controller.price_store.index(["AAPL", "MSFT"])
+        batch = self.controller.strategy_engine.calculate_indicators_batch(
+            self.controller.price_store.window(rows, self.controller.price_store.capacity))
+        single = self.controller.strategy_engine.calculate_indicators(aapl[:-1], [])
+        self.assertAlmostEqual(batch['sma_20'][0], single['sma_20'])
+        self.assertAlmostEqual(batch['rsi'][0], single['rsi'])
+
+    def test_reload_waits_for_the_tick_lock(self):
+        added = threading.Event()
+        with self.state.transaction():  # As if a tick were being aggregated
+            watcher = threading.Thread(target=lambda: (
+                self.controller.create_strategy('scalping', SCALP), added.set()))
+            watcher.start()
+            self.assertFalse(added.wait(0.1))
+            self.assertEqual(self.controller.aggregator.timeframes, [300])
+        watcher.join(2)
+        self.assertTrue(added.is_set())
+        self.assertEqual(self.controller.aggregator.timeframes, [60, 300])
+
+
+class TestShippedStrategies(unittest.TestCase):
+    """Every strategy in config.yaml must be able to trade on the bars the
+    controller builds (ticks carry no volume)"""
+
+    BARS = 1000
+
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(__file__), "..", "config.yaml")) as f:
+            self.strategies = yaml.safe_load(f)['strategies']
+
+    def entries(self, name):
+        tmpdir = tempfile.mkdtemp()
+        logger = TradeLogger(os.path.join(tmpdir, "trade_log.jsonl"))
+        profile_manager = ProfileManager(os.path.join(tmpdir, "profiles.db"))
+        state = TradingState(logger, profile_manager, state_file=os.path.join(tmpdir, "state.json"))
+        controller = TradingController(state, {
+            'mode': 'paper',
+            'strategies_file': os.path.join(tmpdir, "strategies.yaml"),
+            'strategies': self.strategies})
+        controller.scheduler.shutdown()
+        try:
+            controller.set_strategy(name)
+            controller.start_strategy("AAPL")
+            seconds = controller._timeframe_seconds()
+            rng = random.Random(11)
+            price = 100.0
+            for i in range(self.BARS):  # One tick per bar, each closing the one before
+                price *= 1 + rng.gauss(0, 0.01)
+                controller.on_price("AAPL", price, timestamp=i * seconds)
+            return len(logger.query_logs(event="ENTRY"))
+        finally:
+            controller.strategy_engine.close()
+            state.close()
+            logger.close()
+            profile_manager.close()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_every_shipped_strategy_can_enter(self):
+        for name in self.strategies:
+            with self.subTest(strategy=name):
+                self.assertGreater(self.entries(name), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from core.backtest import Bars, run_backtest
+from core.sweep import parse_range, build_grid, run_sweep
+
+STRATEGIES = {
+    "mean_reversion": {
+        "conditions": {
+            "entry": ["price < bb_lower", "rsi < 30"],
+            "exit": ["price > bb_middle", "rsi > 70"]
+        }
+    }
+}
+
+BASE_PROFILE = {'stop_loss_pct': 1.0, 'take_profit_pct': 2.0, 'capital_allocation_pct': 1.0}
+
+
+class TestSweep(unittest.TestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("0.5:2:0.5"), [0.5, 1.0, 1.5, 2.0])
+        self.assertEqual(parse_range("1,3"), [1.0, 3.0])
+
+    def test_grid_uses_base_profile_for_fixed_fields(self):
+        grid = build_grid(["a", "b"], {'stop_loss_pct': [1.0, 2.0]}, BASE_PROFILE)
+        self.assertEqual(len(grid), 4)
+        self.assertTrue(all(params['take_profit_pct'] == 2.0 for params in grid))
+
+    def test_sweep_matches_single_backtests(self):
+        rng = np.random.default_rng(3)
+        close = 450 * np.exp(np.cumsum(rng.normal(0, 0.002, 5000)))
+        volume = rng.integers(1000, 50000, 5000).astype(float)
+        grid = build_grid(["mean_reversion"], {'stop_loss_pct': [0.5, 1.0], 'take_profit_pct': [1.0, 2.0]},
+                          BASE_PROFILE)
+
+        streamed = []
+        results = run_sweep(close, volume, STRATEGIES, grid, processes=2, on_result=streamed.append)
+
+        self.assertEqual(len(streamed), len(grid))
+        self.assertEqual([r['pnl'] for r in results], sorted((r['pnl'] for r in results), reverse=True))
+        for r in results:
+            expected = run_backtest(Bars(close, volume=volume), STRATEGIES['mean_reversion'], r)
+            self.assertAlmostEqual(r['pnl'], expected.pnl)
+
+
+if __name__ == '__main__':
+    unittest.main()